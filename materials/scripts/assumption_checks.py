@@ -0,0 +1,408 @@
+# Vectorized normality and equal-variance checks over many groups
+"""
+Run the assumption checks of the practicals, pg.normality() and
+pg.homoscedasticity(), over every group and response of a DataFrame at
+once, and collect them in one tidy table.
+
+    shapiro      Shapiro–Wilk test of every group (scipy.stats.shapiro)
+    normaltest   D'Agostino and Pearson's K² test of every group
+                 (scipy.stats.normaltest)
+    levene       Levene's test across the groups (scipy.stats.levene)
+    bartlett     Bartlett's test across the groups (scipy.stats.bartlett)
+
+Instead of one scipy call per group, the values of all groups are sorted
+once and every statistic is computed from per-group sums (np.bincount)
+or, for Shapiro–Wilk, as one matrix product per group size: Royston's
+AS R94 coefficients depend only on the size, so all groups of the same
+size share them. Statistics and p-values agree with scipy to rounding.
+
+Example:
+    assumption_checks(lobsters, dv="weight", group="diet")
+    assumption_checks(features, dv=["x1", "x2", "x3"], group="treatment",
+                      by="batch", workers=4)
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtri
+from scipy.stats import chi2, f, norm
+
+__all__ = ["assumption_checks", "TESTS"]
+
+TESTS = ("shapiro", "normaltest", "levene", "bartlett")
+
+# Sorted values (groups × size) gathered at once for Shapiro–Wilk
+_CHUNK_VALUES = 2**22
+
+
+# ======================================================================
+# Groups: sorted values and per-group sums
+# ======================================================================
+class _Cells:
+    """
+    Values sorted by group ("cell") and within each cell, with the cell
+    sizes, starts and means. Every cell belongs to one family, the set of
+    groups compared by Levene's and Bartlett's tests.
+    """
+
+    __slots__ = ("values", "cell", "size", "start", "mean", "family",
+                 "n_families")
+
+    def __init__(self, values, cell, family, n_families):
+        order = np.lexsort((values, cell))
+        self.values = values[order]
+        self.cell = cell[order]
+        self.size = np.bincount(self.cell, minlength=len(family))
+        self.start = np.cumsum(self.size) - self.size
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.mean = self.sum(self.values) / self.size
+        self.family = family
+        self.n_families = n_families
+
+    def sum(self, weights):
+        """Sum of per-value weights within every cell."""
+        return np.bincount(self.cell, weights=weights,
+                           minlength=len(self.size))
+
+    def family_sum(self, weights):
+        """Sum of per-cell weights within every family."""
+        return np.bincount(self.family, weights=weights,
+                           minlength=self.n_families)
+
+    def moment(self, k):
+        """k-th central moment of every cell (biased, as scipy's)."""
+        deviations = self.values - self.mean[self.cell]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.sum(deviations ** k) / self.size
+
+    def median(self):
+        """Median of every cell."""
+        low = self.values[np.minimum(self.start + (self.size - 1) // 2,
+                                     len(self.values) - 1)]
+        high = self.values[np.minimum(self.start + self.size // 2,
+                                      len(self.values) - 1)]
+        return np.where(self.size > 0, (low + high) / 2, np.nan)
+
+
+# ======================================================================
+# Shapiro–Wilk (Royston 1995, AS R94)
+# ======================================================================
+def _poly(coefs, x):
+    """Polynomial with ascending coefficients, as swilk's poly()."""
+    return np.polynomial.polynomial.polyval(x, coefs)
+
+
+def _swilk_coefficients(n):
+    """
+    Shapiro–Wilk coefficients of a sample of size n, for the full sorted
+    sample (antisymmetric, largest last).
+    """
+    n2 = n // 2
+    if n == 3:
+        half = np.array([np.sqrt(0.5)])
+    else:
+        m = ndtri((np.arange(1, n2 + 1) - 0.375) / (n + 0.25))
+        summ2 = 2 * np.sum(m ** 2)
+        ssumm2 = np.sqrt(summ2)
+        rsn = 1 / np.sqrt(n)
+        a1 = _poly([0, .221157, -.147981, -2.071190, 4.434685, -2.706056],
+                   rsn) - m[0] / ssumm2
+        if n > 5:
+            a2 = -m[1] / ssumm2 + _poly(
+                [0, .042981, -.293762, -1.752461, 5.682633, -3.582633], rsn)
+            fac = np.sqrt((summ2 - 2 * m[0] ** 2 - 2 * m[1] ** 2)
+                          / (1 - 2 * a1 ** 2 - 2 * a2 ** 2))
+            half = -m / fac
+            half[1] = a2
+        else:
+            fac = np.sqrt((summ2 - 2 * m[0] ** 2) / (1 - 2 * a1 ** 2))
+            half = -m / fac
+        half[0] = a1
+
+    coefs = np.zeros(n)
+    coefs[:n2] = -half
+    coefs[n - n2:] = half[::-1]
+    return coefs
+
+
+def _swilk_pvalue(n, w):
+    """Royston's normalising approximation of the W distribution."""
+    if n == 3:
+        pw = 6 / np.pi * (np.arcsin(np.sqrt(w)) - np.pi / 3)
+        return np.clip(pw, 0, 1)
+
+    with np.errstate(divide="ignore"):
+        y = np.log1p(-w)
+    if n <= 11:
+        gamma = _poly([-2.273, .459], n)
+        with np.errstate(invalid="ignore"):
+            z = -np.log(gamma - y)
+        m = _poly([.544, -.39978, .025054, -6.714e-4], n)
+        s = np.exp(_poly([1.3822, -.77857, .062767, -.0020322], n))
+        return np.where(y >= gamma, 1e-99, norm.sf(z, m, s))
+
+    m = _poly([-1.5861, -.31082, -.083751, .0038915], np.log(n))
+    s = np.exp(_poly([-.4803, -.082676, .0030302], np.log(n)))
+    return norm.sf(y, m, s)
+
+
+def _shapiro(cells):
+    """W and p-value of every cell with at least three values."""
+    w = np.full(len(cells.size), np.nan)
+    pval = np.full(len(cells.size), np.nan)
+
+    for n in np.unique(cells.size[cells.size >= 3]):
+        coefs = _swilk_coefficients(n)
+        ids = np.flatnonzero(cells.size == n)
+        step = max(1, _CHUNK_VALUES // n)
+        for block in range(0, len(ids), step):
+            idx = ids[block:block + step]
+            x = cells.values[cells.start[idx, None] + np.arange(n)]
+            x = x - cells.mean[idx, None]
+            value_range = x[:, -1] - x[:, 0]
+
+            # W is the squared correlation of data and coefficients,
+            # computed as 1 - (1 - r²) as swilk does
+            with np.errstate(invalid="ignore", divide="ignore"):
+                x = x / value_range[:, None]
+                ssx = np.sum(x ** 2, axis=1)
+                ssa = coefs @ coefs
+                sax = x @ coefs
+                ssassx = np.sqrt(ssa * ssx)
+                w1 = (ssassx - sax) * (ssassx + sax) / (ssa * ssx)
+
+            # A sample of identical values gets W = 1, p = 1, as in scipy
+            flat = ~(value_range > 0)
+            w[idx] = np.where(flat, 1.0, 1 - w1)
+            pval[idx] = np.where(flat, 1.0, _swilk_pvalue(n, 1 - w1))
+    return w, pval
+
+
+# ======================================================================
+# Other tests
+# ======================================================================
+def _normaltest(cells):
+    """D'Agostino–Pearson K² and p-value of every cell of 8 or more."""
+    n = cells.size.astype(float)
+    m2, m3, m4 = cells.moment(2), cells.moment(3), cells.moment(4)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Skewness test
+        b2 = m3 / m2 ** 1.5
+        y = b2 * np.sqrt(((n + 1) * (n + 3)) / (6.0 * (n - 2)))
+        beta2 = (3.0 * (n ** 2 + 27 * n - 70) * (n + 1) * (n + 3)
+                 / ((n - 2.0) * (n + 5) * (n + 7) * (n + 9)))
+        w2 = -1 + np.sqrt(2 * (beta2 - 1))
+        delta = 1 / np.sqrt(0.5 * np.log(w2))
+        alpha = np.sqrt(2.0 / (w2 - 1))
+        y = np.where(y == 0, 1, y)
+        z_skew = delta * np.log(y / alpha + np.sqrt((y / alpha) ** 2 + 1))
+
+        # Kurtosis test
+        b2 = m4 / m2 ** 2
+        e = 3.0 * (n - 1) / (n + 1)
+        varb2 = (24.0 * n * (n - 2) * (n - 3)
+                 / ((n + 1) * (n + 1.0) * (n + 3) * (n + 5)))
+        x = (b2 - e) / np.sqrt(varb2)
+        sqrtbeta1 = (6.0 * (n * n - 5 * n + 2) / ((n + 7) * (n + 9))
+                     * np.sqrt((6.0 * (n + 3) * (n + 5))
+                               / (n * (n - 2) * (n - 3))))
+        a = 6.0 + 8.0 / sqrtbeta1 * (2.0 / sqrtbeta1
+                                     + np.sqrt(1 + 4.0 / sqrtbeta1 ** 2))
+        term1 = 1 - 2 / (9.0 * a)
+        denom = 1 + x * np.sqrt(2 / (a - 4.0))
+        term2 = np.sign(denom) * np.where(
+            denom == 0.0, np.nan, ((1 - 2.0 / a) / np.abs(denom)) ** (1 / 3.0))
+        z_kurt = (term1 - term2) / np.sqrt(2 / (9.0 * a))
+
+    k2 = z_skew ** 2 + z_kurt ** 2
+    k2 = np.where(n >= 8, k2, np.nan)
+    return k2, chi2.sf(k2, 2)
+
+
+def _levene(cells, center="median"):
+    """Levene's W and p-value of every family."""
+    centers = cells.median() if center == "median" else cells.mean
+    z = np.abs(cells.values - centers[cells.cell])
+
+    size = cells.size.astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        zbar_cell = cells.sum(z) / size
+        dvar_cell = cells.sum((z - zbar_cell[cells.cell]) ** 2)
+
+        used = size > 0
+        k = cells.family_sum(used.astype(float))
+        n_tot = cells.family_sum(size)
+        zbar = cells.family_sum(np.where(used, size * zbar_cell, 0)) / n_tot
+        numer = (n_tot - k) * cells.family_sum(
+            np.where(used, size * (zbar_cell - zbar[cells.family]) ** 2, 0))
+        denom = (k - 1) * cells.family_sum(np.where(used, dvar_cell, 0))
+        stat = numer / denom
+    return stat, f.sf(stat, k - 1, n_tot - k)
+
+
+def _bartlett(cells):
+    """Bartlett's T and p-value of every family."""
+    size = cells.size.astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ssq = cells.moment(2) * size / (size - 1)
+        used = size > 0
+        k = cells.family_sum(used.astype(float))
+        n_tot = cells.family_sum(size)
+        spsq = cells.family_sum(np.where(used, (size - 1) * ssq, 0)) \
+            / (n_tot - k)
+        numer = (n_tot - k) * np.log(spsq) - cells.family_sum(
+            np.where(used, (size - 1) * np.log(ssq), 0))
+        denom = 1 + 1 / (3 * (k - 1)) * (
+            cells.family_sum(np.where(used, 1 / (size - 1), 0))
+            - 1 / (n_tot - k))
+        stat = numer / denom
+    return stat, chi2.sf(stat, k - 1)
+
+
+# ======================================================================
+# Battery
+# ======================================================================
+def _nullable(dtype):
+    """The dtype itself, or its nullable form for integers and booleans."""
+    if isinstance(dtype, np.dtype):
+        if dtype.kind == "b":
+            return pd.BooleanDtype()
+        if dtype.kind in "iu":
+            return pd.api.types.pandas_dtype(
+                f"{'U' if dtype.kind == 'u' else ''}Int{dtype.itemsize * 8}")
+    return dtype
+
+
+def _battery(task):
+    """
+    Run the tests for some response columns. Worker entry point.
+
+    Returns the per-cell and per-family results as plain arrays, one
+    entry per response.
+    """
+    columns, cell, family, n_cells, n_families, tests, center = task
+    out = []
+    for values in columns:
+        keep = ~np.isnan(values)
+        cells = _Cells(values[keep], cell[keep], family, n_families)
+        res = {"cell_n": cells.size, "family_n": cells.family_sum(
+            cells.size.astype(float))}
+        if "shapiro" in tests:
+            res["shapiro"] = _shapiro(cells)
+        if "normaltest" in tests:
+            res["normaltest"] = _normaltest(cells)
+        if "levene" in tests:
+            res["levene"] = _levene(cells, center)
+        if "bartlett" in tests:
+            res["bartlett"] = _bartlett(cells)
+        out.append(res)
+    return out
+
+
+def assumption_checks(data, dv, group, by=None, tests=TESTS, alpha=0.05,
+                      center="median", workers=1):
+    """
+    Normality and equal-variance tests for every group and response.
+
+    Arguments:
+        data : long-format DataFrame
+        dv : name of the response column, or a list of names; each
+            response is tested separately
+        group : name of the grouping column (or list of names) whose
+            groups are tested for normality and compared for equal
+            variances
+        by : optional column name(s) splitting the data into separate
+            sets of groups, e.g. one per feature or batch
+        tests : any of "shapiro", "normaltest", "levene", "bartlett"
+        alpha : significance level for the passed column
+        center : "median" (Brown–Forsythe, the default of scipy and
+            pingouin) or "mean" for Levene's test
+        workers : number of processes; the response columns are split
+            between them
+
+    Missing values are dropped per response. Shapiro–Wilk needs at
+    least 3 values in a group and D'Agostino's test 8; smaller groups
+    get NaN, as do comparisons of fewer than two groups.
+
+    Returns a DataFrame with one row per response, group and normality
+    test and one row per response and equal-variance test: the by
+    columns, response, the group columns (missing for equal-variance
+    tests), test, statistic, pval, n and passed (pval > alpha, i.e. the
+    assumption is not rejected, as pingouin's normal and equal_var
+    columns; missing where the test could not be run). The group
+    columns keep their dtype, in its nullable form for integers and
+    booleans.
+    """
+    dvs = [dv] if isinstance(dv, str) else list(dv)
+    groups = [group] if isinstance(group, str) else list(group)
+    by = [] if by is None else [by] if isinstance(by, str) else list(by)
+    tests = [tests] if isinstance(tests, str) else list(tests)
+
+    unknown = set(tests) - set(TESTS)
+    if unknown:
+        raise ValueError(f"Unknown tests: {', '.join(sorted(unknown))}. "
+                         f"Choose from {', '.join(TESTS)}.")
+    if center not in ("median", "mean"):
+        raise ValueError("center must be 'median' or 'mean'.")
+    if workers < 1:
+        raise ValueError("workers must be a positive integer.")
+
+    # Cells are (by, group) combinations, families the by combinations
+    keys = data[by + groups]
+    grouper = keys.groupby(by + groups, sort=True)
+    cell = grouper.ngroup().fillna(-1).to_numpy(dtype=int)
+    labels = grouper.size().index.to_frame(index=False)
+    # Group columns are missing in the equal-variance rows; integer and
+    # boolean groups become nullable rather than float or object
+    group_dtypes = {name: _nullable(labels[name].dtype) for name in groups}
+    labels = labels.astype(group_dtypes)
+    if by:
+        fam_grouper = labels.groupby(by, sort=True)
+        family = fam_grouper.ngroup().to_numpy()
+        fam_labels = fam_grouper.size().index.to_frame(index=False)
+    else:
+        family = np.zeros(len(labels), dtype=int)
+        fam_labels = pd.DataFrame(index=[0])
+    n_cells, n_families = len(labels), len(fam_labels)
+
+    # Rows with a missing key take part in no group
+    values = data.loc[cell >= 0, dvs].to_numpy(dtype=float).T
+    cell = cell[cell >= 0]
+
+    batches = np.array_split(np.arange(len(dvs)), min(workers, len(dvs)))
+    tasks = [([values[i] for i in batch], cell, family, n_cells, n_families,
+              tests, center) for batch in batches]
+    if len(tasks) == 1:
+        results = [_battery(tasks[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=len(tasks)) as pool:
+            results = list(pool.map(_battery, tasks))
+    results = [res for batch in results for res in batch]
+
+    tables = []
+    for name, res in zip(dvs, results):
+        for test in tests:
+            stat, pval = res[test]
+            per_cell = test in ("shapiro", "normaltest")
+            table = (labels if per_cell else fam_labels).copy()
+            table.insert(len(by), "response", name)
+            if not per_cell:
+                for column, dtype in group_dtypes.items():
+                    table[column] = pd.Series(None, index=table.index,
+                                              dtype=dtype)
+            table["test"] = test
+            table["statistic"] = stat
+            table["pval"] = pval
+            table["n"] = res["cell_n"] if per_cell else \
+                res["family_n"].astype(int)
+            tables.append(table)
+
+    out = pd.concat(tables, ignore_index=True)
+    out = out[by + ["response"] + groups
+              + ["test", "statistic", "pval", "n"]]
+    out["passed"] = (out["pval"] > alpha).astype("boolean").mask(
+        out["pval"].isna())
+    return out
@@ -0,0 +1,79 @@
+"""
+Benchmark: assumption_checks() vs one scipy call per group and response,
+as pg.normality() and pg.homoscedasticity() make them.
+
+The per-group loop is timed over the first LOOP_GROUPS groups and scaled
+to all of them.
+
+Run from the materials/ directory:
+
+    python scripts/benchmarks/bench_assumption_checks.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from assumption_checks import assumption_checks
+
+LOOP_GROUPS = 200
+
+
+def _synthetic_data(n_groups, group_size, n_responses, seed=0):
+    """Long-format table: groups nested in batches of ten, skewed values."""
+    rng = np.random.default_rng(seed)
+    group = np.repeat(np.arange(n_groups), group_size)
+    df = pd.DataFrame({"batch": group // 10, "group": group})
+    for j in range(n_responses):
+        df[f"v{j}"] = rng.gamma(2.0, size=len(group))
+    return df
+
+
+def _loop(df, responses, n_groups):
+    """Time the scipy calls for the first LOOP_GROUPS groups, scaled."""
+    subsets = [sub for _, sub in df.groupby("group")][:LOOP_GROUPS]
+    start = time.perf_counter()
+    for response in responses:
+        for sub in subsets:
+            stats.shapiro(sub[response])
+            stats.normaltest(sub[response])
+    per_group = (time.perf_counter() - start) / len(subsets)
+
+    batches = [sub for _, sub in df.groupby("batch")][:LOOP_GROUPS // 10]
+    start = time.perf_counter()
+    for response in responses:
+        for sub in batches:
+            samples = [s[response] for _, s in sub.groupby("group")]
+            stats.levene(*samples)
+            stats.bartlett(*samples)
+    per_batch = (time.perf_counter() - start) / len(batches)
+
+    return per_group * n_groups + per_batch * n_groups / 10
+
+
+def main(cases=((1_000, 30, 2), (20_000, 30, 4)), workers=(1, 4)):
+    print(f"{'groups':>7} {'responses':>10} "
+          + "".join(f"{f'vectorized, {w} proc.':>22}" for w in workers)
+          + f"{'loop (est.)':>14}")
+    for n_groups, group_size, n_responses in cases:
+        df = _synthetic_data(n_groups, group_size, n_responses)
+        responses = [f"v{j}" for j in range(n_responses)]
+
+        times = []
+        for w in workers:
+            start = time.perf_counter()
+            assumption_checks(df, responses, "group", by="batch", workers=w)
+            times.append(time.perf_counter() - start)
+
+        loop = _loop(df, responses, n_groups)
+        print(f"{n_groups:>7} {n_responses:>10} "
+              + "".join(f"{t:>21.3f}s" for t in times) + f"{loop:>13.3f}s")
+
+
+if __name__ == "__main__":
+    main()
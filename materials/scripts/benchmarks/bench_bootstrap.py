@@ -0,0 +1,90 @@
+"""
+Benchmark: bootstrap_ols() and bootstrap_effsize() vs refitting every
+replicate in Python (smf.ols on resampled rows; Hedges' g from resampled
+samples), and vs scipy.stats.bootstrap for the effect size.
+
+The refit loops are timed over LOOP_REPLICATES replicates and scaled to
+N_BOOT.
+
+Run from the materials/ directory:
+
+    python scripts/benchmarks/bench_bootstrap.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import statsmodels.formula.api as smf
+from scipy import stats
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bootstrap import bootstrap_effsize, bootstrap_ols
+
+N_BOOT = 2_000
+LOOP_REPLICATES = 50
+
+# scipy gets the replicates per batch that the default memory budget of
+# the bootstrap module allows, so both hold the same amount of memory
+MAX_MEMORY = 16 * 2**20
+
+
+def _regression_data(n, p, seed=0):
+    """Heavy-tailed regression on p standard normal predictors."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(n, p)),
+                      columns=[f"x{j}" for j in range(p)])
+    df["y"] = df.to_numpy().sum(axis=1) + rng.standard_t(3, n)
+    return df
+
+
+def _hedges(x, y, axis=-1):
+    n1, n2 = x.shape[axis], y.shape[axis]
+    pooled = ((n1 - 1) * x.var(axis=axis, ddof=1)
+              + (n2 - 1) * y.var(axis=axis, ddof=1)) / (n1 + n2 - 2)
+    d = (x.mean(axis=axis) - y.mean(axis=axis)) / np.sqrt(pooled)
+    return d * (1 - 3 / (4 * (n1 + n2) - 9))
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def bench_ols(cases=((100, 3), (5_000, 5), (50_000, 10))):
+    print(f"{'OLS n':>8} {'p':>4} {'bootstrap_ols':>14} {'refits (est.)':>14}")
+    for n, p in cases:
+        df = _regression_data(n, p)
+        formula = "y ~ " + " + ".join(df.columns[:p])
+        fast = _timed(lambda: bootstrap_ols(formula, df, n_boot=N_BOOT,
+                                            seed=1))
+        rng = np.random.default_rng(1)
+        loop = _timed(lambda: [
+            smf.ols(formula, data=df.iloc[rng.integers(0, n, n)]).fit()
+            for _ in range(LOOP_REPLICATES)]) * N_BOOT / LOOP_REPLICATES
+        print(f"{n:>8} {p:>4} {fast:>13.3f}s {loop:>13.3f}s")
+
+
+def bench_effsize(sizes=(30, 1_000, 20_000)):
+    print(f"\n{'g, n':>8} {'bootstrap_effsize':>18} {'scipy BCa':>10} "
+          f"{'loop (est.)':>12}")
+    for n in sizes:
+        rng = np.random.default_rng(0)
+        x, y = rng.lognormal(size=n), rng.lognormal(size=n) + 0.2
+        fast = _timed(lambda: bootstrap_effsize(
+            x, y, eftype="hedges", n_boot=N_BOOT, seed=1).conf_int("bca"))
+        scipy_time = _timed(lambda: stats.bootstrap(
+            (x, y), _hedges, n_resamples=N_BOOT, method="BCa",
+            random_state=1, batch=MAX_MEMORY // (16 * 2 * n)))
+        loop = _timed(lambda: [
+            _hedges(rng.choice(x, n), rng.choice(y, n))
+            for _ in range(LOOP_REPLICATES)]) * N_BOOT / LOOP_REPLICATES
+        print(f"{n:>8} {fast:>17.3f}s {scipy_time:>9.3f}s {loop:>11.3f}s")
+
+
+if __name__ == "__main__":
+    bench_ols()
+    bench_effsize()
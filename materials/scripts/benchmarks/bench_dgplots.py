@@ -0,0 +1,79 @@
+"""
+Benchmark: dgplots() single-pass Matplotlib renderer vs the 1.2.0
+plotnine rasterise-and-paste pipeline.
+
+Run from the materials/ directory:
+
+    python scripts/benchmarks/bench_dgplots.py
+"""
+
+import importlib.util
+import os
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use("Agg")
+
+import numpy as np
+import pandas as pd
+import statsmodels.formula.api as smf
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load(name, filename):
+    """Import a script from the scripts directory under a given name."""
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(SCRIPTS_DIR, filename)
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _synthetic_fit(n, seed=0):
+    """Fit a two-predictor OLS model on simulated data."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "x1": rng.normal(size=n),
+        "x2": rng.normal(size=n),
+    })
+    df["y"] = 1 + 2 * df["x1"] - df["x2"] + rng.normal(size=n)
+    return smf.ols("y ~ x1 + x2", data=df).fit()
+
+
+def _time_call(func, results, repeats):
+    """Return the best wall time and the peak traced memory of func."""
+    func(results)  # warm-up: font cache, first-use imports
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(results)
+        times.append(time.perf_counter() - start)
+
+    # Memory is traced in a separate call, tracemalloc skews timings
+    tracemalloc.start()
+    func(results)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak / 2**20
+
+
+def main(sizes=(50, 500, 5000), repeats=3):
+    old = _load("dgplots_v1_2_0", "dgplots_v1.2.0.py")
+    new = _load("dgplots_current", "dgplots.py")
+
+    print(f"{'n':>8} {'1.2.0 (s)':>10} {'new (s)':>10} "
+          f"{'speed-up':>9} {'1.2.0 MiB':>10} {'new MiB':>9}")
+    for n in sizes:
+        results = _synthetic_fit(n)
+        t_old, m_old = _time_call(old.dgplots, results, repeats)
+        t_new, m_new = _time_call(new.dgplots, results, repeats)
+        print(f"{n:>8} {t_old:>10.3f} {t_new:>10.3f} "
+              f"{t_old / t_new:>8.1f}x {m_old:>10.1f} {m_new:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
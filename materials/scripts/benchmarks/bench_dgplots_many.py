@@ -0,0 +1,53 @@
+"""
+Benchmark: dgplots_many() scaling over 1–N worker processes.
+
+Run from the materials/ directory:
+
+    python scripts/benchmarks/bench_dgplots_many.py
+"""
+
+import os
+import sys
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+
+import numpy as np
+import statsmodels.api as sm
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dgplots import dgplots_many  # noqa: E402
+
+
+def _synthetic_fits(n_models, n, seed=0):
+    """Fit n_models independent three-predictor OLS models."""
+    rng = np.random.default_rng(seed)
+    fits = []
+    for _ in range(n_models):
+        X = sm.add_constant(rng.normal(size=(n, 3)))
+        y = X @ rng.normal(size=4) + rng.normal(size=n)
+        fits.append(sm.OLS(y, X).fit())
+    return fits
+
+
+def main(n_models=32, n=500):
+    fits = _synthetic_fits(n_models, n)
+    max_workers = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, 8, max_workers} & set(range(1, max_workers + 1)))
+
+    print(f"{n_models} models, n = {n}")
+    print(f"{'workers':>8} {'time (s)':>9} {'models/s':>9} {'speed-up':>9}")
+    baseline = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        dgplots_many(fits, workers=workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>9.2f} {n_models / elapsed:>9.1f} "
+              f"{baseline / elapsed:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
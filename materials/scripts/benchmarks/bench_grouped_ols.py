@@ -0,0 +1,69 @@
+"""
+Benchmark: grouped_ols() vs a loop of smf.ols(formula, data=subset).fit()
+over the groups of a data set.
+
+The loop is timed over the first LOOP_GROUPS groups and scaled to all of
+them.
+
+Run from the materials/ directory:
+
+    python scripts/benchmarks/bench_grouped_ols.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import statsmodels.formula.api as smf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from grouped_ols import grouped_ols
+
+FORMULA = "y ~ x1 + x2 + C(site)"
+LOOP_GROUPS = 100
+
+
+def _synthetic_data(n_groups, group_size, seed=0):
+    """Groups of varying size with group-specific slopes."""
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(group_size // 2, 2 * group_size, n_groups)
+    group = np.repeat(np.arange(n_groups), sizes)
+    n = len(group)
+    df = pd.DataFrame({
+        "group": group,
+        "x1": rng.normal(size=n),
+        "x2": rng.normal(size=n),
+        "site": rng.choice(["a", "b", "c"], n),
+    })
+    slope = rng.normal(size=n_groups)
+    df["y"] = 1 + slope[group] * df["x1"] - df["x2"] + rng.normal(size=n)
+    return df
+
+
+def main(cases=((100, 50), (2_000, 50), (20_000, 20)), workers=(1, 4)):
+    print(f"{'groups':>7} {'rows':>8} "
+          + "".join(f"{f'grouped, {w} thr.':>17}" for w in workers)
+          + f"{'loop (est.)':>14}")
+    for n_groups, group_size in cases:
+        df = _synthetic_data(n_groups, group_size)
+
+        grouped = []
+        for w in workers:
+            start = time.perf_counter()
+            grouped_ols(FORMULA, df, "group", workers=w)
+            grouped.append(time.perf_counter() - start)
+
+        subsets = [sub for _, sub in df.groupby("group")][:LOOP_GROUPS]
+        start = time.perf_counter()
+        for sub in subsets:
+            smf.ols(FORMULA, data=sub).fit()
+        loop = (time.perf_counter() - start) * n_groups / len(subsets)
+
+        print(f"{n_groups:>7} {len(df):>8} "
+              + "".join(f"{t:>16.3f}s" for t in grouped) + f"{loop:>13.3f}s")
+
+
+if __name__ == "__main__":
+    main()
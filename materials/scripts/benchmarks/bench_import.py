@@ -0,0 +1,78 @@
+"""
+Benchmark: start-up cost of a kernel that only runs pwr_f2_test().
+
+Each scenario runs in a fresh interpreter and reports the wall time to
+the first power result, plus which of the plotting packages ended up
+imported. Scenarios whose packages are not installed are skipped.
+
+Run from the materials/ directory:
+
+    python scripts/benchmarks/bench_import.py
+"""
+
+import subprocess
+import sys
+import time
+
+_CALL = "pwr_f2_test(u=6, f2=0.15, sig_level=0.05, power=0.9)"
+
+_REPORT = (
+    "import sys; print(','.join(m for m in "
+    "('matplotlib', 'plotnine', 'IPython', 'pingouin') if m in sys.modules))"
+)
+
+# Setup used before the helpers became importable: everything eager,
+# both scripts exec'd into the namespace.
+_EAGER_SETUP = """
+from plotnine import *
+import pandas as pd
+import numpy as np
+import pingouin as pg
+from scipy import stats
+import statsmodels.api as sm
+import statsmodels.formula.api as smf
+import scikit_posthocs as sp
+exec(open('scripts/dgplots.py').read())
+exec(open('scripts/pwr_f2_test.py').read())
+theme_set(theme_bw())
+"""
+
+SCENARIOS = {
+    "interpreter only": None,
+    "exec setup (eager)": _EAGER_SETUP,
+    "setup_files/setup.py": "exec(open('setup_files/setup.py').read())",
+    "import corestats": "import sys; sys.path.insert(0, 'scripts')\n"
+                        "from corestats import pwr_f2_test",
+}
+
+
+def _run(setup):
+    """Run one scenario in a new interpreter; return (seconds, modules)."""
+    code = _REPORT if setup is None else f"{setup}\n{_CALL}\n{_REPORT}"
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", code],
+                          capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        return None, proc.stderr.strip().splitlines()[-1]
+    return elapsed, proc.stdout.strip()
+
+
+def main(repeats=3):
+    print(f"{'scenario':<22} {'best (s)':>9}  imported")
+    for label, setup in SCENARIOS.items():
+        times = []
+        for _ in range(repeats):
+            elapsed, modules = _run(setup)
+            if elapsed is None:
+                break
+            times.append(elapsed)
+
+        if not times:
+            print(f"{label:<22} {'skipped':>9}  ({modules})")
+        else:
+            print(f"{label:<22} {min(times):>9.2f}  {modules or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: one dgplots() call drawn as a single figure vs the four
+panels drawn as separate figures on worker processes or threads.
+
+The first split call with a given executor starts its pool; it is run
+as the warm-up and not timed, as in an interactive session where the
+pool is reused. Speed-ups need as many free cores as workers.
+
+Run from the materials/ directory:
+
+    python scripts/benchmarks/bench_panel_workers.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import statsmodels.formula.api as smf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dgplots import dgplots
+
+SETTINGS = {
+    "single figure": {},
+    "split, serial": {"panel_workers": 1},
+    "split, 4 threads": {"panel_workers": 4, "panel_executor": "thread"},
+    "split, 4 processes": {"panel_workers": 4, "panel_executor": "process"},
+}
+
+
+def _synthetic_fit(n, seed=0):
+    """Fit a two-predictor OLS model on simulated data."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "x1": rng.normal(size=n),
+        "x2": rng.normal(size=n),
+    })
+    df["y"] = 1 + 2 * df["x1"] - df["x2"] + rng.normal(size=n)
+    return smf.ols("y ~ x1 + x2", data=df).fit()
+
+
+def _time_call(results, repeats, **kwargs):
+    """Best wall time of dgplots(results, output="bytes", **kwargs)."""
+    dgplots(results, output="bytes", **kwargs)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        dgplots(results, output="bytes", **kwargs)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(sizes=(500, 5000), repeats=3):
+    print(f"cores: {os.cpu_count()}")
+    print(f"{'n':>6}  " + "".join(f"{label:>20}" for label in SETTINGS))
+    for n in sizes:
+        results = _synthetic_fit(n)
+        times = [_time_call(results, repeats, **kwargs)
+                 for kwargs in SETTINGS.values()]
+        print(f"{n:>6}  " + "".join(f"{t:>19.3f}s" for t in times))
+
+
+if __name__ == "__main__":
+    main()
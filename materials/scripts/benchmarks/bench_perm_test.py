@@ -0,0 +1,85 @@
+"""
+Benchmark: permutation_test() vs scipy.stats.permutation_test() with a
+vectorized statistic, and vs a Python loop over permutations.
+
+The loop is timed over LOOP_PERMUTATIONS permutations and scaled to
+N_PERM. permutation_test() is run without early stopping, and once more
+with it, to show how many permutations a clear decision needs.
+
+Run from the materials/ directory:
+
+    python scripts/benchmarks/bench_perm_test.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+from scipy import stats
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from perm_test import permutation_test
+
+N_PERM = 100_000
+LOOP_PERMUTATIONS = 2_000
+
+# scipy gets the permutations per batch that the default memory budget of
+# permutation_test() allows, so both hold the same amount of memory
+MAX_MEMORY = 64 * 2**20
+
+SCIPY_STATISTICS = {
+    "welch": lambda *s, axis: stats.ttest_ind(*s, equal_var=False,
+                                              axis=axis).statistic,
+    "anova": lambda *s, axis: stats.f_oneway(*s, axis=axis).statistic,
+}
+
+
+def _samples(test, n, seed=0):
+    """Lognormal samples with a small shift in the last group."""
+    rng = np.random.default_rng(seed)
+    k = 2 if test == "welch" else 4
+    return [rng.lognormal(size=n) + 0.3 * (i == k - 1) for i in range(k)]
+
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def _loop(test, samples):
+    """Time a loop of scipy tests on shuffled data, scaled to N_PERM."""
+    values = np.concatenate(samples)
+    cuts = np.cumsum([len(s) for s in samples])[:-1]
+    rng = np.random.default_rng(1)
+    func = stats.f_oneway if test == "anova" else \
+        lambda a, b: stats.ttest_ind(a, b, equal_var=False)
+    start = time.perf_counter()
+    for _ in range(LOOP_PERMUTATIONS):
+        func(*np.split(rng.permutation(values), cuts))
+    return (time.perf_counter() - start) * N_PERM / LOOP_PERMUTATIONS
+
+
+def main(cases=(("welch", 30), ("welch", 1_000), ("anova", 30),
+                ("anova", 1_000))):
+    print(f"{'test':>6} {'n/group':>8} {'blocks':>9} {'early stop':>16} "
+          f"{'scipy':>9} {'loop (est.)':>12}")
+    for test, n in cases:
+        samples = _samples(test, n)
+        full, _ = _timed(lambda: permutation_test(
+            samples, test=test, n_perm=N_PERM, early_stop=False, seed=1))
+        early, res = _timed(lambda: permutation_test(
+            samples, test=test, n_perm=N_PERM, seed=1))
+        scipy_time, _ = _timed(lambda: stats.permutation_test(
+            samples, SCIPY_STATISTICS[test], n_resamples=N_PERM,
+            vectorized=True, random_state=1,
+            batch=MAX_MEMORY // (24 * n * len(samples))))
+        loop = _loop(test, samples)
+        print(f"{test:>6} {n:>8} {full:>8.3f}s "
+              f"{early:>7.3f}s/{res.n_perm:<7} {scipy_time:>8.3f}s "
+              f"{loop:>11.3f}s")
+
+
+if __name__ == "__main__":
+    main()
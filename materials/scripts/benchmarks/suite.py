@@ -0,0 +1,351 @@
+"""
+Benchmark suite for the diagnostics and power helpers.
+
+Runs dgplots() on synthetic regressions of increasing n and p and on a
+model for every CSV in materials/data, and pwr_f2_test() on the usual
+solve-for-one-parameter calls, for every bundled version of each helper:
+
+    dgplots      old (setup_files/dgplots_old.py), 1.1.0, 1.2.0, current
+    pwr_f2_test  1.0.0, current
+
+Every benchmark runs in a fresh interpreter, in the style of asv, so
+imports and caches do not leak between versions and the peak RSS is that
+of one benchmark. For each one the suite records the best wall time over
+a few repeats (after a warm-up call), the peak RSS, and for the current
+dgplots the time spent in each stage (influence, smoothing, drawing,
+layout, encoding, ...) as reported by its timing hooks.
+
+Results are compared with a stored baseline; benchmarks that got slower
+or bigger than the tolerance allows are flagged and the exit status is 1.
+
+Run from the materials/ directory:
+
+    python scripts/benchmarks/suite.py --save-baseline   # record
+    python scripts/benchmarks/suite.py                   # compare
+    python scripts/benchmarks/suite.py --quick -k CS3    # subset
+
+Legacy dgplots versions render every panel through plotnine and are only
+run up to n = LEGACY_MAX_N.
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+MATERIALS_DIR = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+
+DEFAULT_BASELINE = os.path.join(MATERIALS_DIR, "scripts", "benchmarks",
+                                "baseline.json")
+
+VERSIONS = {
+    "dgplots": {
+        "old": "setup_files/dgplots_old.py",
+        "1.1.0": "scripts/dgplots_v1.1.0.py",
+        "1.2.0": "scripts/dgplots_v1.2.0.py",
+        "current": "scripts/dgplots.py",
+    },
+    "pwr_f2_test": {
+        "1.0.0": "scripts/pwr_f2_test_v1.0.0.py",
+        "current": "scripts/pwr_f2_test.py",
+    },
+}
+
+# pwr_f2_test 1.0.0 relied on names exec'd into the notebook namespace
+_PREAMBLES = {
+    "scripts/pwr_f2_test_v1.0.0.py": (
+        "from numpy import ceil\n"
+        "from scipy.optimize import brenth\n"
+        "from scipy.special import ncfdtr\n"
+        "from scipy.stats import f\n"
+    ),
+}
+
+SYNTHETIC_N = (100, 1_000, 10_000)
+SYNTHETIC_P = (2, 10)
+LEGACY_MAX_N = 1_000
+
+POWER_CASES = {
+    "solve_v": dict(u=6, f2=0.15, sig_level=0.05, power=0.9),
+    "solve_power": dict(u=6, v=100, f2=0.15, sig_level=0.05),
+    "solve_f2": dict(u=6, v=100, sig_level=0.05, power=0.9),
+}
+POWER_CALLS = 50   # calls per timed repeat
+
+
+# ======================================================================
+# Benchmark definitions
+# ======================================================================
+def _cases(quick=False):
+    """List the (benchmark, version, case) triples to run."""
+    sizes = SYNTHETIC_N[:2] if quick else SYNTHETIC_N
+    data_files = sorted(glob.glob(os.path.join(MATERIALS_DIR, "data", "*.csv")))
+
+    cases = []
+    for version in VERSIONS["dgplots"]:
+        legacy = version != "current"
+        for n in sizes:
+            for p in SYNTHETIC_P:
+                if not (legacy and n > LEGACY_MAX_N):
+                    cases.append(("dgplots", version, f"synthetic_n{n}_p{p}"))
+        for path in data_files:
+            cases.append(("dgplots", version,
+                          "data_" + os.path.basename(path)[:-4]))
+
+    for version in VERSIONS["pwr_f2_test"]:
+        for case in POWER_CASES:
+            cases.append(("pwr_f2_test", version, case))
+    return cases
+
+
+def _synthetic_fit(n, p, seed=0):
+    """OLS fit of y on p standard normal predictors."""
+    import numpy as np
+    import pandas as pd
+    import statsmodels.formula.api as smf
+
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(n, p)),
+                      columns=[f"x{j}" for j in range(p)])
+    df["y"] = df.to_numpy() @ rng.normal(size=p) + rng.normal(size=n)
+    return smf.ols("y ~ " + " + ".join(df.columns[:-1]), data=df).fit()
+
+
+def _data_fit(name):
+    """
+    OLS fit for a course data file: the last numeric column on the other
+    columns, leaving out identifiers and many-level labels.
+    """
+    import pandas as pd
+    import statsmodels.formula.api as smf
+
+    df = pd.read_csv(os.path.join(MATERIALS_DIR, "data", name + ".csv"),
+                     encoding="utf-8-sig")
+    df = df.loc[:, [c for c in df.columns
+                    if c and not c.startswith("Unnamed")
+                    and c.lower() not in ("id", "patient_id", "date")]]
+    numeric = df.select_dtypes("number").columns
+    response = numeric[-1]
+
+    terms = []
+    for col in df.columns.drop(response):
+        if col in numeric:
+            terms.append(f"Q('{col}')")
+        elif df[col].nunique() <= 10:
+            terms.append(f"C(Q('{col}'))")
+
+    formula = f"Q('{response}') ~ " + (" + ".join(terms) or "1")
+    return smf.ols(formula, data=df).fit()
+
+
+def _fit_for(case):
+    if case.startswith("synthetic_"):
+        n, p = case[len("synthetic_n"):].split("_p")
+        return _synthetic_fit(int(n), int(p))
+    return _data_fit(case[len("data_"):])
+
+
+# ======================================================================
+# Worker: one benchmark in this process
+# ======================================================================
+def _load(path):
+    """Import a helper script from its path under a private name."""
+    import importlib.util
+
+    # Its sibling modules (e.g. dg_timing.py for dgplots.py) import by
+    # their plain names
+    directory = os.path.dirname(os.path.join(MATERIALS_DIR, path))
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+
+    spec = importlib.util.spec_from_file_location(
+        "bench_" + os.path.basename(path).replace(".", "_"),
+        os.path.join(MATERIALS_DIR, path))
+    module = importlib.util.module_from_spec(spec)
+    exec(_PREAMBLES.get(path, ""), module.__dict__)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _timed(func, repeats):
+    """Best wall time of func() over repeats, after one warm-up call."""
+    func()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def _dgplots_stages(module, results):
+    """
+    Time each stage of one call of the current dgplots with its timing
+    hooks, summing stages that run more than once.
+
+    Agg rasterises the figure during savefig, so that work counts as
+    encoding rather than drawing.
+    """
+    stages = {}
+    with module.collect_timings() as timings:
+        module.dgplots(results)
+    for record in timings:
+        stages[record.stage] = stages.get(record.stage, 0.0) + record.seconds
+    return stages
+
+
+def run_one(benchmark, version, case, repeats):
+    """Run a single benchmark and return its measurements."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    module = _load(VERSIONS[benchmark][version])
+    stages = None
+
+    # Legacy versions print their results
+    with contextlib.redirect_stdout(io.StringIO()):
+        if benchmark == "dgplots":
+            results = _fit_for(case)
+
+            def call():
+                module.dgplots(results)
+                plt.close("all")
+
+            wall = _timed(call, repeats)
+            if version == "current":
+                stages = _dgplots_stages(module, results)
+        else:
+            kwargs = POWER_CASES[case]
+            clear = getattr(module, "power_cache_clear", lambda: None)
+
+            def call():
+                clear()
+                for _ in range(POWER_CALLS):
+                    module.pwr_f2_test(**kwargs)
+
+            wall = _timed(call, repeats)
+
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    return {"wall_s": wall, "peak_rss_mib": peak_rss / 2**20,
+            "stages_s": stages}
+
+
+# ======================================================================
+# Runner
+# ======================================================================
+def _key(benchmark, version, case):
+    return f"{benchmark}|{version}|{case}"
+
+
+def _spawn(benchmark, version, case, repeats):
+    """Run one benchmark in a fresh interpreter and a scratch directory."""
+    with tempfile.TemporaryDirectory() as scratch:
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run-one",
+             benchmark, version, case, "--repeats", str(repeats)],
+            capture_output=True, text=True, cwd=scratch)
+
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline, tolerance):
+    """Return the benchmarks that regressed against the baseline."""
+    flagged = []
+    for key, res in results.items():
+        base = baseline.get(key)
+        if base is None or "error" in res or "error" in base:
+            continue
+        for metric, floor in (("wall_s", 0.005), ("peak_rss_mib", 5.0)):
+            new, old = res[metric], base[metric]
+            if new > old * (1 + tolerance) and new - old > floor:
+                flagged.append((key, metric, old, new))
+    return flagged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--run-one", nargs=3, metavar=("BENCH", "VERSION",
+                                                       "CASE"),
+                        help=argparse.SUPPRESS)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--quick", action="store_true",
+                        help="skip the largest synthetic sizes")
+    parser.add_argument("-k", dest="filter", default="",
+                        help="only run benchmarks whose key contains this")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative slow-down (default 0.2)")
+    parser.add_argument("--output", help="also write the results to this "
+                                         "JSON file")
+    args = parser.parse_args(argv)
+
+    if args.run_one:
+        print(json.dumps(run_one(*args.run_one, repeats=args.repeats)))
+        return 0
+
+    results = {}
+    print(f"{'benchmark':<46} {'wall (s)':>9} {'RSS MiB':>8}  stages (s)")
+    for bench, version, case in _cases(args.quick):
+        key = _key(bench, version, case)
+        if args.filter not in key:
+            continue
+        res = results[key] = _spawn(bench, version, case, args.repeats)
+        if "error" in res:
+            print(f"{key:<46} {'error':>9}  {res['error']}")
+            continue
+        stages = " ".join(f"{name}={t:.3f}"
+                          for name, t in (res["stages_s"] or {}).items())
+        print(f"{key:<46} {res['wall_s']:>9.3f} {res['peak_rss_mib']:>8.1f}"
+              f"  {stages}")
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=1, sort_keys=True)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as fh:
+                baseline = json.load(fh)
+        baseline.update(results)
+        with open(args.baseline, "w") as fh:
+            json.dump(baseline, fh, indent=1, sort_keys=True)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline.")
+        return 0
+
+    with open(args.baseline) as fh:
+        flagged = compare(results, json.load(fh), args.tolerance)
+
+    if not flagged:
+        print(f"\nNo regressions against {args.baseline}.")
+        return 0
+
+    print(f"\nRegressions against {args.baseline}:")
+    for key, metric, old, new in flagged:
+        print(f"  {key}: {metric} {old:.3f} -> {new:.3f} "
+              f"({new / old - 1:+.0%})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,399 @@
+# Vectorized bootstrap for OLS coefficients and effect sizes
+"""
+Bootstrap confidence intervals for the coefficients of an OLS model
+(smf.ols) and for Cohen's d and Hedges' g (pg.compute_effsize), without
+refitting anything per replicate.
+
+Resamples are drawn as an integer matrix of row indices, a chunk of
+replicates at a time:
+
+  OLS           The indices become a replicates × n matrix W of how
+                often each row was drawn, and every replicate is a
+                weighted fit. With X = QR, its normal equations are
+                (QᵀWQ) c = QᵀWy, b = R⁻¹c. QᵀWQ, QᵀWy and yᵀWy of a
+                whole chunk are matrix products of W with per-row
+                products of Q and y; QᵀWQ is built one column of Q at a
+                time, so no n × p² array is formed. Working in the
+                coordinates of Q keeps the systems well conditioned.
+  effect sizes  The samples are gathered through the indices, and group
+                means and variances are row sums of the gathered values
+                and their squares.
+
+Only the replicate estimates (and their standard errors, for the
+studentized interval) are kept, so memory depends on the chunk size, not
+on n × n_boot. Chunks get independent seeds spawned from one
+SeedSequence, so results depend only on the seed and chunk size, not on
+the number of worker processes.
+
+The result gives percentile, BCa and studentized (bootstrap-t)
+intervals. The BCa acceleration comes from the jackknife, which for both
+estimators has a closed form.
+
+Example:
+    boot = bootstrap_ols("eggs ~ weight", ladybird_py, seed=1)
+    boot.conf_int("bca")
+    bootstrap_effsize(x, y, eftype="hedges", seed=1).conf_int()
+"""
+
+import numpy as np
+import pandas as pd
+import patsy
+from scipy.special import ndtr, ndtri
+
+from seeded_chunks import run_chunks
+
+__all__ = ["bootstrap_ols", "bootstrap_effsize", "BootstrapResult", "METHODS"]
+
+METHODS = ("percentile", "bca", "studentized")
+
+# Bytes per replicate a chunk holds at most, from the arrays it
+# allocates. OLS: per row of the data the int64 resample indices and
+# their counts, which then become the float count matrix W; per
+# coefficient pair QᵀWQ and its inverse, with room for the einsum and
+# inversion workspace. Effect sizes: per row the int32 indices and the
+# gathered values
+_OLS_ROW_BYTES = 16
+_OLS_PAIR_BYTES = 24
+_EFFSIZE_ROW_BYTES = 12
+
+
+# ======================================================================
+# Resampling
+# ======================================================================
+def _counts(rng, n, size):
+    """
+    Draw size resamples of n rows as an integer index matrix and return
+    how often each row was drawn (size × n).
+    """
+    index = rng.integers(0, n, (size, n))
+    index += (np.arange(size) * n)[:, None]
+    counts = np.bincount(index.ravel(), minlength=size * n)
+    del index
+    return counts.reshape(size, n).astype(float)
+
+
+def _chunk_size(max_memory, replicate_bytes):
+    return int(max(1, max_memory // replicate_bytes))
+
+
+# ======================================================================
+# Estimators on a chunk of count matrices
+# ======================================================================
+def _ols_chunk(shared, task):
+    """
+    Worker entry point: coefficients and their standard errors for one
+    chunk of resamples. shared holds Q and the per-row products of Q and
+    y, sent to each worker process once.
+    """
+    q, qy, y2, r_inv = shared
+    n_rows, n_cols, seed, size = task
+    rng = np.random.default_rng(seed)
+    W = _counts(rng, n_rows, size)
+
+    # Row j of every QᵀWQ from the n × p products of column j with Q;
+    # the lower triangle mirrors the upper
+    qwq = np.empty((size, n_cols, n_cols))
+    for j in range(n_cols):
+        qwq[:, j, j:] = W @ (q[:, j:] * q[:, j, None])
+        qwq[:, j + 1:, j] = qwq[:, j, j + 1:]
+    qwy = W @ qy
+    ywy = W @ y2
+
+    try:
+        qwq_inv = np.linalg.inv(qwq)
+    except np.linalg.LinAlgError:
+        # Some resample left the design rank deficient
+        qwq_inv = np.linalg.pinv(qwq, hermitian=True)
+    c = np.einsum("bij,bj->bi", qwq_inv, qwy)
+    params = c @ r_inv.T
+
+    ssr = ywy - np.einsum("bi,bi->b", c, qwy)
+    scale = np.maximum(ssr, 0) / (n_rows - n_cols)
+    var = np.einsum("ip,bpq,iq->bi", r_inv, qwq_inv, r_inv)
+    return params, np.sqrt(scale[:, None] * var)
+
+
+def _cohen(sums, sqsums, sizes, paired):
+    """Cohen's d (as pg.compute_effsize) from group sums."""
+    (s1, s2), (q1, q2), (n1, n2) = sums, sqsums, sizes
+    var1 = (q1 - s1 ** 2 / n1) / (n1 - 1)
+    var2 = (q2 - s2 ** 2 / n2) / (n2 - 1)
+    if paired:
+        sd = np.sqrt((var1 + var2) / 2)
+    else:
+        sd = np.sqrt(((n1 - 1) * var1 + (n2 - 1) * var2) / (n1 + n2 - 2))
+    return (s1 / n1 - s2 / n2) / sd
+
+
+def _effsize(sums, sqsums, sizes, eftype, paired):
+    """Effect size and its large-sample standard error."""
+    d = _cohen(sums, sqsums, sizes, paired)
+    n1, n2 = sizes
+    if eftype == "hedges":
+        d = d * (1 - 3 / (4 * (n1 + n2) - 9))
+    se = np.sqrt((n1 + n2) / (n1 * n2) + d ** 2 / (2 * (n1 + n2)))
+    return d, se
+
+
+def _effsize_chunk(task):
+    """Worker entry point: effect sizes for one chunk of resamples."""
+    x, y, eftype, paired, seed, size = task
+    rng = np.random.default_rng(seed)
+    n1, n2 = len(x), len(y)
+
+    # Pairs are resampled together, independent samples each on its own
+    index = rng.integers(0, n1, (size, n1), dtype=np.int32)
+    xs = x[index]
+    ys = y[index] if paired else \
+        y[rng.integers(0, n2, (size, n2), dtype=np.int32)]
+
+    sums = (xs.sum(axis=1), ys.sum(axis=1))
+    sqsums = (np.einsum("ij,ij->i", xs, xs), np.einsum("ij,ij->i", ys, ys))
+    d, se = _effsize(sums, sqsums, (n1, n2), eftype, paired)
+    return d[:, None], se[:, None]
+
+
+def _run_chunks(worker, make_task, n_boot, chunk_size, workers, seed,
+                shared=None):
+    """Run the chunks of n_boot replicates and stack their results."""
+    results = [res for _, res in run_chunks(worker, make_task, n_boot,
+                                            chunk_size, workers, seed,
+                                            shared)]
+    estimates = np.concatenate([res[0] for res in results])
+    ses = np.concatenate([res[1] for res in results])
+    return estimates, ses
+
+
+# ======================================================================
+# Result
+# ======================================================================
+class BootstrapResult:
+    """
+    Result of bootstrap_ols() and bootstrap_effsize().
+
+    Attributes:
+        estimate : estimates on the original data (pandas Series)
+        se : their standard errors on the original data (analytic: the
+            OLS standard errors, or the large-sample SE of the effect
+            size)
+        bse : bootstrap standard errors (standard deviation of the
+            replicates)
+        replicates : DataFrame of the replicate estimates, one row per
+            replicate
+        n_boot : number of replicates
+    """
+
+    __slots__ = ("estimate", "se", "bse", "replicates", "n_boot",
+                 "_replicate_se", "_jackknife")
+
+    def __repr__(self):
+        return "\n".join([
+            "Bootstrap results:",
+            f" n_boot is: {self.n_boot}",
+            " estimates are:",
+            pd.DataFrame({"estimate": self.estimate,
+                          "bse": self.bse}).to_string(),
+        ])
+
+    def conf_int(self, method="bca", level=0.95):
+        """
+        Bootstrap confidence intervals.
+
+        Arguments:
+            method : "percentile", "bca" (bias-corrected and
+                accelerated) or "studentized" (bootstrap-t)
+            level : confidence level
+
+        Returns a DataFrame with columns lower and upper, one row per
+        estimate. BCa limits are missing when every replicate falls on
+        one side of the estimate.
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown method {method!r}. Choose from "
+                             + ", ".join(METHODS) + ".")
+        if not 0 < level < 1:
+            raise ValueError("level must be between 0 and 1.")
+
+        tail = (1 - level) / 2
+        reps = self.replicates.to_numpy()
+        theta = self.estimate.to_numpy()
+
+        if method == "percentile":
+            lower, upper = np.quantile(reps, [tail, 1 - tail], axis=0)
+        elif method == "studentized":
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t = (reps - theta) / self._replicate_se
+            t_lo, t_hi = np.nanquantile(t, [tail, 1 - tail], axis=0)
+            se = self.se.to_numpy()
+            lower, upper = theta - t_hi * se, theta - t_lo * se
+        else:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                z0 = ndtri(np.mean(reps < theta, axis=0))
+                jack = self._jackknife
+                dev = jack.mean(axis=0) - jack
+                accel = (dev ** 3).sum(axis=0) \
+                    / (6 * ((dev ** 2).sum(axis=0)) ** 1.5)
+                limits = []
+                for z in (ndtri(tail), ndtri(1 - tail)):
+                    prob = ndtr(z0 + (z0 + z) / (1 - accel * (z0 + z)))
+                    limits.append(np.array([
+                        np.quantile(reps[:, j], prob[j])
+                        if np.isfinite(prob[j]) else np.nan
+                        for j in range(reps.shape[1])]))
+            lower, upper = limits
+
+        return pd.DataFrame({"lower": lower, "upper": upper},
+                            index=self.estimate.index)
+
+
+def _result(names, estimate, se, replicates, replicate_se, jackknife):
+    res = BootstrapResult()
+    res.estimate = pd.Series(estimate, index=names)
+    res.se = pd.Series(se, index=names)
+    res.replicates = pd.DataFrame(replicates, columns=names)
+    res.bse = res.replicates.std(ddof=1)
+    res.n_boot = len(replicates)
+    res._replicate_se = replicate_se
+    res._jackknife = jackknife
+    return res
+
+
+# ======================================================================
+# Main functions
+# ======================================================================
+def bootstrap_ols(formula, data, n_boot=2_000, max_memory=16 * 2**20,
+                  workers=1, seed=None, eval_env=0):
+    """
+    Bootstrap the coefficients of an OLS model by resampling rows.
+
+    Arguments:
+        formula : model formula, as for smf.ols()
+        data : DataFrame with the model variables
+        n_boot : number of bootstrap replicates
+        max_memory : bytes a chunk of replicates may use; sets the chunk
+            size
+        workers : number of worker processes for the chunks
+        seed : seed for the SeedSequence the chunk seeds are spawned from
+        eval_env : how many frames above the caller to look up names
+            used in the formula, as in patsy
+
+    Rows with missing values are dropped, as statsmodels does. The
+    design must have full column rank.
+
+    Returns a BootstrapResult; use its conf_int() for the intervals.
+    """
+    if n_boot < 2:
+        raise ValueError("n_boot must be at least 2.")
+
+    env = patsy.EvalEnvironment.capture(eval_env, reference=1)
+    y, X = patsy.dmatrices(formula, data, eval_env=env, NA_action="drop",
+                           return_type="dataframe")
+    names = X.columns
+    y = y.to_numpy(dtype=float)[:, 0]
+    X = X.to_numpy(dtype=float)
+    n, p = X.shape
+    if n <= p:
+        raise ValueError("The model needs more observations than columns.")
+
+    q, r = np.linalg.qr(X)
+    if np.linalg.matrix_rank(r) < p:
+        raise ValueError("The design matrix is rank deficient.")
+    r_inv = np.linalg.inv(r)
+
+    # Fit on the original data
+    c = q.T @ y
+    params = r_inv @ c
+    resid = y - q @ c
+    scale = resid @ resid / (n - p)
+    se = np.sqrt(scale * np.sum(r_inv ** 2, axis=1))
+
+    # Leave-one-out coefficients for the BCa acceleration:
+    # b - (XᵀX)⁻¹ xᵢ eᵢ / (1 - hᵢ)
+    hat = np.sum(q ** 2, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        jackknife = params - (q @ r_inv.T) * (resid / (1 - hat))[:, None]
+
+    qy = q * y[:, None]
+
+    def make_task(chunk_seed, size):
+        return (n, p, chunk_seed, size)
+
+    chunk_size = _chunk_size(
+        max_memory, _OLS_ROW_BYTES * n + _OLS_PAIR_BYTES * p * p)
+    replicates, replicate_se = _run_chunks(
+        _ols_chunk, make_task, n_boot, chunk_size, workers, seed,
+        shared=(q, qy, y ** 2, r_inv))
+    return _result(names, params, se, replicates, replicate_se, jackknife)
+
+
+def bootstrap_effsize(x, y, eftype="cohen", paired=False, n_boot=2_000,
+                      max_memory=16 * 2**20, workers=1, seed=None):
+    """
+    Bootstrap Cohen's d or Hedges' g of two samples.
+
+    Arguments:
+        x, y : the two samples
+        eftype : "cohen" or "hedges", as in pg.compute_effsize()
+        paired : whether x and y are paired; pairs are then resampled
+            together, otherwise each sample is resampled on its own
+        n_boot : number of bootstrap replicates
+        max_memory : bytes a chunk of replicates may use; sets the chunk
+            size
+        workers : number of worker processes for the chunks
+        seed : seed for the SeedSequence the chunk seeds are spawned from
+
+    Missing values are dropped (pairwise when paired). The estimate is
+    that of pg.compute_effsize(); its se, used by the studentized
+    interval, is the large-sample standard error
+    sqrt((n1 + n2) / (n1 n2) + d² / (2 (n1 + n2))).
+
+    Returns a BootstrapResult; use its conf_int() for the intervals.
+    """
+    if eftype not in ("cohen", "hedges"):
+        raise ValueError("eftype must be 'cohen' or 'hedges'.")
+    if n_boot < 2:
+        raise ValueError("n_boot must be at least 2.")
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if paired:
+        if len(x) != len(y):
+            raise ValueError("Paired samples must have the same length.")
+        keep = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[keep], y[keep]
+    else:
+        x, y = x[~np.isnan(x)], y[~np.isnan(y)]
+    n1, n2 = len(x), len(y)
+    if min(n1, n2) < 2:
+        raise ValueError("Each sample needs at least two values.")
+
+    sums = (x.sum(), y.sum())
+    sqsums = ((x ** 2).sum(), (y ** 2).sum())
+    estimate, se = _effsize(sums, sqsums, (n1, n2), eftype, paired)
+
+    # Leave-one-out estimates for the BCa acceleration, from the sums
+    if paired:
+        jackknife = _effsize((sums[0] - x, sums[1] - y),
+                             (sqsums[0] - x ** 2, sqsums[1] - y ** 2),
+                             (n1 - 1, n2 - 1), eftype, paired)[0]
+    else:
+        jackknife = np.concatenate([
+            _effsize((sums[0] - x, np.full(n1, sums[1])),
+                     (sqsums[0] - x ** 2, np.full(n1, sqsums[1])),
+                     (n1 - 1, n2), eftype, paired)[0],
+            _effsize((np.full(n2, sums[0]), sums[1] - y),
+                     (np.full(n2, sqsums[0]), sqsums[1] - y ** 2),
+                     (n1, n2 - 1), eftype, paired)[0],
+        ])
+
+    def make_task(chunk_seed, size):
+        return (x, y, eftype, paired, chunk_seed, size)
+
+    # Paired resamples gather both samples through one index
+    replicate_bytes = (_EFFSIZE_ROW_BYTES + 8) * n1 if paired \
+        else _EFFSIZE_ROW_BYTES * (n1 + n2)
+    replicates, replicate_se = _run_chunks(
+        _effsize_chunk, make_task, n_boot,
+        _chunk_size(max_memory, replicate_bytes), workers, seed)
+    return _result([eftype], [estimate], [se], replicates, replicate_se,
+                   jackknife[:, None])
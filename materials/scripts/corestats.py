@@ -0,0 +1,255 @@
+# corestats: lazy entry point for the course helper scripts
+"""
+Importable access to the helper scripts in this directory.
+
+    import corestats
+    corestats.pwr_f2_test(u=6, f2=0.15, sig_level=0.05, power=0.9)
+
+Importing corestats loads nothing heavy. The helper modules are imported
+on first use: attribute access loads the module that defines the name,
+and the public functions are exposed as thin proxies, so that
+
+    from corestats import dgplots, pwr_f2_test
+
+is cheap as well. dgplots.py, and with it Matplotlib, is only imported
+when dgplots() is first called; plotnine and IPython are deferred further
+inside dgplots.py itself.
+
+The helper modules themselves are available as lazy submodules:
+
+    corestats.diagnostics   dgplots.py
+    corestats.power         pwr_f2_test.py
+    corestats.power_sim     pwr_sim.py
+    corestats.streaming     ols_stream.py
+    corestats.stepwise      step_aic.py
+    corestats.grouped       grouped_ols.py
+    corestats.assumptions   assumption_checks.py
+    corestats.permutation   perm_test.py
+    corestats.resampling    bootstrap.py
+    corestats.caching       plot_cache.py
+    corestats.timing        dg_timing.py
+    corestats.renderer      dg_renderer.py
+
+lazy_import() applies the same idea to third-party modules, and
+lazy_star() to star imports such as `from plotnine import *`, for use in
+setup_files/setup.py.
+"""
+
+import ast
+import importlib
+import importlib.util
+import os
+import sys
+
+# The helper scripts are plain modules next to this file
+_HERE = os.path.dirname(os.path.abspath(__file__))
+if _HERE not in sys.path:
+    sys.path.insert(0, _HERE)
+
+
+# Submodule aliases -> module name
+_SUBMODULES = {
+    "diagnostics": "dgplots",
+    "power": "pwr_f2_test",
+    "power_sim": "pwr_sim",
+    "streaming": "ols_stream",
+    "stepwise": "step_aic",
+    "grouped": "grouped_ols",
+    "assumptions": "assumption_checks",
+    "permutation": "perm_test",
+    "resampling": "bootstrap",
+    "caching": "plot_cache",
+    "timing": "dg_timing",
+    "renderer": "dg_renderer",
+}
+
+# Public functions, exposed as proxies -> defining module
+_FUNCTIONS = {
+    "dgplots": "dgplots",
+    "dgplots_many": "dgplots",
+    "influence_measures": "dgplots",
+    "influential_points": "dgplots",
+    "lowess_smooth": "dgplots",
+    "enable_cache": "plot_cache",
+    "disable_cache": "plot_cache",
+    "quantile_sketch": "dgplots",
+    "add_timing_hook": "dg_timing",
+    "remove_timing_hook": "dg_timing",
+    "collect_timings": "dg_timing",
+    "shutdown_panel_workers": "dgplots",
+    "pwr_f2_test": "pwr_f2_test",
+    "pwr_f2_grid": "pwr_f2_test",
+    "power_results_frame": "pwr_f2_test",
+    "power_cache_info": "pwr_f2_test",
+    "power_cache_clear": "pwr_f2_test",
+    "pwr_sim": "pwr_sim",
+    "ttest_design": "pwr_sim",
+    "anova_design": "pwr_sim",
+    "regression_design": "pwr_sim",
+    "stream_ols": "ols_stream",
+    "stream_diagnostics": "ols_stream",
+    "dgplots_csv": "ols_stream",
+    "step_aic": "step_aic",
+    "grouped_ols": "grouped_ols",
+    "dgplots_group": "grouped_ols",
+    "assumption_checks": "assumption_checks",
+    "permutation_test": "perm_test",
+    "bootstrap_ols": "bootstrap",
+    "bootstrap_effsize": "bootstrap",
+}
+
+# Other public names (classes, constants), resolved on first access
+_ATTRIBUTES = {
+    "DiagnosticRenderer": "dg_renderer",
+    "PlotCache": "plot_cache",
+    "QuantileSketch": "dgplots",
+    "StageTiming": "dg_timing",
+    "LARGE_N_THRESHOLD": "dgplots",
+    "PowerResult": "pwr_f2_test",
+    "SimPowerResult": "pwr_sim",
+    "StreamOLSResults": "ols_stream",
+    "StreamDiagnostics": "ols_stream",
+    "StepAICResult": "step_aic",
+    "GroupedOLSResults": "grouped_ols",
+    "PermutationResult": "perm_test",
+    "BootstrapResult": "bootstrap",
+}
+
+# Only the proxies, so that `from corestats import *` stays cheap
+__all__ = list(_FUNCTIONS)
+
+# Callbacks of lazy_star(), run once when their module is first loaded
+# through a proxy
+_IMPORT_HOOKS = {}
+
+
+def _import(name):
+    module = importlib.import_module(name)
+    for hook in _IMPORT_HOOKS.pop(name, ()):
+        hook(module)
+    return module
+
+
+class _LazyFunction:
+    """
+    Stand-in for a helper function that imports its module on first call.
+    """
+
+    __slots__ = ("_module", "_name", "_func")
+
+    def __init__(self, module, name):
+        self._module = module
+        self._name = name
+        self._func = None
+
+    def _resolve(self):
+        if self._func is None:
+            self._func = getattr(_import(self._module), self._name)
+        return self._func
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        # __doc__, __wrapped__-style lookups and help() go to the real
+        # function, at the price of importing it.
+        return getattr(self._resolve(), attr)
+
+    def __repr__(self):
+        if self._func is not None:
+            return repr(self._func)
+        return f"<lazy function {self._module}.{self._name}>"
+
+
+for _name, _module in _FUNCTIONS.items():
+    globals()[_name] = _LazyFunction(_module, _name)
+del _name, _module
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        value = importlib.import_module(_SUBMODULES[name])
+    elif name in _ATTRIBUTES:
+        value = getattr(importlib.import_module(_ATTRIBUTES[name]), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULES) | set(_ATTRIBUTES))
+
+
+def lazy_import(name):
+    """
+    Return module `name`, deferring its execution until an attribute of
+    it is first used.
+
+    Already imported modules are returned as they are. Raises
+    ModuleNotFoundError straight away if the module is not installed.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def _static_all(spec):
+    """
+    The module's __all__ if its source assigns it a literal, read without
+    executing the module; None otherwise.
+    """
+    try:
+        with open(spec.origin, encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+        for node in tree.body:
+            if (isinstance(node, ast.Assign)
+                    and any(getattr(t, "id", None) == "__all__"
+                            for t in node.targets)):
+                return list(ast.literal_eval(node.value))
+    except (OSError, TypeError, ValueError, SyntaxError):
+        pass
+    return None
+
+
+def lazy_star(name, on_import=None):
+    """
+    Return the names `from name import *` would bind, as proxies that
+    import the module on first call.
+
+    The names are read from the module's __all__ without running it. If
+    that is not a literal, the module is imported straight away and its
+    real public names are returned. on_import(module) is run once, when
+    the module is loaded, e.g. to set a default theme.
+
+    Every name must be callable (functions and classes, as in plotnine).
+    Raises ModuleNotFoundError straight away if the module is not
+    installed.
+    """
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+
+    names = None if name in sys.modules else _static_all(spec)
+    if names is None:
+        module = importlib.import_module(name)
+        if on_import is not None:
+            on_import(module)
+        names = getattr(module, "__all__",
+                        [n for n in vars(module) if not n.startswith("_")])
+        return {n: getattr(module, n) for n in names}
+
+    if on_import is not None:
+        _IMPORT_HOOKS.setdefault(name, []).append(on_import)
+    return {n: _LazyFunction(name, n) for n in names}
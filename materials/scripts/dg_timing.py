@@ -0,0 +1,172 @@
+# Per-stage timings and profiling of the dgplots entry points
+"""
+Timing hooks for dgplots() and the modules built on it.
+
+Code runs its steps inside stage() blocks and its public entry points
+are wrapped with @instrumented. Functions registered with
+add_timing_hook(), or a collect_timings() block, receive a StageTiming
+record as every stage finishes, with the time spent in the stage itself
+and in the stages nested inside it. With no hooks registered, stages
+are not timed at all. Setting the DGPLOTS_PROFILE environment variable
+to a directory writes a cProfile dump of every instrumented call there.
+
+Example:
+    with collect_timings() as timings:
+        dgplots(fit)
+    pd.DataFrame([t.to_dict() for t in timings])
+"""
+
+import functools
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+__all__ = [
+    "StageTiming", "add_timing_hook", "remove_timing_hook",
+    "collect_timings", "stage", "instrumented", "PROFILE_ENV",
+]
+
+# Environment variable naming a directory to write one cProfile dump per
+# instrumented call to. Read on every call.
+PROFILE_ENV = "DGPLOTS_PROFILE"
+
+_timing_hooks = []
+_stage_state = threading.local()
+# Numbers the profile files; next() on a count is atomic, so threads
+# profiling at the same time never share a file name
+_profile_count = itertools.count(1)
+
+
+# ======================================================================
+# Records and hooks
+# ======================================================================
+class StageTiming:
+    """
+    Timing record for one stage of a dgplots() call, passed to timing
+    hooks as the stage finishes.
+
+    Attributes:
+        stage : "dgplots", "dgplots_many", "cache", "influence",
+            "smoothing", "drawing", "layout", "encoding" or "html"
+        seconds : time spent in the stage itself, excluding the stages
+            nested inside it
+        total_seconds : time including nested stages
+        depth : nesting level, 0 for the outermost call
+        info : dict of extra details, such as the number of observations
+    """
+
+    __slots__ = ("stage", "seconds", "total_seconds", "depth", "info")
+
+    def __init__(self, stage, seconds, total_seconds, depth, info):
+        self.stage = stage
+        self.seconds = seconds
+        self.total_seconds = total_seconds
+        self.depth = depth
+        self.info = info
+
+    def __repr__(self):
+        return (f"StageTiming({self.stage!r}, seconds={self.seconds:.6f}, "
+                f"depth={self.depth})")
+
+    def to_dict(self):
+        """Return the record as a plain dict."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def add_timing_hook(callback):
+    """
+    Call callback(record) with a StageTiming for every finished stage.
+
+    With no hooks registered the stages are not timed at all.
+    """
+    _timing_hooks.append(callback)
+
+
+def remove_timing_hook(callback):
+    """Unregister a hook added with add_timing_hook()."""
+    _timing_hooks.remove(callback)
+
+
+@contextmanager
+def collect_timings(callback=None):
+    """
+    Context manager that collects the StageTiming records of the calls
+    made inside it into a list, and optionally forwards each to callback.
+
+        with collect_timings() as timings:
+            dgplots(fit)
+        pd.DataFrame([t.to_dict() for t in timings])
+    """
+    records = []
+
+    def _hook(record):
+        records.append(record)
+        if callback is not None:
+            callback(record)
+
+    add_timing_hook(_hook)
+    try:
+        yield records
+    finally:
+        remove_timing_hook(_hook)
+
+
+# ======================================================================
+# Stages
+# ======================================================================
+@contextmanager
+def stage(name, **info):
+    """Time the enclosed block as one stage, if any hooks are listening."""
+    if not _timing_hooks:
+        yield
+        return
+
+    # Per-thread stack of the time spent in nested stages
+    stack = getattr(_stage_state, "stack", None)
+    if stack is None:
+        stack = _stage_state.stack = []
+
+    stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        nested = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        record = StageTiming(name, elapsed - nested, elapsed, len(stack), info)
+        for hook in list(_timing_hooks):
+            hook(record)
+
+
+def instrumented(func):
+    """
+    Decorator: time a public entry point as a stage named after it, or
+    profile it with cProfile when the PROFILE_ENV environment variable
+    is set.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profile_dir = os.environ.get(PROFILE_ENV)
+        if not profile_dir:
+            with stage(func.__name__):
+                return func(*args, **kwargs)
+
+        import cProfile
+
+        number = next(_profile_count)
+        os.makedirs(profile_dir, exist_ok=True)
+        path = os.path.join(
+            profile_dir, f"{func.__name__}-{time.strftime('%Y%m%d-%H%M%S')}"
+                         f"-{os.getpid()}-{number}.prof")
+        profiler = cProfile.Profile()
+        try:
+            with stage(func.__name__):
+                return profiler.runcall(func, *args, **kwargs)
+        finally:
+            profiler.dump_stats(path)
+
+    return wrapper
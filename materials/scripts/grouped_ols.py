@@ -0,0 +1,320 @@
+# Batched OLS fits of one formula in every group of a data set
+"""
+Fit the same OLS model separately in every group of a DataFrame, as a
+loop of smf.ols(formula, data=subset).fit() would, without the loop.
+
+The formula is parsed and the design matrix built once for the whole
+data set. Rows are sorted by group, and groups of similar size are
+stacked into zero-padded blocks of at most _CHUNK_VALUES design values.
+Each block is solved with one stacked SVD, the decomposition behind
+statsmodels' pinv fit, which also gives the leverages of every row, so
+coefficients, residuals and influence measures of all groups come out of
+a few array operations. Padding rows are all zero and change nothing.
+
+Blocks can be solved on worker threads (numpy's linear algebra releases
+the GIL) or processes.
+
+Categorical variables are coded once from the whole data set. In a group
+that lacks some level the corresponding columns are all zero; their
+coefficients are 0 and they do not count towards the rank, where a fit
+to the subset alone would leave them out of the design.
+
+Requires dgplots.py in the same directory.
+
+Example:
+    fits = grouped_ols("light ~ depth", treelight, groups="species")
+    fits.params
+    dgplots_group(fits, "Conifer")
+"""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import patsy
+
+from dgplots import (
+    LARGE_N_THRESHOLD, check_output, deliver_figure, render_diagnostics,
+    top_influential,
+)
+
+__all__ = ["grouped_ols", "dgplots_group", "GroupedOLSResults"]
+
+# Padded design values (groups × rows × columns) solved in one block
+_CHUNK_VALUES = 2**22
+
+# Singular values below this fraction of the largest are treated as zero,
+# as np.linalg.pinv() and so statsmodels do
+_RCOND = 1e-15
+
+_EXECUTORS = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+
+
+# ======================================================================
+# Blocks of groups
+# ======================================================================
+def _chunks(sizes, n_cols, max_values=_CHUNK_VALUES):
+    """
+    Split group numbers into blocks of similar size.
+
+    Groups are taken from the smallest up, and a block is closed when
+    padding all its groups to the largest would exceed max_values.
+    """
+    order = np.argsort(sizes, kind="stable")
+    chunks, current = [], []
+    for g in order:
+        if current and (len(current) + 1) * sizes[g] * n_cols > max_values:
+            chunks.append(np.array(current))
+            current = []
+        current.append(g)
+    if current:
+        chunks.append(np.array(current))
+    return chunks
+
+
+def _pad(X, y, starts, sizes, chunk):
+    """Stack the rows of the groups in chunk into zero-padded blocks."""
+    n_rows = sizes[chunk].max()
+    Xb = np.zeros((len(chunk), n_rows, X.shape[1]))
+    yb = np.zeros((len(chunk), n_rows))
+
+    # Block position (slot, within) of every row of the chunk's groups
+    slot = np.repeat(np.arange(len(chunk)), sizes[chunk])
+    first = np.repeat(starts[chunk], sizes[chunk])
+    within = np.arange(len(slot)) - np.repeat(
+        np.cumsum(sizes[chunk]) - sizes[chunk], sizes[chunk])
+    rows = first + within
+
+    Xb[slot, within] = X[rows]
+    yb[slot, within] = y[rows]
+    return Xb, yb, (slot, within, rows)
+
+
+def _solve_block(task):
+    """
+    Least-squares fits of a block of groups by stacked SVD.
+
+    Returns the coefficients, the diagonal of (X'X)⁺ per coefficient, the
+    ranks, and the fitted values and leverages of every padded row.
+    """
+    Xb, yb = task
+    u, s, vt = np.linalg.svd(Xb, full_matrices=False)
+    keep = s > _RCOND * s.max(axis=1, keepdims=True)
+    inv_s = np.divide(1.0, s, out=np.zeros_like(s), where=keep)
+
+    uty = np.einsum("gmk,gm->gk", u, yb)
+    params = np.einsum("gkp,gk->gp", vt, inv_s * uty)
+    xtx_pinv_diag = np.einsum("gkp,gk->gp", vt ** 2, inv_s ** 2)
+    fitted = np.einsum("gmp,gp->gm", Xb, params)
+    hat = np.einsum("gmk,gmk,gk->gm", u, u, keep)
+    return params, xtx_pinv_diag, keep.sum(axis=1), fitted, hat
+
+
+# ======================================================================
+# Result
+# ======================================================================
+class GroupedOLSResults:
+    """
+    Result of grouped_ols().
+
+    Attributes:
+        params : coefficient estimates, one row per group (DataFrame)
+        bse : standard errors of the coefficients, one row per group
+        nobs : number of observations per group (Series)
+        df_resid : residual degrees of freedom per group
+        ssr : residual sum of squares per group
+        mse_resid : residual mean square per group
+        rsquared : coefficient of determination per group
+        diagnostics : one row per observation used, indexed as in the
+            data, with the group columns, predicted_values, residuals,
+            leverage, resid_studentized_internal, cooks_d, std_resid and
+            obs, the position of the row within its group
+        groups : names of the grouping columns
+    """
+
+    __slots__ = ("params", "bse", "nobs", "df_resid", "ssr", "mse_resid",
+                 "rsquared", "diagnostics", "groups", "_codes")
+
+    def __repr__(self):
+        return "\n".join([
+            "Grouped OLS results:",
+            f" groups are: {', '.join(map(str, self.groups))}",
+            f" number of groups is: {len(self.params)}",
+            f" nobs is: {int(self.nobs.sum())}",
+            " params are:",
+            self.params.to_string(max_rows=10),
+        ])
+
+    def group_diagnostics(self, group):
+        """
+        Diagnostics of one group, in the layout dgplots() draws from.
+
+        group is the group's key: a value of the grouping column, or a
+        tuple of values with several grouping columns.
+        """
+        try:
+            position = self.params.index.get_loc(group)
+        except KeyError:
+            raise KeyError(f"No group {group!r}.") from None
+        df = self.diagnostics.loc[self._codes == position]
+        return df.drop(columns=self.groups)
+
+
+# ======================================================================
+# Main function
+# ======================================================================
+def grouped_ols(formula, data, groups, workers=1, executor="thread",
+                eval_env=0):
+    """
+    Fit one OLS model per group with a single design matrix.
+
+    Arguments:
+        formula : model formula, as for smf.ols()
+        data : DataFrame with the model variables and grouping columns
+        groups : name of the grouping column, or a list of names
+        workers : number of workers solving blocks of groups
+        executor : "thread" or "process"; worker processes only pay off
+            for very many groups, as every block is pickled to them
+        eval_env : how many frames above the caller to look up names
+            used in the formula, as in patsy
+
+    Rows with missing values in a model variable or grouping column are
+    dropped, as statsmodels and pandas' groupby do. Within each group the
+    results match smf.ols(formula, data=subset).fit() (see the module
+    docstring for categorical variables).
+
+    Returns a GroupedOLSResults.
+    """
+    if executor not in _EXECUTORS:
+        raise ValueError("executor must be one of "
+                         + ", ".join(map(repr, _EXECUTORS)) + ".")
+    if workers < 1:
+        raise ValueError("workers must be a positive integer.")
+    groups = [groups] if isinstance(groups, str) else list(groups)
+
+    env = patsy.EvalEnvironment.capture(eval_env, reference=1)
+    # Rows are kept by position: the index may hold duplicate labels
+    frame = data.reset_index(drop=True)
+    y, X = patsy.dmatrices(formula, frame, eval_env=env, NA_action="drop",
+                           return_type="dataframe")
+    columns = X.columns
+    intercept = "Intercept" in columns
+    rows = X.index.to_numpy()
+    keys = frame[groups].iloc[rows].set_axis(data.index[rows])
+
+    grouper = keys.groupby(groups, sort=True)
+    # Rows with a missing group key get no group number
+    codes = grouper.ngroup().fillna(-1).to_numpy(dtype=int)
+    labels = grouper.size().index
+    used = codes >= 0
+    keys, codes = keys[used], codes[used]
+    X = X.to_numpy(dtype=float)[used]
+    y = y.to_numpy(dtype=float)[used, 0]
+
+    # Rows sorted by group, each group in data order
+    order = np.argsort(codes, kind="stable")
+    sizes = np.bincount(codes, minlength=len(labels))
+    starts = np.cumsum(sizes) - sizes
+    X, y = X[order], y[order]
+
+    n_groups, n_cols = len(labels), X.shape[1]
+    chunks = _chunks(sizes, n_cols)
+    padded = [_pad(X, y, starts, sizes, chunk) for chunk in chunks]
+    tasks = [(Xb, yb) for Xb, yb, _ in padded]
+
+    if workers == 1 or len(tasks) <= 1:
+        solved = [_solve_block(task) for task in tasks]
+    else:
+        with _EXECUTORS[executor](max_workers=workers) as pool:
+            solved = list(pool.map(_solve_block, tasks))
+
+    params = np.empty((n_groups, n_cols))
+    xtx_pinv_diag = np.empty((n_groups, n_cols))
+    rank = np.empty(n_groups, dtype=int)
+    fitted = np.empty(len(y))
+    hat = np.empty(len(y))
+    for chunk, (_, _, (slot, within, rows)), block in zip(chunks, padded,
+                                                          solved):
+        params[chunk], xtx_pinv_diag[chunk], rank[chunk] = block[:3]
+        fitted[rows] = block[3][slot, within]
+        hat[rows] = block[4][slot, within]
+
+    resid = y - fitted
+    ssr = np.bincount(codes[order], weights=resid ** 2, minlength=n_groups)
+    if intercept:
+        means = np.bincount(codes[order], weights=y,
+                            minlength=n_groups) / sizes
+        tss = np.bincount(codes[order], weights=(y - means[codes[order]]) ** 2,
+                          minlength=n_groups)
+    else:
+        tss = np.bincount(codes[order], weights=y ** 2, minlength=n_groups)
+    df_resid = sizes - rank
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mse_resid = ssr / df_resid
+        bse = np.sqrt(mse_resid[:, None] * xtx_pinv_diag)
+        rsquared = 1 - ssr / tss
+
+        # Influence measures, as dgplots.influence_measures()
+        row_mse = mse_resid[codes[order]]
+        studentized = resid / np.sqrt(row_mse) / np.sqrt(1 - hat)
+        cooks_d = studentized ** 2 / n_cols * hat / (1 - hat)
+
+    # Back to data order
+    inverse = np.empty_like(order)
+    inverse[order] = np.arange(len(order))
+    diagnostics = keys.copy()
+    diagnostics["predicted_values"] = fitted[inverse]
+    diagnostics["residuals"] = resid[inverse]
+    diagnostics["leverage"] = hat[inverse]
+    diagnostics["resid_studentized_internal"] = studentized[inverse]
+    diagnostics["cooks_d"] = cooks_d[inverse]
+    diagnostics["std_resid"] = np.sqrt(np.abs(studentized[inverse]))
+    within = np.arange(len(order)) - starts[codes[order]]
+    diagnostics["obs"] = within[inverse]
+
+    res = GroupedOLSResults()
+    res.params = pd.DataFrame(params, index=labels, columns=columns)
+    res.bse = pd.DataFrame(bse, index=labels, columns=columns)
+    res.nobs = pd.Series(sizes, index=labels, name="nobs")
+    res.df_resid = pd.Series(df_resid, index=labels, name="df_resid")
+    res.ssr = pd.Series(ssr, index=labels, name="ssr")
+    res.mse_resid = pd.Series(mse_resid, index=labels, name="mse_resid")
+    res.rsquared = pd.Series(rsquared, index=labels, name="rsquared")
+    res.diagnostics = diagnostics
+    res.groups = groups
+    res._codes = codes
+    return res
+
+
+# ======================================================================
+# Plots
+# ======================================================================
+def dgplots_group(results, group, engine="matplotlib", large_n=None,
+                  large_n_threshold=LARGE_N_THRESHOLD, qq_quantiles=None,
+                  lowess_grid=None, output="html", file=None, format="png",
+                  dpi=150, figsize=(12, 10), compress_level=None,
+                  top_k=None):
+    """
+    Draw the dgplots() diagnostic panels of one group of a grouped_ols()
+    fit, from its stored diagnostics.
+
+    group is the group's key, as for GroupedOLSResults.group_diagnostics().
+    The other arguments are those of dgplots(); results are not cached.
+
+    Returns
+    -------
+    IPython.display.HTML, bytes, None or matplotlib.figure.Figure
+        Depending on `output`. With top_k, a tuple of this and the
+        DataFrame of influential points, whose obs column is the row's
+        position within the group.
+    """
+    check_output(output, file, format, compress_level, top_k)
+
+    df = results.group_diagnostics(group).reset_index(drop=True)
+    fig = render_diagnostics(df, engine, large_n, large_n_threshold,
+                             qq_quantiles, lowess_grid, figsize)
+    value = deliver_figure(fig, output, file, format, dpi, compress_level,
+                           engine)
+
+    return value if top_k is None else (value, top_influential(df, top_k))
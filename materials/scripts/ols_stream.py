@@ -0,0 +1,423 @@
+# Out-of-core OLS and diagnostic plots for CSV files
+"""
+Fit an OLS model to a CSV file that does not fit in memory and draw the
+dgplots() diagnostic panels for it.
+
+The file is read in chunks with pandas and every chunk is turned into a
+design matrix by patsy, so formulas work as in statsmodels' smf.ols().
+Categorical levels are collected in a first scan when the formula needs
+them.
+
+  stream_ols() accumulates XᵀX and Xᵀy and solves the normal
+      equations, then sums the squared residuals in a second pass.
+  stream_diagnostics() computes residuals, leverage, studentized
+      residuals and Cook's distance chunk by chunk in one more pass,
+      keeping only bounded summaries:
+           - a uniform random sample of rows for the residual and
+             scale–location panels,
+           - a Cook's distance envelope, the largest value in each of a
+             fixed number of observation bins, plus the largest values
+             above the 4/n line,
+           - the most influential observations, with their leverage and
+             source row,
+           - a QuantileSketch of all residuals and their exact smallest
+             and largest values for the Q–Q panel.
+
+Memory use depends on the chunk size, the number of columns and the
+summary sizes, not on the number of rows.
+
+Requires dgplots.py in the same directory.
+
+Example:
+    fit = stream_ols("extract.csv", "y ~ x1 + C(site)")
+    dgplots_csv("extract.csv", "y ~ x1 + C(site)")
+"""
+
+import numpy as np
+import pandas as pd
+import patsy
+from scipy.stats import norm
+
+from dgplots import (
+    COOKS_ABOVE_MAX, QQ_TAIL_POINTS, QuantileSketch, check_output,
+    deliver_figure, qq_probabilities, render_summary,
+)
+
+__all__ = [
+    "stream_ols", "stream_diagnostics", "dgplots_csv", "StreamOLSResults",
+    "StreamDiagnostics",
+]
+
+
+# ======================================================================
+# Chunked input
+# ======================================================================
+def _chunk_source(source, chunksize, read_csv_kwargs):
+    """
+    Return a callable that starts a new pass over the data.
+
+    source is a CSV path or a callable returning an iterable of
+    DataFrames.
+    """
+    if callable(source):
+        return source
+
+    def _read():
+        return pd.read_csv(source, chunksize=chunksize, **read_csv_kwargs)
+
+    return _read
+
+
+def _design_chunks(data, design_infos, rows=False):
+    """
+    Yield (y, X) arrays for every chunk, dropping rows with NAs. With
+    rows, yield (y, X, row) where row holds the position of each kept
+    row in the source, counting the dropped rows.
+    """
+    offset = 0
+    for chunk in data():
+        chunk = chunk.reset_index(drop=True)
+        y, X = patsy.build_design_matrices(design_infos, chunk,
+                                           NA_action="drop",
+                                           return_type="dataframe")
+        arrays = (y.to_numpy(dtype=float)[:, 0], X.to_numpy(dtype=float))
+        if rows:
+            arrays += (offset + X.index.to_numpy(),)
+        offset += len(chunk)
+        yield arrays
+
+
+# Leverages within this distance of one leave nothing to studentize: such
+# rows get missing studentized residuals and Cook's distances, as in
+# influence_measures(), instead of infinite ones
+_LEVERAGE_ONE_TOL = 1e-10
+
+
+def _one_minus_leverage(hii):
+    rest = 1 - hii
+    return np.where(rest > _LEVERAGE_ONE_TOL, rest, np.nan)
+
+
+# ======================================================================
+# Fit
+# ======================================================================
+class StreamOLSResults:
+    """
+    Result of stream_ols().
+
+    Attributes:
+        params : coefficient estimates (pandas Series)
+        bse : standard errors of the coefficients (pandas Series)
+        nobs : number of observations used
+        df_resid : residual degrees of freedom
+        ssr : residual sum of squares
+        mse_resid : residual mean square
+        rsquared : coefficient of determination
+    """
+
+    __slots__ = ("params", "bse", "nobs", "df_resid", "ssr", "mse_resid",
+                 "rsquared", "_xtx_pinv", "_design_infos", "_data")
+
+    def __repr__(self):
+        return "\n".join([
+            "Streaming OLS results:",
+            f" nobs is: {self.nobs}",
+            f" df_resid is: {self.df_resid}",
+            f" rsquared is: {self.rsquared}",
+            " params are:",
+            self.params.to_string(),
+        ])
+
+    def cov_params(self):
+        """Covariance matrix of the coefficient estimates."""
+        names = self.params.index
+        return pd.DataFrame(self.mse_resid * self._xtx_pinv,
+                            index=names, columns=names)
+
+
+def stream_ols(source, formula, chunksize=100_000, eval_env=0,
+               **read_csv_kwargs):
+    """
+    Fit an OLS model to a CSV file in two chunked passes.
+
+    Arguments:
+        source : path of the CSV file, or a callable returning an
+            iterable of DataFrames (called once per pass)
+        formula : model formula, as for smf.ols()
+        chunksize : rows read per chunk
+        eval_env : how many frames above the caller to look up names
+            used in the formula, as in patsy
+        **read_csv_kwargs : passed on to pandas.read_csv()
+
+    Rows with missing values in any model variable are dropped.
+
+    Returns a StreamOLSResults.
+    """
+    data = _chunk_source(source, chunksize, read_csv_kwargs)
+    env = patsy.EvalEnvironment.capture(eval_env, reference=1)
+    design_infos = list(patsy.incr_dbuilders(formula, data, eval_env=env))
+
+    xtx = xty = None
+    y_sum = 0.0
+    nobs = 0
+    for y, X in _design_chunks(data, design_infos):
+        if xtx is None:
+            xtx = np.zeros((X.shape[1], X.shape[1]))
+            xty = np.zeros(X.shape[1])
+        xtx += X.T @ X
+        xty += X.T @ y
+        y_sum += y.sum()
+        nobs += len(y)
+
+    if xtx is None or nobs == 0:
+        raise ValueError("No complete rows to fit the model to.")
+
+    # Pseudo-inverse, as statsmodels' default fit(method="pinv")
+    xtx_pinv = np.linalg.pinv(xtx)
+    params = xtx_pinv @ xty
+    rank = np.linalg.matrix_rank(xtx)
+
+    # The residual and total sums of squares are summed from the data
+    # rather than expanded from XᵀX, which loses precision.
+    y_mean = y_sum / nobs
+    ssr = tss = 0.0
+    for y, X in _design_chunks(data, design_infos):
+        ssr += np.sum((y - X @ params) ** 2)
+        tss += np.sum((y - y_mean) ** 2)
+
+    names = design_infos[1].column_names
+    res = StreamOLSResults()
+    res.nobs = nobs
+    res.df_resid = nobs - rank
+    res.ssr = float(ssr)
+    res.mse_resid = res.ssr / res.df_resid
+    res.rsquared = 1 - res.ssr / tss
+    res.params = pd.Series(params, index=names)
+    res.bse = pd.Series(np.sqrt(res.mse_resid * np.diag(xtx_pinv)),
+                        index=names)
+    res._xtx_pinv = xtx_pinv
+    res._design_infos = design_infos
+    res._data = data
+    return res
+
+
+# ======================================================================
+# Bounded-memory diagnostics
+# ======================================================================
+class StreamDiagnostics:
+    """
+    Bounded summaries of the diagnostics of a streamed fit, as drawn by
+    dgplots_csv().
+
+    obs is the position of an observation among the complete rows, as
+    in dgplots(); row is its position in the source, counting the rows
+    dropped for missing values (0 is the first data row of the CSV).
+
+    Attributes:
+        sample : uniform random sample of rows, with the columns
+            predicted_values, residuals, std_resid, leverage, obs and row
+        qq : DataFrame of theoretical and approximate sample residual
+            quantiles
+        quartiles : approximate first and third residual quartiles
+        sketch : QuantileSketch of all residuals
+        cooks : DataFrame with the largest Cook's distance (cooks_d) and
+            its observation (obs) in each observation bin, and the
+            largest distances above the 4/n line
+        influential : DataFrame of the observations with the largest
+            Cook's distances, as returned by influential_points(), plus
+            their source row
+        nobs : number of observations
+    """
+
+    __slots__ = ("sample", "qq", "quartiles", "sketch", "cooks",
+                 "influential", "nobs")
+
+
+def _bottom_k(keys, values, k):
+    """Keep the k rows with the smallest keys (a uniform sample)."""
+    if len(keys) <= k:
+        return keys, values
+    keep = np.argpartition(keys, k)[:k]
+    return keys[keep], values[keep]
+
+
+def _smallest(values, k):
+    """The k smallest values, sorted."""
+    if len(values) > k:
+        values = np.partition(values, k - 1)[:k]
+    return np.sort(values)
+
+
+def stream_diagnostics(results, sample_size=5_000, n_quantiles=200,
+                       n_bins=2_000, compression=1000, seed=None, top_k=10):
+    """
+    Compute bounded-memory diagnostics for a stream_ols() fit.
+
+    Arguments:
+        results : StreamOLSResults
+        sample_size : rows kept for the residual and scale–location
+            panels
+        n_quantiles : points on the Q–Q panel, besides the
+            QQ_TAIL_POINTS smallest and largest residuals
+        n_bins : observation bins for the Cook's distance envelope
+        compression : accuracy of the residual QuantileSketch
+        seed : seed for the row sample
+        top_k : number of most influential observations to keep
+
+    Returns a StreamDiagnostics.
+    """
+    check_output(top_k=top_k)
+    rng = np.random.default_rng(seed)
+    params = results.params.to_numpy()
+    xtx_pinv = results._xtx_pinv
+    nobs = results.nobs
+    n_bins = min(n_bins, nobs)
+
+    # Sample rows: predicted, residual, leverage, obs, source row
+    keys = np.empty(0)
+    rows = np.empty((0, 5))
+
+    # Cook's distance envelope, before scaling by 1 / (p · mse)
+    bin_max = np.full(n_bins, -np.inf)
+    bin_obs = np.zeros(n_bins, dtype=np.int64)
+
+    # Largest raw Cook's distances: obs, raw value, leverage, residual,
+    # source row. They feed both the top-k table and the points above 4/n.
+    n_largest = max(top_k, COOKS_ABOVE_MAX)
+    big_keys = np.empty(0)
+    big_rows = np.empty((0, 5))
+
+    # Residual quantiles, with the tails kept exactly
+    sketch = QuantileSketch(compression)
+    lowest = highest = np.empty(0)
+
+    start = 0
+    for y, X, row in _design_chunks(results._data, results._design_infos,
+                                    rows=True):
+        fitted = X @ params
+        resid = y - fitted
+        hii = np.einsum("ij,ij->i", X @ xtx_pinv, X)
+        obs = np.arange(start, start + len(y))
+        start += len(y)
+        sketch.update(resid)
+        lowest = _smallest(np.concatenate([lowest, resid]), QQ_TAIL_POINTS)
+        highest = -_smallest(np.concatenate([-highest, -resid]),
+                             QQ_TAIL_POINTS)[::-1]
+
+        chunk = np.column_stack([fitted, resid, hii, obs, row])
+        keys, rows = _bottom_k(np.concatenate([keys, rng.random(len(y))]),
+                               np.vstack([rows, chunk]), sample_size)
+
+        # Per-bin maxima of this chunk, merged into the envelope; missing
+        # distances never win a bin or a place among the largest
+        raw_cooks = resid ** 2 * hii / _one_minus_leverage(hii) ** 2
+        bins = obs * n_bins // nobs
+        order = np.lexsort((-raw_cooks, bins))
+        first = np.r_[True, bins[order][1:] != bins[order][:-1]]
+        top = order[first]
+        better = raw_cooks[top] > bin_max[bins[top]]
+        bin_max[bins[top][better]] = raw_cooks[top][better]
+        bin_obs[bins[top][better]] = obs[top][better]
+
+        big_keys, big_rows = _bottom_k(
+            np.concatenate([big_keys, -raw_cooks]),
+            np.vstack([big_rows, np.column_stack([obs, raw_cooks, hii,
+                                                  resid, row])]),
+            n_largest)
+
+    k_vars = len(params)
+    scale = np.sqrt(results.mse_resid)
+    order = np.argsort(rows[:, 3], kind="stable")
+    fitted, resid, hii, obs, row = rows[order].T
+    studentized = resid / scale / np.sqrt(_one_minus_leverage(hii))
+
+    diag = StreamDiagnostics()
+    diag.nobs = nobs
+    diag.sample = pd.DataFrame({
+        "predicted_values": fitted,
+        "residuals": resid,
+        "std_resid": np.sqrt(np.abs(studentized)),
+        "leverage": hii,
+        "obs": obs.astype(np.int64),
+        "row": row.astype(np.int64),
+    })
+
+    # Q–Q points at the plotting positions stat_qq would use for
+    # n_quantiles observations, between the exact order statistics of
+    # the tails
+    probs = qq_probabilities(n_quantiles, nobs)
+    sample = sketch.quantile(probs)
+    tail = min(QQ_TAIL_POINTS, nobs // 2)
+    sample[:tail] = lowest[:tail]
+    sample[len(sample) - tail:] = highest[len(highest) - tail:]
+    diag.sketch = sketch
+    diag.qq = pd.DataFrame({
+        "theoretical": norm.ppf(probs),
+        "sample": sample,
+    })
+    diag.quartiles = sketch.quantile([0.25, 0.75])
+
+    # Envelope plus the largest values above the 4/n line, by obs
+    cooks_scale = k_vars * results.mse_resid
+    big_rows = big_rows[np.argsort(-big_rows[:, 1], kind="stable")]
+    above = big_rows[big_rows[:, 1] / cooks_scale > 4 / nobs]
+    cooks_obs, first = np.unique(np.concatenate([bin_obs, above[:, 0]]),
+                                 return_index=True)
+    diag.cooks = pd.DataFrame({
+        "obs": cooks_obs.astype(np.int64),
+        "cooks_d": np.concatenate([bin_max, above[:, 1]])[first]
+                   / cooks_scale,
+    })
+
+    big_obs, big_raw, big_hii, big_resid, big_row = big_rows[:top_k].T
+    diag.influential = pd.DataFrame({
+        "obs": big_obs.astype(np.int64),
+        "row": big_row.astype(np.int64),
+        "cooks_d": big_raw / cooks_scale,
+        "leverage": big_hii,
+        "resid_studentized_internal":
+            big_resid / scale / np.sqrt(_one_minus_leverage(big_hii)),
+    })
+    return diag
+
+
+# ======================================================================
+# Plots
+# ======================================================================
+def dgplots_csv(source, formula, chunksize=100_000, sample_size=5_000,
+                n_quantiles=200, n_bins=2_000, seed=None, output="html",
+                file=None, format="png", dpi=150, figsize=(12, 10),
+                compress_level=None, top_k=None, **read_csv_kwargs):
+    """
+    Fit an OLS model to a CSV file out of core and draw its diagnostic
+    plots.
+
+    The panels are those of dgplots(), drawn from bounded summaries: the
+    residual and scale–location panels show a uniform sample of
+    sample_size rows, the Q–Q panel n_quantiles approximate quantiles
+    between the exact tails, and the Cook's distance panel the largest
+    value in each of n_bins observation bins and the largest values
+    above the 4/n line. See stream_ols() and stream_diagnostics() for
+    the fitting arguments, and dgplots() for output, file, format, dpi,
+    figsize, compress_level and top_k.
+
+    Returns
+    -------
+    IPython.display.HTML, bytes, None or matplotlib.figure.Figure
+        Depending on `output`. With top_k, a tuple of this and the
+        DataFrame of influential points, whose row column gives their
+        0-based data row in the CSV.
+    """
+    check_output(output, file, format, compress_level, top_k)
+
+    results = stream_ols(source, formula, chunksize=chunksize, eval_env=1,
+                         **read_csv_kwargs)
+    diag = stream_diagnostics(results, sample_size=sample_size,
+                              n_quantiles=n_quantiles, n_bins=n_bins,
+                              seed=seed, top_k=top_k or 10)
+
+    fig = render_summary(diag.sample, diag.qq, diag.quartiles, diag.cooks,
+                         diag.nobs, figsize)
+    value = deliver_figure(fig, output, file, format, dpi, compress_level)
+
+    return value if top_k is None else (value, diag.influential)
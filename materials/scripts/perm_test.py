@@ -0,0 +1,317 @@
+# Permutation tests for the two-sample and one-way ANOVA tests
+"""
+Permutation p-values for the group comparisons of the course: the
+Student and Welch t-tests (pg.ttest), the Mann–Whitney U test (pg.mwu),
+one-way ANOVA (pg.anova, stats.f_oneway) and the Kruskal–Wallis test
+(pg.kruskal).
+
+Every statistic is a function of the per-group sums of the data (and
+of the squared data for the t-tests; of the ranks for the rank tests).
+Permutations are drawn in blocks: a block is a permutations × n matrix
+of shuffled row indices, the data are gathered through it once and the
+group sums of all its permutations come out of one np.add.reduceat, so
+the statistics of a whole block are a few array operations. The block
+size follows from a memory budget.
+
+Blocks get independent seeds spawned from one SeedSequence, so results
+depend only on the seed and the block size (that is, max_memory), not on
+the number of worker processes. A run stops early once a confidence
+interval for the p-value lies entirely on one side of alpha.
+
+Two-sample tests with at most n_perm distinct group assignments are
+enumerated exactly instead.
+
+Example:
+    permutation_test(lobsters, dv="weight", between="diet", test="anova",
+                     seed=1)
+"""
+
+from contextlib import closing
+from itertools import combinations, islice
+from math import comb
+
+import numpy as np
+from scipy.stats import beta, rankdata
+
+from seeded_chunks import run_chunks
+
+__all__ = ["permutation_test", "PermutationResult", "TESTS", "ALTERNATIVES"]
+
+TESTS = ("ttest", "welch", "mwu", "anova", "kruskal")
+ALTERNATIVES = ("two-sided", "greater", "less")
+
+# Bytes per permutation and observation held by a block: the shuffled
+# indices, the gathered data and its squares
+_BYTES_PER_VALUE = 24
+
+# Confidence level of the interval for the p-value used to stop early
+_STOP_LEVEL = 0.999
+
+# Permuted statistics within this relative distance of the observed one
+# count as ties, so rounding does not decide ties (as scipy does)
+_TIE_RTOL = 1e-14
+
+
+# ======================================================================
+# Statistics from group sums
+# ======================================================================
+def _statistic(test, sums, sqsums, sizes, consts):
+    """
+    Test statistic of every permutation from its group sums.
+
+    sums and sqsums are permutations × groups; for the rank tests sums
+    are rank sums. consts holds the permutation-invariant totals.
+    """
+    n = sizes.sum()
+    if test in ("ttest", "welch"):
+        n1, n2 = sizes
+        s1, q1 = sums[:, 0], sqsums[:, 0]
+        s2, q2 = consts["total"] - s1, consts["sqtotal"] - q1
+        var1 = (q1 - s1 ** 2 / n1) / (n1 - 1)
+        var2 = (q2 - s2 ** 2 / n2) / (n2 - 1)
+        diff = s1 / n1 - s2 / n2
+        if test == "welch":
+            return diff / np.sqrt(var1 / n1 + var2 / n2)
+        pooled = ((n1 - 1) * var1 + (n2 - 1) * var2) / (n - 2)
+        return diff / np.sqrt(pooled * (1 / n1 + 1 / n2))
+
+    if test == "mwu":
+        n1 = sizes[0]
+        return sums[:, 0] - n1 * (n1 + 1) / 2
+
+    # One-way ANOVA and Kruskal–Wallis: between-group sum of squares
+    k = len(sizes)
+    between = (sums ** 2 / sizes).sum(axis=1) - consts["total"] ** 2 / n
+    if test == "anova":
+        within = consts["tss"] - between
+        return (between / (k - 1)) / (within / (n - k))
+    return 12 / (n * (n + 1)) * between / consts["tie_correction"]
+
+
+def _oriented(test, stat, alternative, sizes):
+    """Statistic oriented so that large values are extreme."""
+    if test == "mwu":
+        stat = stat - sizes[0] * sizes[1] / 2
+    if test in ("anova", "kruskal") or alternative == "greater":
+        return stat
+    if alternative == "less":
+        return -stat
+    return np.abs(stat)
+
+
+def _count_block(task):
+    """
+    Worker entry point: draw one block of permutations and count the
+    statistics at least as extreme as the observed one.
+    """
+    (values, starts, sizes, consts, test, alternative, observed, seed,
+     size) = task
+    rng = np.random.default_rng(seed)
+    n = len(values)
+
+    index = rng.permuted(np.broadcast_to(np.arange(n), (size, n)), axis=1)
+    shuffled = values[index]
+    sums = np.add.reduceat(shuffled, starts, axis=1)
+    sqsums = np.add.reduceat(shuffled ** 2, starts, axis=1) \
+        if test in ("ttest", "welch") else None
+
+    stat = _oriented(test, _statistic(test, sums, sqsums, sizes, consts),
+                     alternative, sizes)
+    return int(np.sum(stat >= observed - _TIE_RTOL * abs(observed)))
+
+
+def _count_exact(values, sizes, consts, test, alternative, observed,
+                 block_size):
+    """
+    Count the extreme statistics over every assignment of n1 of the
+    observations to the first group.
+    """
+    n, n1 = len(values), sizes[0]
+    assignments = combinations(range(n), n1)
+    extreme = total = 0
+    while True:
+        block = np.array(list(islice(assignments, block_size)), dtype=int)
+        if not len(block):
+            return extreme, total
+        block = block.reshape(-1, n1)
+        sums = values[block].sum(axis=1)[:, None]
+        sqsums = (values[block] ** 2).sum(axis=1)[:, None]
+        stat = _oriented(test, _statistic(test, sums, sqsums, sizes, consts),
+                         alternative, sizes)
+        extreme += int(np.sum(stat >= observed - _TIE_RTOL * abs(observed)))
+        total += len(block)
+
+
+def _clopper_pearson(k, m, level=_STOP_LEVEL):
+    """Clopper–Pearson interval for a proportion of k out of m."""
+    tail = (1 - level) / 2
+    lower = beta.ppf(tail, k, m - k + 1) if k > 0 else 0.0
+    upper = beta.ppf(1 - tail, k + 1, m - k) if k < m else 1.0
+    return lower, upper
+
+
+# ======================================================================
+# Result
+# ======================================================================
+class PermutationResult:
+    """
+    Result of permutation_test().
+
+    Attributes:
+        test : name of the test
+        alternative : alternative hypothesis
+        statistic : observed test statistic (t, U of the first group, F
+            or H)
+        pval : permutation p-value
+        mc_se : Monte Carlo standard error of the p-value (0 if exact)
+        n_perm : number of permutations used
+        exact : whether every group assignment was enumerated
+        stopped_early : whether the run stopped once the decision at
+            alpha was clear
+    """
+
+    __slots__ = ("test", "alternative", "statistic", "pval", "mc_se",
+                 "n_perm", "exact", "stopped_early")
+
+    def __init__(self, test, alternative, statistic, pval, mc_se, n_perm,
+                 exact, stopped_early):
+        self.test = test
+        self.alternative = alternative
+        self.statistic = statistic
+        self.pval = pval
+        self.mc_se = mc_se
+        self.n_perm = n_perm
+        self.exact = exact
+        self.stopped_early = stopped_early
+
+    def __repr__(self):
+        return "\n".join([
+            "Permutation test results:",
+            f" test is: {self.test} ({self.alternative})",
+            f" statistic is: {self.statistic}",
+            f" p-value is: {self.pval}",
+            f" Monte Carlo SE is: {self.mc_se}",
+            f" n_perm is: {self.n_perm}" + (" (exact)" if self.exact else ""),
+        ])
+
+    def to_dict(self):
+        """Return the result as a plain dict."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# ======================================================================
+# Main function
+# ======================================================================
+def _samples(data, dv, between):
+    """Split long-format data, or take a sequence of samples, by group."""
+    if dv is None:
+        samples = [np.asarray(s, dtype=float) for s in data]
+    else:
+        samples = [np.asarray(sub, dtype=float)
+                   for _, sub in data.groupby(between, sort=True)[dv]]
+    return [s[~np.isnan(s)] for s in samples]
+
+
+def permutation_test(data, dv=None, between=None, test="welch",
+                     alternative="two-sided", n_perm=100_000, alpha=0.05,
+                     early_stop=True, exact=True, max_memory=64 * 2**20,
+                     workers=1, seed=None):
+    """
+    Permutation test of a difference between groups.
+
+    Arguments:
+        data : long-format DataFrame, or a sequence of samples (one
+            array per group) when dv is None
+        dv : name of the response column
+        between : name of the grouping column
+        test : "ttest" (Student), "welch", "mwu" (Mann–Whitney U),
+            "anova" or "kruskal"
+        alternative : "two-sided", "greater" or "less", for the
+            difference first group minus second in the two-sample tests
+            (groups in sorted order). ANOVA and Kruskal–Wallis are
+            always upper-tailed
+        n_perm : maximum number of random permutations
+        alpha : significance level the early stop decides against
+        early_stop : stop once a 99.9% Clopper–Pearson interval for the
+            p-value lies entirely above or below alpha
+        exact : enumerate every group assignment of a two-sample test
+            when there are at most n_perm of them
+        max_memory : bytes a block of permutations may use; sets the
+            block size
+        workers : number of worker processes for the blocks
+        seed : seed for the SeedSequence the block seeds are spawned from
+
+    Missing values are dropped. The p-value of a random permutation test
+    counts the observed assignment as one of the permutations,
+    (extreme + 1) / (n_perm + 1), so it is never 0.
+
+    Returns a PermutationResult.
+    """
+    if test not in TESTS:
+        raise ValueError(f"Unknown test {test!r}. Choose from "
+                         + ", ".join(TESTS) + ".")
+    if alternative not in ALTERNATIVES:
+        raise ValueError(f"Unknown alternative {alternative!r}. Choose "
+                         "from " + ", ".join(ALTERNATIVES) + ".")
+    if dv is not None and between is None:
+        raise ValueError("Please name the grouping column with between.")
+    if n_perm < 1:
+        raise ValueError("n_perm must be a positive integer.")
+
+    samples = _samples(data, dv, between)
+    sizes = np.array([len(s) for s in samples])
+    two_sample = test in ("ttest", "welch", "mwu")
+    if two_sample and len(samples) != 2:
+        raise ValueError(f"The {test} test compares exactly two groups.")
+    if len(samples) < 2 or (sizes < (2 if test in ("ttest", "welch")
+                                     else 1)).any():
+        raise ValueError("Every group needs enough non-missing values.")
+
+    values = np.concatenate(samples)
+    n = len(values)
+    consts = {}
+    if test in ("mwu", "kruskal"):
+        values = rankdata(values)
+        _, ties = np.unique(values, return_counts=True)
+        consts["tie_correction"] = 1 - (ties ** 3 - ties).sum() / (n ** 3 - n)
+    consts["total"] = values.sum()
+    consts["sqtotal"] = (values ** 2).sum()
+    consts["tss"] = ((values - values.mean()) ** 2).sum()
+
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    sums = np.add.reduceat(values, starts)[None]
+    sqsums = np.add.reduceat(values ** 2, starts)[None]
+    statistic = float(_statistic(test, sums, sqsums, sizes, consts)[0])
+    observed = float(_oriented(test, np.array([statistic]), alternative,
+                               sizes)[0])
+
+    block_size = int(max(1, max_memory // (_BYTES_PER_VALUE * n)))
+
+    if two_sample and exact and comb(n, int(sizes[0])) <= n_perm:
+        extreme, total = _count_exact(values, sizes, consts, test,
+                                      alternative, observed, block_size)
+        return PermutationResult(test, alternative, statistic,
+                                 extreme / total, 0.0, total, True, False)
+
+    def make_task(block_seed, size):
+        return (values, starts, sizes, consts, test, alternative, observed,
+                block_seed, size)
+
+    extreme = 0
+    done = 0
+    stopped_early = False
+    with closing(run_chunks(_count_block, make_task, n_perm, block_size,
+                            workers, seed)) as blocks:
+        for size, count in blocks:
+            extreme += count
+            done += size
+            if early_stop and done < n_perm:
+                lower, upper = _clopper_pearson(extreme, done)
+                if upper < alpha or lower > alpha:
+                    stopped_early = True
+                    break
+
+    pval = (extreme + 1) / (done + 1)
+    mc_se = float(np.sqrt(pval * (1 - pval) / done))
+    return PermutationResult(test, alternative, statistic, pval, mc_se,
+                             done, False, stopped_early)
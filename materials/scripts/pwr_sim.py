@@ -0,0 +1,255 @@
+# Simulation-based power analysis
+"""
+Monte Carlo power for linear-model tests, alongside the analytic
+pwr_f2_test().
+
+Every design used in the course can be written as a linear model with
+a fixed design matrix X: one- and two-sample t-tests, one-way ANOVA and
+multiple regression. The test is an F-test that a set of coefficients is
+zero; for a single coefficient this is the two-sided t-test.
+
+Replicates are simulated in chunks. Each chunk draws an n × chunk_size
+matrix of responses and fits every replicate at once from one QR
+decomposition of X, so no per-replicate model fit is needed. Chunks get
+independent seeds spawned from one SeedSequence, so results depend only
+on the seed and chunk size, not on the number of worker processes.
+
+Example:
+    X, coef, test = ttest_design(n=20, d=0.8)
+    pwr_sim(X, coef, test, error=("t", 3), seed=1)
+"""
+
+from contextlib import closing
+
+import numpy as np
+from scipy.stats import f
+
+from seeded_chunks import run_chunks
+
+__all__ = [
+    "pwr_sim", "SimPowerResult", "ttest_design", "anova_design",
+    "regression_design",
+]
+
+
+# ======================================================================
+# Designs
+# ======================================================================
+def ttest_design(n, d, two_sample=True):
+    """
+    Design for a t-test with standardised effect size d (Cohen's d).
+
+    two_sample=True gives n observations per group and tests the group
+    difference. two_sample=False gives a one-sample (or paired, on the
+    differences) test of the mean against zero.
+
+    Returns (X, coef, test) for pwr_sim().
+    """
+    if two_sample:
+        group = np.repeat([0.0, 1.0], n)
+        X = np.column_stack([np.ones(2 * n), group])
+        return X, np.array([0.0, d]), [1]
+
+    return np.ones((n, 1)), np.array([d]), [0]
+
+
+def anova_design(group_means, n_per_group):
+    """
+    Design for a one-way ANOVA with the given group means (in units of
+    the error standard deviation) and n_per_group observations each.
+
+    Returns (X, coef, test) for pwr_sim(); the test is the overall
+    F-test of equal means.
+    """
+    group_means = np.asarray(group_means, dtype=float)
+    k = len(group_means)
+    group = np.repeat(np.arange(k), n_per_group)
+
+    # Treatment coding, first group as reference
+    X = np.column_stack([np.ones(len(group))] +
+                        [(group == j).astype(float) for j in range(1, k)])
+    coef = np.concatenate([[group_means[0]], group_means[1:] - group_means[0]])
+    return X, coef, list(range(1, k))
+
+
+def regression_design(X, coef, test=None, add_intercept=True):
+    """
+    Design for a multiple regression on the predictor matrix X.
+
+    test lists the columns of X (before any intercept is added) whose
+    coefficients are tested; by default all of them, which is the
+    overall F-test of the model.
+
+    Returns (X, coef, test) for pwr_sim().
+    """
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1:
+        X = X[:, None]
+    coef = np.asarray(coef, dtype=float)
+    test = list(range(X.shape[1])) if test is None else list(test)
+
+    if add_intercept:
+        X = np.column_stack([np.ones(len(X)), X])
+        coef = np.concatenate([[0.0], coef])
+        test = [j + 1 for j in test]
+
+    return X, coef, test
+
+
+# ======================================================================
+# Error distributions, all scaled to mean 0 and variance 1
+# ======================================================================
+_ERRORS = ("normal", "t", "lognormal", "exponential")
+
+
+def _check_error(error):
+    """Validate a named error distribution before anything is simulated."""
+    if callable(error):
+        return
+    kind, *args = (error,) if isinstance(error, str) else error
+    if kind not in _ERRORS:
+        raise ValueError(f"Unknown error distribution: {kind!r}")
+    if kind == "t" and not (len(args) == 1 and args[0] > 2):
+        raise ValueError("t errors need df > 2 to have finite variance.")
+
+
+def _draw_errors(rng, error, size):
+    """Draw standardised errors of the given kind."""
+    if callable(error):
+        return error(rng, size)
+
+    kind, *args = (error,) if isinstance(error, str) else error
+
+    if kind == "normal":
+        return rng.standard_normal(size)
+    if kind == "t":
+        df = args[0]
+        return rng.standard_t(df, size) / np.sqrt(df / (df - 2))
+    if kind == "lognormal":
+        return (np.exp(rng.standard_normal(size)) - np.exp(0.5)) \
+            / np.sqrt((np.e - 1) * np.e)
+    if kind == "exponential":
+        return rng.standard_exponential(size) - 1
+
+    raise ValueError(f"Unknown error distribution: {kind!r}")
+
+
+# ======================================================================
+# Simulation core
+# ======================================================================
+def _simulate_chunk(task):
+    """
+    Worker entry point: simulate one chunk of replicates and return the
+    number of rejections.
+    """
+    X, coef, test, error, sigma, sig_level, seed, size = task
+    rng = np.random.default_rng(seed)
+    n, p = X.shape
+
+    keep = [j for j in range(p) if j not in set(test)]
+    q_full, _ = np.linalg.qr(X)
+    q_null = np.linalg.qr(X[:, keep])[0] if keep else np.zeros((n, 0))
+
+    E = sigma * _draw_errors(rng, error, (n, size))
+    Y = (X @ coef)[:, None] + E
+
+    # Residual SS depends on the errors only, which avoids cancellation
+    rss_full = (E ** 2).sum(0) - ((q_full.T @ E) ** 2).sum(0)
+    ss_test = ((q_full.T @ Y) ** 2).sum(0) - ((q_null.T @ Y) ** 2).sum(0)
+
+    df_test, df_resid = len(test), n - p
+    F_stat = (ss_test / df_test) / (rss_full / df_resid)
+    return int((F_stat > f.isf(sig_level, df_test, df_resid)).sum())
+
+
+class SimPowerResult:
+    """
+    Result of pwr_sim().
+
+    Attributes:
+        power : estimated power (proportion of rejections)
+        mc_se : Monte Carlo standard error of the estimate
+        n_sims : number of simulated replicates
+        sig_level : significance level used
+        stopped_early : whether the run stopped on reaching target_se
+    """
+
+    __slots__ = ("power", "mc_se", "n_sims", "sig_level", "stopped_early")
+
+    def __init__(self, power, mc_se, n_sims, sig_level, stopped_early):
+        self.power = power
+        self.mc_se = mc_se
+        self.n_sims = n_sims
+        self.sig_level = sig_level
+        self.stopped_early = stopped_early
+
+    def __repr__(self):
+        return "\n".join([
+            "Simulated power analysis results:",
+            f" power is: {self.power}",
+            f" Monte Carlo SE is: {self.mc_se}",
+            f" n_sims is: {self.n_sims}",
+            f" sig_level is: {self.sig_level}",
+        ])
+
+    def to_dict(self):
+        """Return the result as a plain dict."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def pwr_sim(X, coef, test, error="normal", sigma=1.0, sig_level=0.05,
+            n_sims=10_000, chunk_size=1_000, target_se=None, workers=1,
+            seed=None):
+    """
+    Estimate the power of an F-test on a linear model by simulation.
+
+    Arguments:
+        X : n × p design matrix, held fixed across replicates
+        coef : true coefficients, length p
+        test : indices of the coefficients tested jointly against zero
+        error : "normal", ("t", df), "lognormal", "exponential", or a
+            callable (rng, size) -> array of mean-0, variance-1 draws
+        sigma : error standard deviation
+        sig_level : significance level (alpha)
+        n_sims : maximum number of replicates
+        chunk_size : replicates simulated and fitted per vectorized batch
+        target_se : stop once the Monte Carlo standard error of the power
+            estimate is at or below this value
+        workers : number of worker processes for the chunks
+        seed : seed for the SeedSequence the chunk seeds are spawned from
+
+    The design builders ttest_design(), anova_design() and
+    regression_design() return (X, coef, test) for the course designs.
+
+    Returns a SimPowerResult.
+    """
+    X = np.asarray(X, dtype=float)
+    coef = np.asarray(coef, dtype=float)
+    test = list(test)
+
+    if X.shape[0] <= X.shape[1]:
+        raise ValueError("The design needs more observations than columns.")
+    if not test:
+        raise ValueError("test must name at least one coefficient.")
+    _check_error(error)
+
+    def make_task(chunk_seed, size):
+        return (X, coef, test, error, sigma, sig_level, chunk_seed, size)
+
+    rejections = 0
+    done = 0
+    stopped_early = False
+    with closing(run_chunks(_simulate_chunk, make_task, n_sims, chunk_size,
+                            workers, seed)) as chunks:
+        for size, rejected in chunks:
+            rejections += rejected
+            done += size
+            power = rejections / done
+            mc_se = np.sqrt(power * (1 - power) / done)
+            if target_se is not None and 0 < mc_se <= target_se:
+                stopped_early = done < n_sims
+                break
+
+    power = rejections / done
+    mc_se = float(np.sqrt(power * (1 - power) / done))
+    return SimPowerResult(power, mc_se, done, sig_level, stopped_early)
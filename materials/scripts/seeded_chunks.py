@@ -0,0 +1,91 @@
+# Seeded chunks of Monte Carlo work, run in order over worker processes
+"""
+The chunk runner behind pwr_sim(), permutation_test() and the bootstrap
+functions.
+
+A run of n replicates is split into chunks of at most chunk_size. Chunk
+i gets the i-th seed spawned from one SeedSequence, so its draws depend
+only on the seed and the chunk size. Chunks are run in rounds of
+`workers` processes but yielded one by one in order, so a caller that
+stops early (once a Monte Carlo error is small enough) sees the same
+chunks whatever the number of workers. Data every chunk needs can be
+passed as `shared`; it is sent to each worker process once rather than
+pickled with every task.
+
+Example:
+    for size, result in run_chunks(worker, make_task, 10_000, 1_000,
+                                   workers=4, seed=1):
+        ...
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Data passed as `shared`, set in each worker process by its initializer
+_shared = None
+
+
+def _set_shared(shared):
+    global _shared
+    _shared = shared
+
+
+def _call_shared(item):
+    worker, task = item
+    return worker(_shared, task)
+
+
+def run_chunks(worker, make_task, n, chunk_size, workers=1, seed=None,
+               shared=None):
+    """
+    Run n replicates in seeded chunks and yield them in order.
+
+    Arguments:
+        worker : picklable function run on each task
+        make_task : function of (seed, size) building the task of a chunk
+            of size replicates from its SeedSequence
+        n : total number of replicates
+        chunk_size : replicates per chunk
+        workers : number of worker processes (None for all CPUs); 1 runs
+            the chunks in this process
+        seed : seed for the SeedSequence the chunk seeds are spawned from
+        shared : data every chunk needs; if given, worker is called as
+            worker(shared, task) and each worker process receives it
+            once, when it starts
+
+    Yields (size, worker(task)) for every chunk. Closing the generator
+    early, e.g. by breaking out of a loop over it, shuts the worker
+    processes down after the current round.
+    """
+    n_chunks = -(-n // chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    sizes = [min(chunk_size, n - i * chunk_size) for i in range(n_chunks)]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    step = max(workers, 1)
+    pool = None
+    if workers > 1 and n_chunks > 1:
+        pool = ProcessPoolExecutor(max_workers=workers,
+                                   initializer=_set_shared,
+                                   initargs=(shared,))
+
+    try:
+        for start in range(0, n_chunks, step):
+            round_sizes = sizes[start:start + step]
+            tasks = [make_task(seeds[start + i], size)
+                     for i, size in enumerate(round_sizes)]
+            if pool is None:
+                results = [worker(task) if shared is None
+                           else worker(shared, task) for task in tasks]
+            elif shared is None:
+                results = pool.map(worker, tasks)
+            else:
+                results = pool.map(_call_shared,
+                                   [(worker, task) for task in tasks])
+            yield from zip(round_sizes, results)
+    finally:
+        if pool is not None:
+            pool.shutdown()
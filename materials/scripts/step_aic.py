@@ -0,0 +1,306 @@
+# Backwards stepwise elimination by AIC for OLS models
+"""
+Backwards stepwise elimination of the terms of an OLS model by AIC, as
+R's step(direction = "backward") does it.
+
+The formula is parsed and the design matrix built only once. The full
+matrix X is factorised as X = QR, and every drop-one candidate is then
+scored in the p-dimensional space of R: deleting a term's columns from
+the current factorisation is a QR column-deletion downdate
+(scipy.linalg.qr_delete), and the residual sum of squares of the reduced
+model follows from the part of Qᵀy the remaining columns no longer
+reach. No candidate touches the n rows of the data again.
+
+Terms are only dropped while the model stays hierarchical: a main
+effect stays in as long as an interaction containing it does.
+
+The AIC is that of statsmodels' results.aic, so every step of the path
+matches a refit with smf.ols(...).fit().aic.
+
+Example:
+    res = step_aic("eggs ~ weight * C(male)", ladybird_py)
+    res.path
+    res.fit().summary()
+"""
+
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import patsy
+from scipy.linalg import qr_delete
+
+__all__ = ["step_aic", "StepAICResult"]
+
+
+# ======================================================================
+# Design and terms
+# ======================================================================
+def _term_name(term):
+    """Formula name of a patsy term; the intercept is "1"."""
+    return term.name() if term.factors else "1"
+
+
+def _formula(response, terms, intercept):
+    """Rebuild a model formula from its response and terms."""
+    names = [_term_name(term) for term in terms if term.factors]
+    if not intercept:
+        names = ["0"] + names
+    return f"{response} ~ " + (" + ".join(names) or "1")
+
+
+def _droppable(terms, respect_marginality):
+    """
+    Terms that may be dropped: every term but the intercept, and with
+    respect_marginality only those not contained in another term.
+    """
+    candidates = []
+    for term in terms:
+        if not term.factors:
+            continue
+        if respect_marginality and any(
+                other is not term
+                and set(term.factors) <= set(other.factors)
+                for other in terms):
+            continue
+        candidates.append(term)
+    return candidates
+
+
+def _aic(nobs, ssr, rank):
+    """AIC of a Gaussian linear model, as statsmodels' OLS results.aic."""
+    llf = -nobs / 2 * (np.log(2 * np.pi) + np.log(ssr / nobs) + 1)
+    return -2 * llf + 2 * rank
+
+
+# ======================================================================
+# Result
+# ======================================================================
+class StepAICResult:
+    """
+    Result of step_aic().
+
+    Attributes:
+        formula : formula of the final model
+        terms : names of the terms of the final model
+        aic : AIC of the final model
+        path : DataFrame with one row per step, starting from the full
+            model: the term dropped, the formula, the number of
+            parameters (df), the residual sum of squares and the AIC
+        candidates : list of DataFrames, one per step, with the AIC of
+            every drop-one candidate considered at that step ("<none>"
+            is the model before dropping), as R's step() prints them
+    """
+
+    __slots__ = ("formula", "terms", "aic", "path", "candidates",
+                 "_data", "_eval_env")
+
+    def __repr__(self):
+        return "\n".join([
+            "Backwards stepwise elimination by AIC:",
+            f" final model is: {self.formula}",
+            f" AIC is: {self.aic}",
+            " path is:",
+            self.path.to_string(index=False),
+        ])
+
+    def fit(self):
+        """Fit the final model with statsmodels."""
+        import statsmodels.formula.api as smf
+
+        # Newer statsmodels warns about patsy environments but uses them
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", FutureWarning)
+            return smf.ols(self.formula, data=self._data,
+                           eval_env=self._eval_env).fit()
+
+
+# ======================================================================
+# Candidate scoring
+# ======================================================================
+class _Factorisation:
+    """
+    QR factorisation of the current model's columns, in the coordinates
+    of the full model's R.
+
+    With X = Q_x R and z = Q_xᵀy, the current model's columns are R[:, S]
+    = Q_s R_s. The residual sum of squares of the current model is the
+    full model's plus the squared norm of (Q_sᵀz) beyond its first |S|
+    entries.
+    """
+
+    __slots__ = ("q", "r", "columns", "qz")
+
+    def __init__(self, q, r, columns, z):
+        self.q = q
+        self.r = r
+        self.columns = columns
+        self.qz = q.T @ z
+
+    def excess_ssr(self):
+        """Residual sum of squares above the full model's."""
+        return float(np.sum(self.qz[len(self.columns):] ** 2))
+
+    def drop(self, columns, z):
+        """Factorisation after deleting some of the current columns."""
+        positions = [self.columns.index(col) for col in columns]
+        # Terms own contiguous column blocks, deleted in one downdate
+        q, r = qr_delete(self.q, self.r, positions[0], len(positions),
+                         which="col", check_finite=False)
+        kept = [col for col in self.columns if col not in set(columns)]
+        return _Factorisation(q, r, kept, z)
+
+
+def _score_lstsq(r_full, z, columns):
+    """
+    Excess residual sum of squares and rank of a column subset, for
+    rank-deficient designs, by least squares in the space of R.
+    """
+    if not columns:
+        return float(z @ z), 0
+    sub = r_full[:, columns]
+    coef, _, rank, _ = np.linalg.lstsq(sub, z, rcond=None)
+    resid = z - sub @ coef
+    return float(resid @ resid), int(rank)
+
+
+# ======================================================================
+# Main function
+# ======================================================================
+def step_aic(formula, data, respect_marginality=True, tolerance=0.0,
+             k=2.0, workers=1, eval_env=0):
+    """
+    Backwards stepwise elimination of model terms by AIC.
+
+    Arguments:
+        formula : full model formula, as for smf.ols()
+        data : DataFrame with the model variables
+        respect_marginality : only drop terms that are not part of an
+            interaction still in the model, as R's step() does
+        tolerance : drop the best term as long as the reduced model's
+            AIC is below the current AIC plus tolerance. 0 is R's rule;
+            2 is the "no more than 2 greater" rule of thumb
+        k : penalty per parameter; 2 gives the AIC, log(n) the BIC.
+            The path reports this criterion in its aic column
+        workers : threads used to score the candidates of each step
+        eval_env : how many frames above the caller to look up names
+            used in the formula, as in patsy
+
+    Rows with missing values in any variable of the full model are
+    dropped before the first step, and every model on the path is fitted
+    to the same rows, as AIC comparisons need (R's step() stops with an
+    error instead). StepAICResult.fit() refits on those rows too.
+
+    With respect_marginality=False a main effect can be dropped while its
+    interaction stays; the path then scores the remaining columns of the
+    full design, which patsy would code differently if the reduced
+    formula were refitted.
+
+    Returns a StepAICResult.
+    """
+    if tolerance < 0:
+        raise ValueError("tolerance must not be negative.")
+    if workers < 1:
+        raise ValueError("workers must be a positive integer.")
+
+    env = patsy.EvalEnvironment.capture(eval_env, reference=1)
+    # Rows are kept by position: the index may hold duplicate labels
+    frame = data.reset_index(drop=True) if hasattr(data, "iloc") else data
+    y, X = patsy.dmatrices(formula, frame, eval_env=env, NA_action="drop",
+                           return_type="dataframe")
+    y_info, x_info = y.design_info, X.design_info
+    rows = X.index.to_numpy()
+    y = np.asarray(y, dtype=float)[:, 0]
+    X = np.asarray(X, dtype=float)
+    nobs, n_cols = X.shape
+
+    response = _term_name(y_info.terms[0])
+    terms = list(x_info.terms)
+    intercept = any(not term.factors for term in terms)
+    slices = {term: x_info.term_slices[term] for term in terms}
+
+    # One pass over the data: X = QR, z = Qᵀy and the full model's RSS
+    q_x, r_full = np.linalg.qr(X)
+    z = q_x.T @ y
+    ssr_full = float(np.sum((y - q_x @ z) ** 2))
+    full_rank = np.linalg.matrix_rank(r_full) == n_cols
+
+    def columns_of(model_terms):
+        return [col for term in model_terms
+                for col in range(slices[term].start, slices[term].stop)]
+
+    def score(state, model_terms):
+        """(ssr, rank, state) of a model; state is None if rank deficient."""
+        if full_rank:
+            return ssr_full + state.excess_ssr(), len(state.columns), state
+        excess, rank = _score_lstsq(r_full, z, columns_of(model_terms))
+        return ssr_full + excess, rank, None
+
+    def criterion(ssr, rank):
+        # _aic() uses the AIC penalty of 2 per parameter
+        return _aic(nobs, ssr, rank) + (k - 2) * rank
+
+    state = _Factorisation(np.eye(n_cols), r_full, list(range(n_cols)), z) \
+        if full_rank else None
+    ssr, rank, state = score(state, terms)
+    current = criterion(ssr, rank)
+
+    path = [{"step": 0, "dropped": "", "formula":
+             _formula(response, terms, intercept), "df": rank,
+             "rss": ssr, "aic": current}]
+    candidate_tables = []
+
+    pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while True:
+            droppable = _droppable(terms, respect_marginality)
+            # A model without an intercept keeps at least one term
+            if not intercept and len(terms) == 1:
+                droppable = []
+            if not droppable:
+                break
+
+            def evaluate(term):
+                reduced = [t for t in terms if t is not term]
+                cand_state = None
+                if full_rank:
+                    cand_state = state.drop(columns_of([term]), z)
+                return score(cand_state, reduced)
+
+            scored = list(pool.map(evaluate, droppable)) if pool \
+                else [evaluate(term) for term in droppable]
+
+            table = pd.DataFrame({
+                "term": ["<none>"] + [_term_name(t) for t in droppable],
+                "df": [rank] + [s[1] for s in scored],
+                "rss": [ssr] + [s[0] for s in scored],
+                "aic": [current] + [criterion(s[0], s[1]) for s in scored],
+            }).sort_values("aic", kind="stable", ignore_index=True)
+            candidate_tables.append(table)
+
+            aics = [criterion(s[0], s[1]) for s in scored]
+            best = int(np.argmin(aics))
+            if not aics[best] < current + tolerance:
+                break
+
+            dropped = droppable[best]
+            ssr, rank, state = scored[best]
+            current = aics[best]
+            terms = [t for t in terms if t is not dropped]
+            path.append({"step": len(path), "dropped": _term_name(dropped),
+                         "formula": _formula(response, terms, intercept),
+                         "df": rank, "rss": ssr, "aic": current})
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    res = StepAICResult()
+    res.formula = path[-1]["formula"]
+    res.terms = [_term_name(t) for t in terms if t.factors]
+    res.aic = current
+    res.path = pd.DataFrame(path)
+    res.candidates = candidate_tables
+    res._data = data.iloc[rows] if hasattr(data, "iloc") else data
+    res._eval_env = env
+    return res
@@ -0,0 +1,90 @@
+"""
+Tests for assumption_checks.py.
+
+Run from the materials/ directory:
+
+    python -m pytest scripts/tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from assumption_checks import assumption_checks
+
+
+def _data(seed=0):
+    rng = np.random.default_rng(seed)
+    sizes = {1: 3, 2: 5, 3: 11, 4: 12, 5: 40, 6: 300}
+    groups = np.repeat(list(sizes), list(sizes.values()))
+    df = pd.DataFrame({
+        "g": groups,
+        "batch": np.where(groups % 2, "odd", "even"),
+        "x": rng.normal(size=len(groups)),
+        "y": rng.exponential(size=len(groups)) * groups,
+    })
+    df.loc[::17, "y"] = np.nan
+    return df
+
+
+def _rows(out, test):
+    return out[out["test"] == test]
+
+
+def test_normality_matches_scipy():
+    df = _data()
+    out = assumption_checks(df, dv=["x", "y"], group="g")
+
+    for dv in ("x", "y"):
+        res = out[out["response"] == dv]
+        for test, func, min_n in (("shapiro", stats.shapiro, 3),
+                                  ("normaltest", stats.normaltest, 8)):
+            for row in _rows(res, test).itertuples():
+                values = df.loc[df["g"] == row.g, dv].dropna()
+                assert row.n == len(values)
+                if len(values) < min_n:
+                    assert np.isnan(row.statistic) and pd.isna(row.passed)
+                    continue
+                expected = func(values)
+                assert row.statistic == pytest.approx(expected.statistic,
+                                                      rel=1e-6)
+                assert row.pval == pytest.approx(expected.pvalue, rel=1e-4,
+                                                 abs=1e-12)
+
+
+@pytest.mark.parametrize("center", ["median", "mean"])
+def test_equal_variance_matches_scipy_per_batch(center):
+    df = _data()
+    out = assumption_checks(df, dv="y", group="g", by="batch",
+                            center=center)
+
+    for batch, part in df.groupby("batch"):
+        samples = [s.dropna() for _, s in part.groupby("g")["y"]]
+        res = out[out["batch"] == batch]
+        for test, expected in (
+                ("levene", stats.levene(*samples, center=center)),
+                ("bartlett", stats.bartlett(*samples))):
+            row = _rows(res, test).iloc[0]
+            assert row["statistic"] == pytest.approx(expected.statistic,
+                                                     rel=1e-9)
+            assert row["pval"] == pytest.approx(expected.pvalue, rel=1e-9)
+            assert row["n"] == sum(map(len, samples))
+
+
+def test_group_column_keeps_its_values():
+    out = assumption_checks(_data(), dv="x", group="g")
+    assert out["g"].dtype == "Int64"
+    assert out["g"].dropna().tolist() == [1, 2, 3, 4, 5, 6] * 2
+    assert _rows(out, "levene")["g"].isna().all()
+
+
+def test_workers_give_the_same_table():
+    df = _data()
+    pd.testing.assert_frame_equal(
+        assumption_checks(df, dv=["x", "y"], group="g", workers=2),
+        assumption_checks(df, dv=["x", "y"], group="g"))
@@ -0,0 +1,113 @@
+"""
+Tests for bootstrap_ols() and bootstrap_effsize() in bootstrap.py.
+
+Run from the materials/ directory:
+
+    python -m pytest scripts/tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.formula.api as smf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bootstrap import bootstrap_effsize, bootstrap_ols
+
+
+def _data(n=80, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"x": rng.normal(size=n),
+                       "g": rng.choice(["a", "b", "c"], size=n)})
+    df["y"] = 1 + 2 * df["x"] + (df["g"] == "b") + rng.standard_t(5, size=n)
+    df.loc[3, "x"] = np.nan
+    return df
+
+
+def _one_chunk_rng(seed):
+    """Generator of the first chunk, as the seeded chunks spawn it."""
+    return np.random.default_rng(np.random.SeedSequence(seed).spawn(1)[0])
+
+
+def test_ols_estimates_match_statsmodels():
+    df = _data()
+    fit = smf.ols("y ~ x + g", data=df).fit()
+    boot = bootstrap_ols("y ~ x + g", df, n_boot=10, seed=0)
+
+    pd.testing.assert_series_equal(boot.estimate, fit.params, rtol=1e-10)
+    pd.testing.assert_series_equal(boot.se, fit.bse, rtol=1e-10)
+    jack = np.array([smf.ols("y ~ x + g", data=df.drop(index=i)).fit().params
+                     for i in fit.model.data.row_labels])
+    np.testing.assert_allclose(boot._jackknife, jack, rtol=1e-8)
+
+
+def test_ols_replicates_are_refits_on_the_resampled_rows():
+    df = _data().dropna()
+    n_boot = 25
+    boot = bootstrap_ols("y ~ x + g", df, n_boot=n_boot, seed=7)
+
+    index = _one_chunk_rng(7).integers(0, len(df), (n_boot, len(df)))
+    for b in range(n_boot):
+        refit = smf.ols("y ~ x + g", data=df.iloc[index[b]]).fit()
+        np.testing.assert_allclose(boot.replicates.iloc[b], refit.params,
+                                   rtol=1e-8, atol=1e-10)
+        np.testing.assert_allclose(boot._replicate_se[b], refit.bse,
+                                   rtol=1e-8)
+
+
+@pytest.mark.parametrize("paired", [False, True])
+def test_effsize_replicates_are_the_resampled_effect_sizes(paired):
+    rng = np.random.default_rng(1)
+    x, y = rng.normal(0.5, 1, size=30), rng.normal(0, 1.5, size=30)
+    boot = bootstrap_effsize(x, y, eftype="hedges", paired=paired,
+                             n_boot=20, seed=2)
+
+    draw = _one_chunk_rng(2)
+    ix = draw.integers(0, 30, (20, 30), dtype=np.int32)
+    iy = ix if paired else draw.integers(0, 30, (20, 30), dtype=np.int32)
+    for b in range(20):
+        single = bootstrap_effsize(x[ix[b]], y[iy[b]], eftype="hedges",
+                                   paired=paired, n_boot=2, seed=0)
+        assert boot.replicates.iloc[b, 0] == pytest.approx(
+            single.estimate.iloc[0], rel=1e-10)
+
+
+@pytest.mark.parametrize("run", [
+    lambda **kw: bootstrap_ols("y ~ x + g", _data(), **kw),
+    lambda **kw: bootstrap_effsize(*np.random.default_rng(3).normal(
+        size=(2, 40)), **kw),
+])
+def test_replicates_do_not_depend_on_the_workers(run):
+    kwargs = dict(n_boot=600, max_memory=40_000, seed=5)
+    serial = run(**kwargs)
+    parallel = run(workers=2, **kwargs)
+
+    pd.testing.assert_frame_equal(serial.replicates, parallel.replicates)
+    for method in ("percentile", "bca", "studentized"):
+        pd.testing.assert_frame_equal(serial.conf_int(method),
+                                      parallel.conf_int(method))
+    assert not serial.replicates.equals(run(**{**kwargs,
+                                               "seed": 6}).replicates)
+
+
+def test_intervals_cover_the_estimate():
+    boot = bootstrap_ols("y ~ x + g", _data(), n_boot=2_000, seed=8)
+    for method in ("percentile", "bca", "studentized"):
+        ci = boot.conf_int(method)
+        assert (ci["lower"] < boot.estimate).all()
+        assert (boot.estimate < ci["upper"]).all()
+
+
+def test_invalid_arguments():
+    df = _data()
+    with pytest.raises(ValueError):
+        bootstrap_ols("y ~ x + g", df, n_boot=1)
+    with pytest.raises(ValueError):
+        bootstrap_ols("y ~ x + I(2 * x)", df)
+    with pytest.raises(ValueError):
+        bootstrap_effsize([1, 2, 3], [1, 2], paired=True)
+    with pytest.raises(ValueError):
+        bootstrap_ols("y ~ x", df, n_boot=10).conf_int("normal")
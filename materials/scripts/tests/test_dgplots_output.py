@@ -0,0 +1,113 @@
+"""
+Tests for the output modes of dgplots() in dgplots.py.
+
+Run from the materials/ directory:
+
+    python -m pytest scripts/tests
+"""
+
+import base64
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.formula.api as smf
+from IPython.display import HTML
+from matplotlib.figure import Figure
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dgplots import dgplots, influential_points, shutdown_panel_workers
+
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+
+
+@pytest.fixture(scope="module")
+def fit():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"x": rng.normal(size=60)})
+    df["y"] = 1 + 2 * df["x"] + rng.normal(size=60)
+    return smf.ols("y ~ x", data=df).fit()
+
+
+def test_html_embeds_the_png(fit):
+    html = dgplots(fit)
+    assert isinstance(html, HTML)
+    prefix = 'src="data:image/png;base64,'
+    b64 = html.data.split(prefix, 1)[1].split('"', 1)[0]
+    assert base64.b64decode(b64).startswith(PNG_MAGIC)
+
+
+def test_bytes_are_png_or_svg(fit):
+    png = dgplots(fit, output="bytes")
+    svg = dgplots(fit, output="bytes", format="svg")
+    assert png.startswith(PNG_MAGIC)
+    assert b"<svg" in svg[:1000]
+
+
+def test_compress_level_changes_only_the_encoding(fit):
+    fast = dgplots(fit, output="bytes", compress_level=0)
+    small = dgplots(fit, output="bytes", compress_level=9)
+    assert fast.startswith(PNG_MAGIC) and small.startswith(PNG_MAGIC)
+    assert len(small) < len(fast)
+
+
+@pytest.mark.parametrize("format", ["png", "svg"])
+def test_file_output_to_a_path_and_a_buffer(fit, tmp_path, format):
+    path = tmp_path / f"diagnostics.{format}"
+    buf = io.BytesIO()
+
+    assert dgplots(fit, output="file", file=str(path), format=format) is None
+    assert dgplots(fit, output="file", file=buf, format=format) is None
+    expected = dgplots(fit, output="bytes", format=format)
+    if format == "png":
+        assert path.read_bytes() == buf.getvalue() == expected
+    else:
+        # SVG output carries the rendering date and random clip ids
+        assert path.read_bytes().startswith(expected[:100])
+        assert b"<svg" in buf.getvalue()[:1000]
+
+
+def test_figure_output_is_not_encoded(fit):
+    fig = dgplots(fit, output="figure", figsize=(8, 6))
+    assert isinstance(fig, Figure)
+    assert len(fig.axes) == 4
+    assert tuple(fig.get_size_inches()) == (8, 6)
+
+
+def test_top_k_also_returns_the_influential_points(fit):
+    image, top = dgplots(fit, output="bytes", top_k=3)
+    assert image.startswith(PNG_MAGIC)
+    pd.testing.assert_frame_equal(top, influential_points(fit, k=3))
+
+
+def test_plotnine_engine(fit):
+    assert dgplots(fit, engine="plotnine", output="bytes").startswith(
+        PNG_MAGIC)
+
+
+def test_split_panels_give_a_png(fit):
+    try:
+        image = dgplots(fit, output="bytes", panel_workers=2,
+                        panel_executor="thread")
+    finally:
+        shutdown_panel_workers()
+    assert image.startswith(PNG_MAGIC)
+
+
+@pytest.mark.parametrize("options", [
+    dict(output="pdf"),
+    dict(output="file"),
+    dict(output="bytes", file="diagnostics.png"),
+    dict(format="jpeg"),
+    dict(format="svg", compress_level=6),
+    dict(compress_level=10),
+    dict(top_k=0),
+    dict(engine="plotnine", large_n=True),
+    dict(panel_workers=2, format="svg"),
+])
+def test_invalid_options_are_rejected(fit, options):
+    with pytest.raises(ValueError):
+        dgplots(fit, **options)
@@ -0,0 +1,40 @@
+"""
+Tests for grouped_ols.py.
+
+Run from the materials/ directory:
+
+    python -m pytest scripts/tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from grouped_ols import grouped_ols
+
+
+def _data(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"x": rng.normal(size=n),
+                       "g": rng.choice(["a", "b", "c"], size=n)})
+    df["y"] = 2 * df["x"] + rng.normal(size=n)
+    df.loc[::15, "x"] = np.nan
+    return df
+
+
+def test_duplicated_index_matches_unique_index():
+    df = _data()
+    duplicated = pd.concat([df.iloc[:100], df.iloc[100:]])
+    duplicated.index = np.r_[np.arange(100), np.arange(100)]
+
+    res = grouped_ols("y ~ x", duplicated, groups="g")
+    expected = grouped_ols("y ~ x", df, groups="g")
+
+    pd.testing.assert_frame_equal(res.params, expected.params)
+    assert res.nobs.sum() == df["x"].notna().sum()
+    assert res.diagnostics.index.equals(duplicated.index[df["x"].notna()])
+    np.testing.assert_array_equal(res.diagnostics["residuals"],
+                                  expected.diagnostics["residuals"])
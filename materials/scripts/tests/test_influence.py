@@ -0,0 +1,97 @@
+"""
+Tests for influence_measures() and influential_points() in dgplots.py.
+
+Run from the materials/ directory:
+
+    python -m pytest scripts/tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dgplots import influence_measures, influential_points
+
+
+def _design(n=120, seed=0):
+    rng = np.random.default_rng(seed)
+    X = sm.add_constant(rng.normal(size=(n, 3)))
+    y = X @ [1.0, 2.0, -1.0, 0.5] + rng.standard_t(4, size=n)
+    return X, y
+
+
+def _expected(results):
+    infl = results.get_influence()
+    return pd.DataFrame({
+        "leverage": infl.hat_matrix_diag,
+        "resid_studentized_internal": infl.resid_studentized_internal,
+        "cooks_d": infl.cooks_distance[0],
+    })
+
+
+@pytest.mark.parametrize("method", ["pinv", "qr"])
+def test_ols_matches_statsmodels(method):
+    X, y = _design()
+    fit = sm.OLS(y, X).fit(method=method)
+    pd.testing.assert_frame_equal(influence_measures(fit), _expected(fit),
+                                  rtol=1e-10, atol=1e-12)
+
+
+def test_rank_deficient_design_matches_statsmodels():
+    X, y = _design()
+    X = np.column_stack([X, X[:, 1] + X[:, 2]])
+    with pytest.warns(UserWarning):
+        fit = sm.OLS(y, X).fit()
+    pd.testing.assert_frame_equal(influence_measures(fit), _expected(fit),
+                                  rtol=1e-8, atol=1e-10)
+
+
+def test_wls_uses_the_whitened_design():
+    X, y = _design()
+    weights = np.random.default_rng(1).uniform(0.5, 2, size=len(y))
+    fit = sm.WLS(y, X, weights=weights).fit()
+    whitened = sm.OLS(y * np.sqrt(weights), X * np.sqrt(weights)[:, None])
+    pd.testing.assert_frame_equal(influence_measures(fit),
+                                  _expected(whitened.fit()), rtol=1e-10)
+
+
+def test_glsar_pads_the_rows_lost_to_whitening():
+    X, y = _design()
+    fit = sm.GLSAR(y, X, rho=2).iterative_fit(maxiter=3)
+    res = influence_measures(fit)
+
+    assert len(res) == len(y)
+    assert res.iloc[:2].isna().all().all()
+    whitened = sm.OLS(fit.model.wendog, fit.model.wexog).fit()
+    pd.testing.assert_frame_equal(res.iloc[2:].reset_index(drop=True),
+                                  _expected(whitened), rtol=1e-10)
+
+
+def test_leverage_one_is_not_finite_as_in_statsmodels_and_ranks_last():
+    X, y = _design(n=30)
+    X = np.column_stack([X, np.eye(30)[:, 4]])
+    fit = sm.OLS(y, X).fit()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        res = influence_measures(fit)
+        expected = _expected(fit)
+
+    assert np.isclose(res["leverage"][4], 1)
+    assert not np.isfinite(res["cooks_d"][4])
+    assert not np.isfinite(expected["cooks_d"][4])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        assert influential_points(fit, k=30)["obs"].iloc[-1] == 4
+
+
+def test_influential_points_are_the_largest_cooks_distances():
+    X, y = _design()
+    fit = sm.OLS(y, X).fit()
+    cooks_d = _expected(fit)["cooks_d"].to_numpy()
+
+    top = influential_points(fit, k=5)
+    np.testing.assert_array_equal(top["obs"], np.argsort(-cooks_d)[:5])
+    np.testing.assert_allclose(top["cooks_d"], np.sort(cooks_d)[::-1][:5])
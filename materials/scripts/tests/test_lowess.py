@@ -0,0 +1,61 @@
+"""
+Tests for lowess_smooth() in dgplots.py.
+
+Run from the materials/ directory:
+
+    python -m pytest scripts/tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+from statsmodels.nonparametric.smoothers_lowess import lowess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dgplots import lowess_smooth
+
+
+def _series(n=300, seed=0, ties=False):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=n)
+    if ties:
+        x = np.round(x, 1)
+    ys = np.column_stack([np.sin(2 * x) + rng.normal(0, 0.3, size=n),
+                          np.abs(rng.normal(size=n))])
+    return x, ys
+
+
+@pytest.mark.parametrize("ties", [False, True])
+@pytest.mark.parametrize("frac", [0.1, 2 / 3, 0.75])
+def test_matches_statsmodels(frac, ties):
+    x, ys = _series(ties=ties)
+    x_sorted, smoothed = lowess_smooth(x, ys, frac=frac)
+
+    for y, column in zip(ys.T, smoothed.T):
+        expected = lowess(y, x, frac=frac, it=0)
+        np.testing.assert_array_equal(x_sorted, expected[:, 0])
+        np.testing.assert_allclose(column, expected[:, 1], rtol=1e-10,
+                                   atol=1e-12)
+
+
+def test_one_series_keeps_its_shape():
+    x, ys = _series()
+    _, smoothed = lowess_smooth(x, ys[:, 0])
+    assert smoothed.shape == (len(x),)
+
+
+def test_tiny_window_keeps_the_observed_values():
+    x, ys = _series(n=50, ties=True)
+    _, smoothed = lowess_smooth(x, ys[:, 0], frac=0.01)
+    with np.errstate(invalid="ignore"):
+        expected = lowess(ys[:, 0], x, frac=0.01, it=0)
+    np.testing.assert_allclose(smoothed, expected[:, 1])
+
+
+def test_grid_interpolation_is_close_to_the_exact_fit():
+    x, ys = _series(n=5_000)
+    _, exact = lowess_smooth(x, ys)
+    _, approx = lowess_smooth(x, ys, n_grid=200)
+    assert np.max(np.abs(approx - exact)) < 0.02
@@ -0,0 +1,111 @@
+"""
+Tests for stream_ols() and stream_diagnostics() in ols_stream.py.
+
+Run from the materials/ directory:
+
+    python -m pytest scripts/tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.formula.api as smf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dgplots import QQ_TAIL_POINTS, influential_points, qq_probabilities
+from ols_stream import stream_diagnostics, stream_ols
+
+FORMULA = "y ~ x1 + np.log(x2) + C(site)"
+
+
+@pytest.fixture
+def csv(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 1_000
+    df = pd.DataFrame({
+        "x1": rng.normal(size=n),
+        "x2": rng.uniform(1, 5, size=n),
+        "site": rng.choice(["north", "south", "east"], size=n),
+    })
+    df["y"] = (1 + 0.5 * df["x1"] - np.log(df["x2"])
+               + (df["site"] == "east") + rng.standard_t(3, size=n))
+    df.loc[[0, 5, 6, 500], "x1"] = np.nan
+    df.loc[[7, 999], "site"] = np.nan
+    path = tmp_path / "extract.csv"
+    df.to_csv(path, index=False)
+    return str(path), df
+
+
+@pytest.mark.parametrize("chunksize", [97, 100_000])
+def test_fit_matches_statsmodels(csv, chunksize):
+    path, df = csv
+    res = stream_ols(path, FORMULA, chunksize=chunksize)
+    fit = smf.ols(FORMULA, data=df).fit()
+
+    pd.testing.assert_series_equal(res.params, fit.params, rtol=1e-10)
+    pd.testing.assert_series_equal(res.bse, fit.bse, rtol=1e-10)
+    pd.testing.assert_frame_equal(res.cov_params(), fit.cov_params(),
+                                  rtol=1e-10)
+    assert res.nobs == fit.nobs == len(df) - 6
+    assert res.df_resid == fit.df_resid
+    assert res.ssr == pytest.approx(fit.ssr, rel=1e-12)
+    assert res.rsquared == pytest.approx(fit.rsquared, rel=1e-12)
+
+
+def test_sample_rows_point_back_to_the_source(csv):
+    path, df = csv
+    res = stream_ols(path, FORMULA, chunksize=97)
+    diag = stream_diagnostics(res, sample_size=200, seed=1)
+    fit = smf.ols(FORMULA, data=df).fit()
+    complete = fit.model.data.row_labels
+
+    sample = diag.sample
+    assert len(sample) == 200 and sample["obs"].is_monotonic_increasing
+    np.testing.assert_array_equal(complete[sample["obs"]], sample["row"])
+    np.testing.assert_allclose(sample["residuals"],
+                               fit.resid.loc[sample["row"]], rtol=1e-9)
+    np.testing.assert_allclose(
+        sample["leverage"],
+        fit.get_influence().hat_matrix_diag[sample["obs"]], rtol=1e-9)
+
+
+def test_influential_rows_match_statsmodels(csv):
+    path, df = csv
+    diag = stream_diagnostics(stream_ols(path, FORMULA, chunksize=97),
+                              top_k=8)
+    fit = smf.ols(FORMULA, data=df).fit()
+    expected = influential_points(fit, k=8)
+
+    np.testing.assert_array_equal(diag.influential["obs"], expected["obs"])
+    np.testing.assert_array_equal(diag.influential["row"],
+                                  fit.model.data.row_labels[expected["obs"]])
+    for column in ("cooks_d", "leverage", "resid_studentized_internal"):
+        np.testing.assert_allclose(diag.influential[column],
+                                   expected[column], rtol=1e-8)
+
+
+def test_qq_tails_are_the_exact_extreme_residuals(csv):
+    path, df = csv
+    diag = stream_diagnostics(stream_ols(path, FORMULA, chunksize=97),
+                              n_quantiles=100)
+    resid = np.sort(smf.ols(FORMULA, data=df).fit().resid)
+    sample = diag.qq["sample"].to_numpy()
+
+    assert len(sample) == len(qq_probabilities(100, len(resid)))
+    np.testing.assert_allclose(sample[:QQ_TAIL_POINTS],
+                               resid[:QQ_TAIL_POINTS], rtol=1e-9)
+    np.testing.assert_allclose(sample[-QQ_TAIL_POINTS:],
+                               resid[-QQ_TAIL_POINTS:], rtol=1e-9)
+    assert np.all(np.diff(sample) >= 0)
+    assert np.all(np.diff(diag.qq["theoretical"]) > 0)
+
+
+def test_no_complete_rows_is_an_error(tmp_path):
+    path = tmp_path / "empty.csv"
+    pd.DataFrame({"y": [1.0, np.nan], "x": [np.nan, 2.0]}).to_csv(
+        path, index=False)
+    with pytest.raises(ValueError):
+        stream_ols(str(path), "y ~ x")
@@ -0,0 +1,131 @@
+"""
+Tests for permutation_test() in perm_test.py.
+
+Run from the materials/ directory:
+
+    python -m pytest scripts/tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from perm_test import permutation_test
+
+
+def _samples(sizes=(6, 7), seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.normal(loc=0.4 * i, scale=1 + i, size=size)
+            for i, size in enumerate(sizes)]
+
+
+def _t(equal_var):
+    def statistic(x, y, axis):
+        return stats.ttest_ind(x, y, equal_var=equal_var, axis=axis).statistic
+    return statistic
+
+
+def _scipy_exact(samples, statistic, alternative):
+    """Exact scipy p-value; two-sided as the share of |t| at least |t_obs|."""
+    two_sided = alternative == "two-sided"
+
+    def oriented(x, y, axis):
+        stat = statistic(x, y, axis)
+        return np.abs(stat) if two_sided else stat
+
+    return stats.permutation_test(
+        samples, oriented, vectorized=True, n_resamples=np.inf,
+        alternative="greater" if two_sided else alternative).pvalue
+
+
+@pytest.mark.parametrize("alternative", ["two-sided", "greater", "less"])
+@pytest.mark.parametrize("test, equal_var", [("ttest", True),
+                                             ("welch", False)])
+def test_exact_t_tests_match_scipy(test, equal_var, alternative):
+    samples = _samples()
+    res = permutation_test(samples, test=test, alternative=alternative)
+
+    assert res.exact and res.n_perm == 1716 and res.mc_se == 0
+    assert res.statistic == pytest.approx(
+        stats.ttest_ind(*samples, equal_var=equal_var).statistic, rel=1e-12)
+    assert res.pval == pytest.approx(
+        _scipy_exact(samples, _t(equal_var), alternative), rel=1e-12)
+
+
+@pytest.mark.parametrize("alternative", ["two-sided", "greater", "less"])
+def test_exact_mwu_matches_the_exact_scipy_test(alternative):
+    samples = _samples()
+    res = permutation_test(samples, test="mwu", alternative=alternative)
+    expected = stats.mannwhitneyu(*samples, alternative=alternative,
+                                  method="exact")
+
+    assert res.exact
+    assert res.statistic == expected.statistic
+    assert res.pval == pytest.approx(expected.pvalue, rel=1e-12)
+
+
+def test_long_format_uses_groups_in_sorted_order():
+    samples = _samples()
+    df = pd.DataFrame({
+        "y": np.concatenate(samples[::-1] + [[np.nan]]),
+        "g": ["b"] * 7 + ["a"] * 6 + ["a"],
+    })
+    res = permutation_test(df, dv="y", between="g", alternative="less")
+    assert res.to_dict() == permutation_test(samples,
+                                             alternative="less").to_dict()
+
+
+@pytest.mark.parametrize("test, scipy_test", [("anova", stats.f_oneway),
+                                              ("kruskal", stats.kruskal)])
+def test_random_permutations_agree_with_scipy(test, scipy_test):
+    samples = _samples(sizes=(8, 10, 12))
+    res = permutation_test(samples, test=test, n_perm=20_000,
+                           early_stop=False, seed=1)
+
+    def statistic(*args, axis):
+        return scipy_test(*args, axis=axis).statistic
+
+    expected = stats.permutation_test(samples, statistic, vectorized=True,
+                                      n_resamples=20_000, alternative="greater",
+                                      random_state=2)
+    assert not res.exact and res.n_perm == 20_000
+    assert res.statistic == pytest.approx(scipy_test(*samples).statistic,
+                                          rel=1e-12)
+    assert abs(res.pval - expected.pvalue) < 5 * np.hypot(res.mc_se, 0.002)
+
+
+def test_random_permutations_do_not_depend_on_the_workers():
+    samples = _samples(sizes=(30, 40))
+    kwargs = dict(test="welch", n_perm=5_000, early_stop=False,
+                  max_memory=100_000, seed=3)
+    serial = permutation_test(samples, **kwargs)
+    assert serial.to_dict() == permutation_test(samples, workers=2,
+                                                **kwargs).to_dict()
+    assert serial.to_dict() != permutation_test(
+        samples, **{**kwargs, "seed": 4}).to_dict()
+
+
+def test_early_stop_once_the_decision_is_clear():
+    samples = _samples(sizes=(30, 40))
+    samples[1] += 3
+    res = permutation_test(samples, n_perm=100_000, max_memory=100_000,
+                           seed=0)
+    assert res.stopped_early and res.n_perm < 100_000
+    assert res.pval < 0.05
+
+
+def test_invalid_arguments():
+    samples = _samples()
+    with pytest.raises(ValueError):
+        permutation_test(samples, test="median")
+    with pytest.raises(ValueError):
+        permutation_test(samples, alternative="both")
+    with pytest.raises(ValueError):
+        permutation_test(samples + samples, test="welch")
+    with pytest.raises(ValueError):
+        permutation_test([[1.0], [2.0, 3.0]], test="ttest")
@@ -0,0 +1,113 @@
+"""
+Tests for PlotCache in plot_cache.py and its use by dgplots().
+
+Run from the materials/ directory:
+
+    python -m pytest scripts/tests
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.formula.api as smf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dgplots import dgplots
+from plot_cache import PlotCache, active_cache, disable_cache, enable_cache
+
+
+@pytest.fixture(scope="module")
+def fit():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"x": rng.normal(size=60)})
+    df["y"] = 1 + 2 * df["x"] + rng.normal(size=60)
+    return smf.ols("y ~ x", data=df).fit()
+
+
+@pytest.fixture
+def cache():
+    try:
+        yield enable_cache()
+    finally:
+        disable_cache()
+
+
+def test_dgplots_hits_the_enabled_cache(fit, cache):
+    assert active_cache() is cache
+    first = dgplots(fit, output="bytes")
+    second = dgplots(fit, output="bytes")
+
+    assert first == second
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert stats["items_in_memory"] == 1
+    assert stats["bytes_in_memory"] == len(first)
+
+
+def test_options_that_change_the_image_miss(fit, cache):
+    dgplots(fit, output="bytes")
+    dgplots(fit, output="bytes", format="svg")
+    dgplots(fit, output="bytes", figsize=(8, 6))
+    dgplots(fit, output="bytes", dpi=100)
+    assert (cache.hits, cache.misses) == (0, 4)
+
+    # The output mode only wraps the same image
+    dgplots(fit)
+    assert cache.stats()["hits"] == 1
+
+
+def test_explicit_cache_and_figure_output(fit, cache):
+    own = PlotCache()
+    dgplots(fit, output="bytes", cache=own)
+    dgplots(fit, output="figure")
+    assert (own.hits, own.misses) == (0, 1)
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_memory_is_bounded_by_count_and_bytes():
+    cache = PlotCache(max_items=3, max_bytes=25)
+    for key in "abcd":
+        cache.put(key, b"x" * 5)
+    assert cache.get("a") is None
+    assert cache.stats()["items_in_memory"] == 3
+
+    # Touching b makes c the oldest
+    cache.get("b")
+    cache.put("e", b"y" * 12)
+    assert cache.get("c") is None
+    assert cache.get("b") is not None
+    assert cache.stats()["bytes_in_memory"] <= 25
+
+
+def test_an_entry_larger_than_max_bytes_is_kept_alone():
+    cache = PlotCache(max_bytes=10)
+    cache.put("small", b"x" * 4)
+    cache.put("large", b"y" * 40)
+    assert cache.get("large") == b"y" * 40
+    assert cache.get("small") is None
+    assert cache.stats()["items_in_memory"] == 1
+
+
+def test_disk_level_survives_and_evicts_the_oldest(tmp_path):
+    directory = str(tmp_path / "cache")
+    cache = PlotCache(directory, max_bytes=25)
+    cache.put("old", b"o" * 10)
+    cache.put("svg", b"s" * 10, format="svg")
+    past = time.time() - 60
+    os.utime(os.path.join(directory, "old.png"), (past, past))
+    cache.put("new", b"n" * 10)
+    assert sorted(os.listdir(directory)) == ["new.png", "svg.svg"]
+
+    # A fresh cache on the same directory finds the files and promotes them
+    reopened = PlotCache(directory)
+    assert reopened.get("svg", format="svg") == b"s" * 10
+    assert reopened.get("old") is None
+    assert reopened.stats()["items_in_memory"] == 1
+
+    reopened.clear()
+    assert os.listdir(directory) == []
+    assert (reopened.hits, reopened.misses) == (0, 0)
@@ -0,0 +1,78 @@
+"""
+Tests for pwr_f2_test() and pwr_f2_grid() in pwr_f2_test.py.
+
+Run from the materials/ directory:
+
+    python -m pytest scripts/tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+from scipy.stats import f, ncf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pwr_f2_test import pwr_f2_grid, pwr_f2_test
+
+
+def _power(u, v, f2, sig_level):
+    """Power straight from scipy, as pwr.f2.test defines it."""
+    return ncf.sf(f.isf(sig_level, u, v), u, v, f2 * (u + v + 1))
+
+
+def test_power_matches_scipy():
+    res = pwr_f2_test(u=3, v=40, f2=0.15, sig_level=0.05)
+    assert res.power == pytest.approx(_power(3, 40, 0.15, 0.05), rel=1e-12)
+    assert res.num_obs == 3 + 40 + 1
+
+
+@pytest.mark.parametrize("missing", ["u", "v", "f2", "sig_level"])
+def test_solved_parameter_reproduces_the_power(missing):
+    params = {"u": 4, "v": 60, "f2": 0.2, "sig_level": 0.05, "power": 0.8}
+    params[missing] = None
+    res = pwr_f2_test(**params)
+
+    assert res.converged
+    assert _power(res.u, res.v, res.f2, res.sig_level) == pytest.approx(
+        0.8, abs=1e-8)
+
+
+@pytest.mark.parametrize("missing", ["u", "v", "f2", "sig_level", "power"])
+def test_grid_matches_the_scalar_solver(missing):
+    values = {"u": [2, 3], "v": [[60], [120]],
+              "f2": [[0.15, 0.2], [0.25, 0.3]], "sig_level": 0.05,
+              "power": 0.8}
+    grid = pwr_f2_grid(**{**values, missing: None})
+
+    assert len(grid) == 4
+    for row in grid.itertuples(index=False):
+        scalar = {name: getattr(row, name) for name in values}
+        scalar[missing] = None
+        expected = getattr(pwr_f2_test(**scalar), missing)
+        assert getattr(row, missing) == pytest.approx(expected, rel=1e-6)
+
+
+@pytest.mark.parametrize("u, f2, power", [(1, 0.35, 0.8), (3, 0.15, 0.9),
+                                          (6, 0.02, 0.8), (2, 1.5, 0.95)])
+def test_integer_v_is_the_smallest_that_reaches_the_power(u, f2, power):
+    res = pwr_f2_test(u=u, f2=f2, sig_level=0.05, power=power, integer=True)
+
+    # Brute force over the whole numbers up to the continuous solution
+    v_max = int(np.ceil(pwr_f2_test(u=u, f2=f2, sig_level=0.05,
+                                    power=power).v))
+    v = np.arange(1, v_max + 1)
+    expected = v[_power(u, v, f2, 0.05) >= power][0]
+
+    assert res.converged
+    assert res.v == expected
+    assert res.power == pytest.approx(_power(u, expected, f2, 0.05))
+    assert res.power >= power > _power(u, expected - 1, f2, 0.05)
+
+
+def test_exactly_one_parameter_must_be_missing():
+    with pytest.raises(ValueError):
+        pwr_f2_test(u=3, v=40, f2=0.15, sig_level=0.05, power=0.8)
+    with pytest.raises(ValueError):
+        pwr_f2_grid(u=3, f2=0.15, sig_level=0.05)
@@ -0,0 +1,87 @@
+"""
+Tests for pwr_sim() and the design builders in pwr_sim.py.
+
+Run from the materials/ directory:
+
+    python -m pytest scripts/tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+from scipy.stats import f, ncf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pwr_f2_test import pwr_f2_test
+from pwr_sim import anova_design, pwr_sim, regression_design, ttest_design
+
+
+def _analytic(X, coef, test, sigma=1.0, sig_level=0.05):
+    """Exact power of the F-test under normal errors, from scipy."""
+    n, p = X.shape
+    beta = coef[test]
+    cov = np.linalg.inv(X.T @ X)[np.ix_(test, test)]
+    nc = beta @ np.linalg.solve(cov, beta) / sigma ** 2
+    return ncf.sf(f.isf(sig_level, len(test), n - p), len(test), n - p, nc)
+
+
+def _within_mc_error(res, expected):
+    return abs(res.power - expected) < 4 * np.sqrt(
+        expected * (1 - expected) / res.n_sims)
+
+
+def test_two_sample_t_matches_pwr_f2_test():
+    n, d = 20, 0.8
+    res = pwr_sim(*ttest_design(n, d), n_sims=20_000, seed=1)
+    expected = pwr_f2_test(u=1, v=2 * n - 2, f2=d ** 2 / 4,
+                           sig_level=0.05).power
+
+    assert expected == pytest.approx(_analytic(*ttest_design(n, d)))
+    assert res.n_sims == 20_000 and not res.stopped_early
+    assert _within_mc_error(res, expected)
+
+
+@pytest.mark.parametrize("design", [
+    ttest_design(15, 0.6, two_sample=False),
+    anova_design([0.0, 0.3, 0.8], n_per_group=12),
+    regression_design(np.random.default_rng(0).normal(size=(50, 3)),
+                      [0.3, 0.0, -0.2], test=[0, 2]),
+])
+def test_normal_errors_match_the_analytic_power(design):
+    res = pwr_sim(*design, sigma=1.3, sig_level=0.01, n_sims=20_000, seed=2)
+    assert _within_mc_error(res, _analytic(*design, sigma=1.3,
+                                           sig_level=0.01))
+
+
+# The t-test is conservative at this n under skewed errors, so only
+# near-normal errors are checked against the nominal level
+@pytest.mark.parametrize("error", ["normal", ("t", 5)])
+def test_null_rejects_at_about_the_significance_level(error):
+    X, coef, test = ttest_design(40, 0.0)
+    res = pwr_sim(X, coef, test, error=error, n_sims=20_000, seed=3)
+    assert _within_mc_error(res, 0.05)
+
+
+def test_result_does_not_depend_on_the_workers():
+    design = ttest_design(20, 0.5)
+    kwargs = dict(error=("t", 5), n_sims=4_000, chunk_size=500, seed=4)
+    serial = pwr_sim(*design, **kwargs)
+
+    assert serial.to_dict() == pwr_sim(*design, workers=2, **kwargs).to_dict()
+    assert serial.to_dict() != pwr_sim(*design, **{**kwargs,
+                                                   "seed": 5}).to_dict()
+
+
+def test_target_se_stops_early():
+    res = pwr_sim(*ttest_design(20, 0.5), n_sims=100_000, chunk_size=1_000,
+                  target_se=0.01, seed=6)
+    assert res.stopped_early
+    assert res.mc_se <= 0.01 and res.n_sims < 100_000
+
+
+@pytest.mark.parametrize("error", [("t", 2), ("t", 1.5), ("t",), "cauchy"])
+def test_invalid_error_distributions_are_rejected(error):
+    with pytest.raises(ValueError):
+        pwr_sim(*ttest_design(20, 0.5), error=error, n_sims=10)
@@ -0,0 +1,64 @@
+"""
+Tests for the Q–Q plotting positions and decimated Q–Q panel in
+dgplots.py.
+
+Run from the materials/ directory:
+
+    python -m pytest scripts/tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import norm
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dgplots import QQ_TAIL_POINTS, _qq_data, qq_probabilities
+
+
+def _residuals(n, seed=0):
+    return pd.DataFrame({
+        "residuals": np.random.default_rng(seed).standard_t(3, size=n)})
+
+
+def test_positions_are_those_of_stat_qq():
+    m = 7
+    np.testing.assert_allclose(qq_probabilities(m),
+                               (np.arange(1, m + 1) - 3 / 8) / (m + 1 / 4))
+
+
+@pytest.mark.parametrize("m, n", [(100, 10_000), (20, 130), (500, 501)])
+def test_decimated_positions_keep_the_tail_order_statistics(m, n):
+    probs = qq_probabilities(m, n)
+    every = qq_probabilities(n)
+    tail = min(QQ_TAIL_POINTS, n // 2)
+
+    np.testing.assert_allclose(probs[:tail], every[:tail])
+    np.testing.assert_allclose(probs[-tail:], every[-tail:])
+    assert np.all(np.diff(probs) > 0)
+    assert len(probs) <= m + 2 * tail
+
+
+def test_few_observations_use_every_position():
+    np.testing.assert_array_equal(qq_probabilities(200, 150),
+                                  qq_probabilities(150))
+
+
+@pytest.mark.parametrize("n", [60, 5_000])
+def test_decimated_panel_has_the_exact_tails(n):
+    df = _residuals(n)
+    resid = np.sort(df["residuals"])
+    theoretical, sample, _ = _qq_data(df, n_quantiles=40)
+    full_theoretical, full_sample, _ = _qq_data(df)
+    tail = min(QQ_TAIL_POINTS, n // 2)
+
+    np.testing.assert_array_equal(full_sample, resid)
+    np.testing.assert_array_equal(sample[:tail], resid[:tail])
+    np.testing.assert_array_equal(sample[-tail:], resid[-tail:])
+    np.testing.assert_allclose(theoretical[:tail], full_theoretical[:tail])
+    np.testing.assert_allclose(theoretical,
+                               norm.ppf(qq_probabilities(40, n)))
+    assert np.all(np.diff(sample) >= 0)
@@ -0,0 +1,38 @@
+"""
+Tests for step_aic.py.
+
+Run from the materials/ directory:
+
+    python -m pytest scripts/tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from step_aic import step_aic
+
+
+def _data(n=120, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(n, 3)), columns=["a", "b", "c"])
+    df["y"] = df["a"] + rng.normal(size=n)
+    df.loc[::10, "b"] = np.nan
+    return df
+
+
+def test_fit_uses_scored_rows_with_duplicated_index():
+    df = _data()
+    duplicated = pd.concat([df.iloc[:60], df.iloc[60:]])
+    duplicated.index = np.r_[np.arange(60), np.arange(60)]
+
+    res = step_aic("y ~ a + b + c", duplicated)
+    expected = step_aic("y ~ a + b + c", df)
+
+    fit = res.fit()
+    assert fit.nobs == df["b"].notna().sum()
+    assert res.formula == expected.formula
+    assert np.isclose(fit.aic, res.aic)
@@ -0,0 +1,197 @@
+# Persistent Matplotlib renderer: one laid-out figure reused across fits
+"""
+DiagnosticRenderer draws the dgplots() panels of many fits in a row onto
+one figure. The figure, axes, styling and artists are built once; every
+fit only swaps the data of the artists, rescales the axes and encodes
+the figure, which saves building and laying out a new figure per fit.
+
+The renderer updates the artists the dgplots panel helpers draw, so it
+shares those helpers with dgplots.py rather than going through its
+public functions. Requires dgplots.py in the same directory.
+
+Example:
+    renderer = DiagnosticRenderer()
+    images = [renderer.render(fit, output="bytes") for fit in fits]
+"""
+
+import numpy as np
+from statsmodels.regression.linear_model import RegressionResultsWrapper
+
+from dg_timing import instrumented, stage
+from dgplots import (
+    LARGE_N_THRESHOLD, check_output, deliver_figure, top_influential,
+    _LARGE_N, _STYLE, _check_options, _cooks_data, _diagnostics_df,
+    _draw_points, _new_figure, _qq_data, _qq_line, _smooth_df, _style_axes,
+)
+
+__all__ = ["DiagnosticRenderer"]
+
+
+# ======================================================================
+# Renderer
+# ======================================================================
+def _rescale(ax, points):
+    """Fit the view limits of ax to its lines and the given (x, y) points."""
+    ax.relim()
+    ax.update_datalim(points)
+    ax.autoscale_view()
+
+
+class DiagnosticRenderer:
+    """
+    Draw the dgplots() panels of many fits onto one reusable figure.
+
+    The figure, axes, styling, labels and artists are created once.
+    Every render() call only replaces the data of the existing artists
+    (set_offsets, set_data, set_segments), rescales the axes and encodes
+    the figure, which saves building and laying out a new figure for
+    each fit. The layout is computed with tight_layout() on the first
+    call and kept afterwards; pass relayout=True when a fit has much
+    wider tick labels than the first one.
+
+    Parameters
+    ----------
+    figsize : tuple of float, default (12, 10)
+        Size of the composite figure in inches.
+
+    Notes
+    -----
+    A renderer owns a single figure, so it must not be shared between
+    threads, and the figure returned by output="figure" is redrawn by
+    the next call. The plot cache is not consulted.
+
+    Examples
+    --------
+    >>> renderer = DiagnosticRenderer()
+    >>> images = [renderer.render(fit, output="bytes") for fit in fits]
+    """
+
+    def __init__(self, figsize=(12, 10)):
+        fig, axes = _new_figure(figsize)
+        self.figure = fig
+        self.figsize = tuple(figsize)
+        self._axes = axes
+        self._laid_out = False
+
+        def points(ax, **kwargs):
+            return ax.scatter([], [], s=_STYLE["point_size"], color="black",
+                              linewidths=0, **kwargs)
+
+        def line(ax, color):
+            return ax.plot([], [], color=color,
+                           linewidth=_STYLE["thick_line"])[0]
+
+        # P1 and P3: points (scatter or hexbin) and LOWESS curves
+        self._points = [points(axes[0]), None, points(axes[2])]
+        self._hexbin = [False, False, False]
+        axes[0].axhline(0, color="blue", linewidth=_STYLE["thin_line"])
+        self._smooth = [line(axes[0], "red"), None, line(axes[2], "red")]
+
+        # P2: Q–Q points and reference line
+        self._qq_points = points(axes[1])
+        self._qq_line = line(axes[1], "blue")
+
+        # P4: lollipops and reference lines
+        self._stems = axes[3].vlines([], 0, [], color="blue",
+                                     linewidth=_STYLE["thin_line"])
+        self._cooks_points = points(axes[3], zorder=3)
+        axes[3].axhline(0, color="black", linewidth=_STYLE["thin_line"])
+        self._threshold = axes[3].axhline(0, color="blue", linestyle="--",
+                                          linewidth=_STYLE["thin_line"])
+
+        _style_axes(axes[0], "Residuals plot", "Predicted values", "Residuals")
+        _style_axes(axes[1], "Q–Q plot", "Theoretical quantiles",
+                    "Sample quantiles")
+        _style_axes(axes[2], "Location–Scale plot", "Predicted values",
+                    u"√|standardised residuals|")
+        _style_axes(axes[3], "Influential points", "Observation", "Cook's D")
+
+    def __repr__(self):
+        return (f"DiagnosticRenderer(figsize={self.figsize}, "
+                f"laid_out={self._laid_out})")
+
+    def _set_points(self, i, x, y, large_n):
+        """Show (x, y) on panel i, swapping scatter and hexbin as needed."""
+        if not large_n and not self._hexbin[i]:
+            self._points[i].set_offsets(np.column_stack([x, y]))
+            return
+
+        # Hexbin cells cannot be updated in place
+        self._points[i].remove()
+        self._points[i] = _draw_points(self._axes[i], x, y, large_n)
+        self._hexbin[i] = large_n
+
+    def _update(self, df, large_n, qq_quantiles, lowess_grid=None):
+        """Replace the data of every artist and rescale the axes."""
+        axes = self._axes
+        x = np.asarray(df["predicted_values"])
+        df_lo = _smooth_df(df, large_n, lowess_grid)
+
+        for i, column in ((0, "residuals"), (2, "std_resid")):
+            y = np.asarray(df[column])
+            self._set_points(i, x, y, large_n)
+            self._smooth[i].set_data(df_lo["predicted_values"],
+                                     df_lo[f"{column}_smooth"])
+            _rescale(axes[i], np.column_stack([x, y]))
+
+        theoretical, sample, y_q = _qq_data(df, qq_quantiles)
+        self._qq_points.set_offsets(np.column_stack([theoretical, sample]))
+        self._qq_line.set_data(*_qq_line(theoretical, y_q))
+        _rescale(axes[1], self._qq_points.get_offsets())
+
+        obs, cooks_d, point_size = _cooks_data(df, large_n)
+        tops = np.column_stack([obs, cooks_d])
+        bottoms = np.column_stack([obs, np.zeros(len(obs))])
+        self._stems.set_segments(np.stack([bottoms, tops], axis=1))
+        self._cooks_points.set_offsets(tops)
+        self._cooks_points.set_sizes([point_size])
+        self._threshold.set_ydata([4 / len(df)] * 2)
+        _rescale(axes[3], tops)
+
+    @instrumented
+    def render(self, results, large_n=None,
+               large_n_threshold=LARGE_N_THRESHOLD, qq_quantiles=None,
+               lowess_grid=None, output="html", file=None, format="png",
+               dpi=150, compress_level=None, relayout=False, top_k=None):
+        """
+        Draw the diagnostic panels of a fit onto the reused figure.
+
+        Parameters
+        ----------
+        results : RegressionResultsWrapper
+            A fitted statsmodels regression model.
+        relayout : bool, default False
+            Recompute the layout with tight_layout() for this fit.
+
+        The other parameters are those of dgplots().
+
+        Returns
+        -------
+        IPython.display.HTML, bytes, None or matplotlib.figure.Figure
+            Depending on `output`. With top_k, a tuple of this and the
+            DataFrame of influential points.
+        """
+        if not isinstance(results, RegressionResultsWrapper):
+            raise TypeError("Please provide a statsmodels regression fit.")
+
+        _check_options("matplotlib", large_n, qq_quantiles, lowess_grid)
+        check_output(output, file, format, compress_level, top_k)
+
+        df = _diagnostics_df(results)
+        table = None if top_k is None else top_influential(df, top_k)
+        if large_n is None:
+            large_n = len(df) > large_n_threshold
+        if qq_quantiles is None and large_n:
+            qq_quantiles = _LARGE_N["qq_quantiles"]
+
+        with stage("drawing", n_obs=len(df), engine="matplotlib",
+                    large_n=large_n):
+            self._update(df, large_n, qq_quantiles, lowess_grid)
+            if relayout or not self._laid_out:
+                with stage("layout"):
+                    self.figure.tight_layout()
+                self._laid_out = True
+
+        value = deliver_figure(self.figure, output, file, format, dpi,
+                               compress_level)
+        return value if top_k is None else (value, table)
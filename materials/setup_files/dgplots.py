@@ -1,10 +1,13 @@
-# dgplots (rewritten with stable LOWESS smoothing)
+# dgplots (single-pass Matplotlib renderer)
 """
 Diagnostic plotting utilities for statsmodels linear models.
 
-This version replaces plotnine's LOESS smoothing with a robust LOWESS
-implementation from statsmodels, eliminating failures caused by
-plotnine's geom_smooth(stat_smooth) layer.
+The four diagnostic panels are drawn directly onto the axes of a single
+Matplotlib figure, styled to match plotnine's theme_bw(). Each call
+builds one figure and performs one PNG encode, instead of rendering
+every panel through plotnine, rasterising it and pasting the bitmaps
+into a composite. The previous plotnine pipeline is still available
+with engine="plotnine".
 
 Plots:
   1. Residuals vs fitted (+ LOWESS)
@@ -12,25 +15,136 @@ Plots:
   3. Scale–location (+ LOWESS)
   4. Cook’s distance
 
+Computation:
+  LOWESS curves are computed by lowess_smooth(), which matches
+  statsmodels' lowess (used since version 1.2.0) but smooths both
+  residual panels against one sort and one set of neighbourhood
+  weights. Leverage, studentized residuals and Cook's distance are
+  computed by influence_measures() without building the statsmodels
+  influence object. influential_points() lists the observations with
+  the largest Cook's distances.
+
+Large-n mode:
+  Models with more than LARGE_N_THRESHOLD observations are drawn with
+  density panels, binned LOWESS, a Cook's plot decimated to per-bin
+  maxima and the points above 4/n, and a Q–Q panel of a fixed number
+  of quantiles plus the exact tails. QuantileSketch gives mergeable
+  approximate quantiles for residuals computed in chunks.
+
 Output:
-  Composite 2×2 PNG returned as base64 HTML for universal display.
+  Composite 2×2 image, PNG or SVG. By default it is returned as base64
+  HTML for universal display; output="bytes", "file" and "figure"
+  return the encoded image, write it straight to a path or file-like
+  object, or return the Matplotlib figure. dgplots_many() renders many
+  fits over a process pool and can write an HTML report or a directory
+  of image files.
+
+Split panels:
+  panel_workers= draws the four panels as separate figures in worker
+  processes or threads and tiles their pixels into the composite. The
+  worker pools are kept for later calls until shutdown_panel_workers()
+  or interpreter exit.
+
+Building blocks:
+  render_diagnostics() and render_summary() draw the panels from
+  precomputed diagnostics or summaries instead of a fit,
+  top_influential() lists influential points from the diagnostics, and
+  check_output() and deliver_figure() validate and apply the output
+  options, for modules that fit models in batches or out of core.
+
+Related modules, re-exported here:
+  plot_cache.py    enable_cache() turns on an opt-in PlotCache.
+                   Repeated calls on an identical fit with identical
+                   options return the stored image without rendering
+                   again.
+  dg_timing.py     add_timing_hook() and collect_timings() receive a
+                   StageTiming record for every stage of a call
+                   (influence, smoothing, drawing, layout, encoding,
+                   ...). Setting the DGPLOTS_PROFILE environment
+                   variable to a directory writes a cProfile dump of
+                   every call there. Both cost next to nothing when
+                   unused.
+  dg_renderer.py   DiagnosticRenderer keeps one laid-out figure and
+                   only swaps the data of its artists for every fit, for
+                   drawing the panels of many models in a row.
 """
 
-__version__ = "1.2.0"
+__version__ = "1.24.0"
 
 import pandas as pd
 import numpy as np
+import atexit
 import base64
+import hashlib
+import html
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from io import BytesIO
-import matplotlib.pyplot as plt
-from IPython.display import HTML
 import statsmodels.api as sm
-from statsmodels.nonparametric.smoothers_lowess import lowess
+from scipy.stats import norm
+from scipy.stats.mstats import mquantiles, plotting_positions
 
-from plotnine import (
-    ggplot, aes, geom_point, geom_line, stat_qq, stat_qq_line,
-    geom_segment, geom_hline, labs, theme_bw, theme, element_text
+from dg_timing import (
+    PROFILE_ENV, StageTiming, add_timing_hook, collect_timings,
+    remove_timing_hook, instrumented as _instrumented, stage as _stage,
 )
+from plot_cache import PlotCache, active_cache, disable_cache, enable_cache
+
+__all__ = [
+    "dgplots", "dgplots_many", "influence_measures", "influential_points",
+    "lowess_smooth", "quantile_sketch", "QuantileSketch", "DiagnosticRenderer",
+    "PlotCache", "enable_cache", "disable_cache", "StageTiming",
+    "add_timing_hook", "remove_timing_hook", "collect_timings",
+    "shutdown_panel_workers", "render_diagnostics", "render_summary",
+    "check_output", "deliver_figure", "top_influential", "qq_probabilities",
+    "LARGE_N_THRESHOLD", "COOKS_ABOVE_MAX", "QQ_TAIL_POINTS",
+]
+
+# Matplotlib, plotnine and IPython are imported inside the functions that
+# use them, so importing this module (or computing influence_measures())
+# does not pay for the plotting stack until the first plot is drawn.
+
+
+# ======================================================================
+# Styling shared by the Matplotlib renderer (mirrors theme_bw())
+# ======================================================================
+# plotnine sizes are in mm-like units; scale them to Matplotlib points
+# using the same factor plotnine applies (sqrt(pi)). Font sizes are a
+# little smaller than the theme values because each plotnine panel used
+# to be downscaled when pasted into the composite.
+_SIZE_FACTOR = np.sqrt(np.pi)
+
+_STYLE = {
+    "point_size": ((3 + 0.5) * _SIZE_FACTOR) ** 2 * 0.7,
+    "thin_line": 0.8 * _SIZE_FACTOR,
+    "thick_line": 1.2 * _SIZE_FACTOR,
+    "title_size": 13,
+    "axis_title_size": 15,
+    "axis_text_size": 11,
+    "grid_colour": "#EBEBEB",    # grey92
+    "border_colour": "#333333",  # grey20
+    "axis_text_colour": "#4D4D4D",  # grey30
+}
+
+# Large-n mode: above this many observations the scatter panels are drawn
+# as densities and the LOWESS curves are fitted to binned means.
+LARGE_N_THRESHOLD = 20_000
+
+# Most points the decimated Cook's panel draws above the 4/n line
+COOKS_ABOVE_MAX = 5000
+
+# Smallest and largest residuals the decimated Q–Q panel draws exactly
+QQ_TAIL_POINTS = 50
+
+_LARGE_N = {
+    "lowess_bins": 1000,   # equal-count bins fed to LOWESS
+    "hexbin_gridsize": 80,
+    "cooks_bins": 2000,    # observation bins for the Cook's envelope
+    "cooks_above_max": COOKS_ABOVE_MAX,
+    "qq_quantiles": 500,   # points on the Q–Q panel, plus the tails
+}
 
 
 # ======================================================================
@@ -43,6 +157,8 @@ def _render_plotnine(p):
     This function does NOT try to catch LOESS failures anymore because
     LOWESS is computed externally, not inside plotnine.
     """
+    import matplotlib.pyplot as plt
+
     def _draw(plot):
         fig = plot.draw()
         buf = BytesIO()
@@ -57,57 +173,785 @@ def _render_plotnine(p):
 
 
 # ======================================================================
-# Utility: LOWESS smoother using statsmodels
+# Utility: LOWESS smoother
 # ======================================================================
-def _lowess_df(df, x, y, frac=0.75):
+# Neighbourhood weights are computed in blocks of about this many values
+_LOWESS_BLOCK = 2**16
+
+# Tricube weights at or below 1e-12 do not count towards the two points a
+# local regression needs (as in statsmodels); this is the relative
+# distance where the weight falls to that level.
+_LOWESS_MIN_DIST = (1 - 1e-4) ** (1 / 3)
+
+
+def _lowess_windows(x, xvals, frac):
+    """
+    Find the neighbourhood of every point of xvals in sorted x.
+
+    Each neighbourhood holds the k = frac·n nearest points of x, chosen
+    as statsmodels' lowess slides its window along the data. Returns k,
+    the index of the first point of each window and its radius, the
+    distance to the farther end.
+    """
+    n = len(x)
+    k = min(max(int(frac * n + 1e-10), 2), n)
+    mid = (x[:n - k] + x[k:]) / 2.0
+    left = np.minimum(np.searchsorted(mid, xvals, side="left"), n - k)
+    radius = np.fmax(xvals - x[left], x[left + k - 1] - xvals)
+    return k, left, radius
+
+
+def _lowess_fit(x, Y, xvals, frac=0.75):
+    """
+    Local linear fits with tricube weights at xvals, for every column of
+    Y at once.
+
+    x must be sorted. The windows are found once, and the weights of each
+    block of windows are computed once and applied to all columns of Y by
+    matrix products. Points outside a window get a weight of zero, so the
+    weights of consecutive windows share one dense slice of x.
+
+    Returns the fitted values, one row per point of xvals, and a mask of
+    the points whose window had at least two points with weight.
+    """
+    k, left, radius = _lowess_windows(x, xvals, frac)
+    fits = np.empty((len(xvals), Y.shape[1]))
+    rows = max(1, _LOWESS_BLOCK // (2 * k))
+
+    for start in range(0, len(xvals), rows):
+        stop = min(start + rows, len(xvals))
+        lo, hi = left[start], left[stop - 1] + k
+        xv, r = xvals[start:stop, None], radius[start:stop, None]
+
+        # Tricube weights (1 - |d|³)³ over the shared slice, in place.
+        # A zero radius (all x tied) gives no usable weights, as in
+        # statsmodels.
+        dx = x[lo:hi] - xv
+        w = np.abs(dx)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            w *= 1.0 / r
+        cube = w * w
+        w *= cube
+        np.subtract(1.0, w, out=w)
+        np.maximum(w, 0.0, out=w)
+        np.multiply(w, w, out=cube)
+        w *= cube
+
+        # Weighted regression on x - xv, evaluated at zero
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sw = w.sum(axis=1)
+            wx = w * dx
+            mean_x = wx.sum(axis=1) / sw
+            var_x = np.fmax(np.einsum("ij,ij->i", wx, dx) / sw - mean_x ** 2,
+                            1e-12)
+            mean_y = w @ Y[lo:hi] / sw[:, None]
+            mean_xy = wx @ Y[lo:hi] / sw[:, None]
+            fits[start:stop] = mean_y - (mean_x / var_x)[:, None] * (
+                mean_xy - mean_x[:, None] * mean_y)
+
+    reach = radius * _LOWESS_MIN_DIST
+    weighted = (np.searchsorted(x, xvals + reach, side="left")
+                - np.searchsorted(x, xvals - reach, side="right"))
+    return fits, weighted >= 2
+
+
+def lowess_smooth(x, ys, frac=0.75, n_grid=None):
+    """
+    LOWESS smoothing of several y series against the same x.
+
+    Equivalent to calling statsmodels' lowess(y, x, frac=frac, it=0) on
+    every series, but x is sorted and the neighbourhood windows and
+    tricube weights are found only once for all of them.
+
+    Parameters
+    ----------
+    x : array_like
+        Shared x values, with no missing values.
+    ys : array_like
+        One series (1-D) or several series, one per column (2-D).
+    frac : float, default 0.75
+        Share of the data in each neighbourhood.
+    n_grid : int, optional
+        Fit only at this many evenly spaced x values and interpolate
+        linearly in between, like R's loess(surface="interpolate").
+        Much faster for large n, at a small loss of accuracy.
+
+    Returns
+    -------
+    x_sorted : numpy.ndarray
+        The x values in increasing order.
+    smoothed : numpy.ndarray
+        Smoothed values at x_sorted, with the shape of ys.
+    """
+    if not 0 <= frac <= 1:
+        raise ValueError("frac must be between 0 and 1.")
+    if n_grid is not None and (int(n_grid) != n_grid or n_grid < 2):
+        raise ValueError("n_grid must be an integer of at least 2.")
+
+    x = np.asarray(x, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    Y = ys.reshape(len(x), -1)
+
+    # The same sort as statsmodels, so tied x values order alike
+    order = np.argsort(x)
+    x, Y = x[order], Y[order]
+
+    if n_grid is None or n_grid >= len(x):
+        fits, ok = _lowess_fit(x, Y, x, frac)
+        if not ok.all():
+            # statsmodels keeps the observed value, the first for ties
+            first = np.searchsorted(x, x, side="left")
+            fits[~ok] = Y[first[~ok]]
+    else:
+        grid = np.linspace(x[0], x[-1], n_grid)
+        grid_fits, ok = _lowess_fit(x, Y, grid, frac)
+        grid_fits[~ok] = np.nan
+        fits = np.column_stack([np.interp(x, grid, column)
+                                for column in grid_fits.T])
+
+    return x, fits.reshape((len(x),) + ys.shape[1:])
+
+
+def _lowess_df(df, x, ys, frac=0.75, n_bins=None, n_grid=None):
     """
     Compute LOWESS smoothing with parameters comparable to
-    plotnine/ggplot2's LOESS defaults (span = 0.75).
-    """
-    smoothed = lowess(
-        endog=df[y],
-        exog=df[x],
-        frac=frac,   # match ggplot2 default span
-        it=0,        # no robustness iterations (ggplot also uses none)
-        return_sorted=True
-    )
+    plotnine/ggplot2's LOESS defaults (span = 0.75), for one column ys or
+    a list of columns smoothed against the same x in one pass.
 
-    return pd.DataFrame({
-        x: smoothed[:, 0],
-        f"{y}_smooth": smoothed[:, 1],
-    })
+    If n_bins is given and the data has more rows, the points are sorted
+    by x and grouped into n_bins equal-count bins. LOWESS is then run on
+    the bin means. Every bin holds the same number of observations, so a
+    span of frac still covers the same share of the data. n_grid is
+    passed on to lowess_smooth().
+
+    Rows with a missing value in x or any of ys are left out.
+    """
+    ys = [ys] if isinstance(ys, str) else list(ys)
+
+    with _stage("smoothing", n_obs=len(df), n_bins=n_bins, n_grid=n_grid):
+        x_val = np.asarray(df[x], dtype=float)
+        y_val = np.column_stack([np.asarray(df[y], dtype=float) for y in ys])
+
+        finite = np.isfinite(x_val) & np.isfinite(y_val).all(axis=1)
+        if not finite.all():
+            x_val, y_val = x_val[finite], y_val[finite]
+
+        if n_bins is not None and len(x_val) > n_bins:
+            order = np.argsort(x_val, kind="stable")
+            bin_id = np.arange(len(x_val)) * n_bins // len(x_val)
+            counts = np.bincount(bin_id)
+            x_val = np.bincount(bin_id, weights=x_val[order]) / counts
+            y_val = np.column_stack([
+                np.bincount(bin_id, weights=column[order]) / counts
+                for column in y_val.T])
 
+        x_sorted, smoothed = lowess_smooth(x_val, y_val, frac=frac,
+                                           n_grid=n_grid)
+
+        frame = {x: x_sorted}
+        for y, column in zip(ys, smoothed.T):
+            frame[f"{y}_smooth"] = column
+        return pd.DataFrame(frame)
 
 
 # ======================================================================
-# Main function
+# Utility: quantiles for the Q–Q panel
 # ======================================================================
-def dgplots(results):
+def qq_probabilities(m, n=None, tail=QQ_TAIL_POINTS):
     """
-    Generate a 2×2 diagnostic panel for a statsmodels regression object.
-    LOWESS smoothing is provided by statsmodels.lowess and is extremely
-    stable (no LOESS failures).
+    Plotting positions stat_qq uses for m points, (i - 3/8) / (m + 1/4).
+
+    With n, the positions of m points summarising n observations: those
+    of the `tail` smallest and largest order statistics, which include
+    the minimum and maximum, come first and last, with m evenly spread
+    positions between them. Evenly spread positions alone would leave
+    out the tails, where departures from normality show. If n <= m, the
+    positions of all n observations are returned.
+    """
+    if n is None:
+        return (np.arange(1, m + 1) - 3 / 8) / (m + 1 / 4)
+    if n <= m:
+        return qq_probabilities(n)
+
+    tail = min(tail, n // 2)
+    ranks = np.r_[1:tail + 1, n - tail + 1:n + 1]
+    low, high = np.split((ranks - 3 / 8) / (n + 1 / 4), 2)
+    body = qq_probabilities(m)
+    if tail:
+        body = body[(body > low[-1]) & (body < high[0])]
+    return np.concatenate([low, body, high])
+
+
+class QuantileSketch:
+    """
+    Mergeable approximate quantiles of a stream of values (a t-digest).
+
+    Values are summarised by weighted centroids. The centroid sizes are
+    bounded by the arcsine scale function, so centroids are small in the
+    tails, where Q–Q plots need the most resolution, and the number of
+    centroids stays around compression / 2 however many values are added.
+    The exact minimum and maximum are kept.
+
+    Sketches of separate chunks can be built in parallel and combined
+    with merge(); see quantile_sketch().
+
+    Parameters
+    ----------
+    compression : int, default 1000
+        Accuracy parameter; memory and accuracy grow with it.
+    """
+
+    __slots__ = ("compression", "n", "_means", "_weights", "_min", "_max")
+
+    def __init__(self, compression=1000):
+        self.compression = compression
+        self.n = 0
+        self._means = np.empty(0)
+        self._weights = np.empty(0)
+        self._min = np.inf
+        self._max = -np.inf
+
+    def update(self, values):
+        """Add an array of values (NaNs are ignored). Returns self."""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values):
+            self._min = min(self._min, values.min())
+            self._max = max(self._max, values.max())
+            self.n += len(values)
+            self._compress(np.concatenate([self._means, values]),
+                           np.concatenate([self._weights,
+                                           np.ones(len(values))]))
+        return self
+
+    def merge(self, other):
+        """Fold another sketch into this one. Returns self."""
+        if other.n:
+            self._min = min(self._min, other._min)
+            self._max = max(self._max, other._max)
+            self.n += other.n
+            self._compress(np.concatenate([self._means, other._means]),
+                           np.concatenate([self._weights, other._weights]))
+        return self
+
+    def _compress(self, means, weights):
+        """Merge sorted centroids that share a unit step of the scale."""
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+
+        cum = np.cumsum(weights)
+        q_mid = (cum - weights / 2) / cum[-1]
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_mid - 1)
+        step = np.floor(k)
+        cluster = np.concatenate([[0], np.cumsum(step[1:] != step[:-1])])
+
+        self._weights = np.bincount(cluster, weights=weights)
+        self._means = np.bincount(cluster, weights=means * weights) \
+            / self._weights
+
+    def quantile(self, q):
+        """Approximate quantiles at probabilities q."""
+        if not self.n:
+            raise ValueError("The sketch is empty.")
+
+        # Each centroid sits at the middle of the mass it represents
+        cum = np.cumsum(self._weights)
+        positions = np.concatenate([[0], cum - self._weights / 2, [cum[-1]]])
+        values = np.concatenate([[self._min], self._means, [self._max]])
+        return np.interp(np.asarray(q) * cum[-1], positions, values)
+
+    def __repr__(self):
+        return (f"QuantileSketch(n={self.n}, "
+                f"centroids={len(self._means)}, "
+                f"compression={self.compression})")
+
+
+def _sketch_chunk(task):
+    """Worker entry point: sketch one chunk of values."""
+    values, compression = task
+    return QuantileSketch(compression).update(values)
+
+
+def quantile_sketch(values, chunk_size=1_000_000, workers=1,
+                    compression=1000):
+    """
+    Build a QuantileSketch of a large array chunk by chunk.
+
+    Chunks are sketched independently, over a process pool if
+    workers > 1, and merged in order.
+
+    Parameters
+    ----------
+    values : array_like
+    chunk_size : int, default 1_000_000
+        Values per chunk.
+    workers : int, default 1
+        Number of worker processes; None uses os.cpu_count().
+    compression : int, default 1000
+        As for QuantileSketch.
 
     Returns
     -------
-    IPython.display.HTML
+    QuantileSketch
     """
+    values = np.asarray(values, dtype=float).ravel()
+    tasks = [(values[start:start + chunk_size], compression)
+             for start in range(0, len(values), chunk_size)]
 
-    if not isinstance(results, sm.regression.linear_model.RegressionResultsWrapper):
-        raise TypeError("Please provide a statsmodels regression fit.")
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers == 1 or len(tasks) <= 1:
+        sketches = map(_sketch_chunk, tasks)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            sketches = list(pool.map(_sketch_chunk, tasks))
+
+    sketch = QuantileSketch(compression)
+    for part in sketches:
+        sketch.merge(part)
+    return sketch
+
+
+# ======================================================================
+# Diagnostics core: leverage, studentized residuals, Cook's distance
+# ======================================================================
+# Model classes (and their subclasses, such as GLSAR) whose influence
+# measures are computed from the whitened design matrix. Other fits are
+# only supported if their results provide get_influence().
+_LINEAR_MODELS = (sm.OLS, sm.WLS, sm.GLS)
+
+
+def _hat_matrix_diag(model):
+    """
+    Diagonal of the hat matrix of the whitened design in O(n·p) memory.
+
+    Uses the pseudo-inverse stored by fit(method="pinv") when available,
+    otherwise a reduced QR decomposition. The n×n hat matrix is never
+    formed.
+    """
+    wexog = model.wexog
+    pinv_wexog = getattr(model, "pinv_wexog", None)
+
+    if pinv_wexog is None:
+        q, r = np.linalg.qr(wexog)
+        if np.linalg.matrix_rank(r) == r.shape[1]:
+            return np.einsum("ij,ij->i", q, q)
+        pinv_wexog = np.linalg.pinv(wexog)
+
+    return np.einsum("ij,ji->i", wexog, pinv_wexog)
+
+
+def influence_measures(results):
+    """
+    Compute leverage, internally studentized residuals and Cook's distance
+    of a statsmodels regression fit in one vectorized pass.
 
-    infl = results.get_influence()
+    For OLS the values match statsmodels' OLSInfluence, but only these
+    three quantities are computed. WLS, GLS and GLSAR fits use the
+    whitened design and residuals, as R does for weighted lm() fits.
+    Memory use is O(n·p). Fits of other model classes go through
+    results.get_influence(); a TypeError names the model class if they
+    have none.
 
-    df = pd.DataFrame({
-        "residuals": results.resid,
-        "predicted_values": results.fittedvalues,
-        "std_resid": np.sqrt(np.abs(infl.resid_studentized_internal)),
-        "cooks_d": infl.cooks_distance[0],
-        "leverage": infl.hat_matrix_diag,
-        "obs": np.arange(len(results.resid)),
+    Parameters
+    ----------
+    results : RegressionResultsWrapper
+        A fitted statsmodels regression model.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Columns "leverage", "resid_studentized_internal" and "cooks_d",
+        one row per observation; missing for observations a GLSAR fit
+        loses to its whitening.
+    """
+    model = results.model
+    if not (isinstance(model, _LINEAR_MODELS)
+            or hasattr(results, "get_influence")):
+        raise TypeError("Influence measures are not available for "
+                        f"{type(model).__name__} fits.")
+
+    if isinstance(model, _LINEAR_MODELS):
+        k_vars = model.exog.shape[1]
+        resid = np.asarray(results.wresid)
+        hii = _hat_matrix_diag(model)
+        studentized = resid / np.sqrt(results.mse_resid) / np.sqrt(1 - hii)
+        cooks_d = studentized ** 2 / k_vars * hii / (1 - hii)
+
+        # GLSAR whitening drops the first observations, which have no
+        # influence measures
+        n_lost = len(results.resid) - len(resid)
+        if n_lost:
+            pad = np.full(n_lost, np.nan)
+            hii, studentized, cooks_d = (np.concatenate([pad, a])
+                                         for a in (hii, studentized, cooks_d))
+    else:
+        infl = results.get_influence()
+        hii = infl.hat_matrix_diag
+        studentized = infl.resid_studentized_internal
+        cooks_d = infl.cooks_distance[0]
+
+    return pd.DataFrame({
+        "leverage": np.asarray(hii),
+        "resid_studentized_internal": np.asarray(studentized),
+        "cooks_d": np.asarray(cooks_d),
+    })
+
+
+def _top_influential(df, k):
+    """
+    Rows of df with the k largest Cook's distances, largest first.
+
+    The rows are picked by partial selection, in O(n) time; missing
+    distances (observations with leverage one) rank last.
+    """
+    cooks_d = np.asarray(df["cooks_d"], dtype=float)
+    k = min(k, len(cooks_d))
+    key = np.where(np.isnan(cooks_d), -np.inf, cooks_d)
+    top = np.argpartition(key, len(key) - k)[len(key) - k:]
+    top = top[np.argsort(-key[top], kind="stable")]
+
+    return pd.DataFrame({
+        "obs": np.asarray(df["obs"])[top],
+        "cooks_d": cooks_d[top],
+        "leverage": np.asarray(df["leverage"])[top],
+        "resid_studentized_internal":
+            np.asarray(df["resid_studentized_internal"])[top],
     })
 
+
+def _check_top_k(k):
+    """Validate a number of influential points to report."""
+    if int(k) != k or k < 1:
+        raise ValueError("top_k must be a positive integer.")
+
+
+def top_influential(df, k=10):
+    """
+    Return the k most influential observations from a DataFrame of
+    diagnostics rather than a fit, e.g. one group of a batched fit
+    (grouped_ols.py).
+
+    Arguments:
+        df : DataFrame with the obs, cooks_d, leverage and
+            resid_studentized_internal of every observation
+        k : number of observations to return
+
+    Returns a DataFrame laid out as for influential_points().
+    """
+    _check_top_k(k)
+    return _top_influential(df, k)
+
+
+def influential_points(results, k=10):
+    """
+    Return the k most influential observations of a regression fit.
+
+    Parameters
+    ----------
+    results : RegressionResultsWrapper
+        A fitted statsmodels regression model.
+    k : int, default 10
+        Number of observations to return.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Columns "obs" (row position in the model data), "cooks_d",
+        "leverage" and "resid_studentized_internal", one row for each
+        of the k largest Cook's distances, largest first.
+    """
+    _check_top_k(k)
+    infl = influence_measures(results)
+    infl["obs"] = np.arange(len(infl))
+    return _top_influential(infl, k)
+
+
+# ======================================================================
+# Utility: collect the values shown in the panels
+# ======================================================================
+def _diagnostics_df(results):
+    """
+    Collect residuals, fitted values and influence measures of a
+    statsmodels regression fit into a single DataFrame.
+    """
+    with _stage("influence", n_obs=len(results.resid)):
+        infl = influence_measures(results)
+
+        return pd.DataFrame({
+            "residuals": np.asarray(results.resid),
+            "predicted_values": np.asarray(results.fittedvalues),
+            "std_resid": np.sqrt(np.abs(infl["resid_studentized_internal"])),
+            "cooks_d": infl["cooks_d"],
+            "leverage": infl["leverage"],
+            "resid_studentized_internal": infl["resid_studentized_internal"],
+            "obs": np.arange(len(results.resid)),
+        })
+
+
+# ======================================================================
+# Matplotlib renderer: one figure, four axes, one encode
+# ======================================================================
+def _style_axes(ax, title, xlabel, ylabel):
+    """
+    Apply theme_bw()-like styling and labels to a Matplotlib axes.
+    """
+    from matplotlib.ticker import AutoMinorLocator
+
+    ax.set_facecolor("white")
+    ax.set_axisbelow(True)
+    ax.locator_params(nbins=5)
+    ax.xaxis.set_minor_locator(AutoMinorLocator(2))
+    ax.yaxis.set_minor_locator(AutoMinorLocator(2))
+    ax.grid(True, which="major", color=_STYLE["grid_colour"], linewidth=1.0)
+    ax.grid(True, which="minor", color=_STYLE["grid_colour"], linewidth=0.5)
+    ax.tick_params(which="minor", length=0)
+    ax.tick_params(which="major", color=_STYLE["border_colour"],
+                   labelcolor=_STYLE["axis_text_colour"],
+                   labelsize=_STYLE["axis_text_size"])
+    for spine in ax.spines.values():
+        spine.set_edgecolor(_STYLE["border_colour"])
+
+    ax.set_title(title, fontsize=_STYLE["title_size"])
+    ax.set_xlabel(xlabel, fontsize=_STYLE["axis_title_size"])
+    ax.set_ylabel(ylabel, fontsize=_STYLE["axis_title_size"])
+
+
+def _draw_points(ax, x, y, large_n):
+    """
+    Draw a scatter layer, or a hexbin density in large-n mode, and
+    return its collection.
+
+    Cells are shaded on a log scale whose lower limit sits below a count
+    of one, so that isolated outliers stay visible as grey cells.
+    """
+    if large_n:
+        from matplotlib.colors import LogNorm
+        return ax.hexbin(x, y, gridsize=_LARGE_N["hexbin_gridsize"],
+                         norm=LogNorm(vmin=0.2), mincnt=1, cmap="Greys",
+                         linewidths=0)
+    return ax.scatter(x, y, s=_STYLE["point_size"], color="black",
+                      linewidths=0)
+
+
+def _smooth_df(df, large_n=False, lowess_grid=None):
+    """
+    LOWESS curves of the residual and scale–location panels, smoothed
+    against the predicted values in one pass.
+    """
+    return _lowess_df(df, "predicted_values", ["residuals", "std_resid"],
+                      n_bins=_LARGE_N["lowess_bins"] if large_n else None,
+                      n_grid=lowess_grid)
+
+
+def _draw_residuals(ax, df, large_n=False, df_lo=None):
+    """P1: Residuals vs Fitted with LOWESS."""
+    if df_lo is None:
+        df_lo = _smooth_df(df, large_n)
+
+    _draw_points(ax, df["predicted_values"], df["residuals"], large_n)
+    ax.axhline(0, color="blue", linewidth=_STYLE["thin_line"])
+    ax.plot(df_lo["predicted_values"], df_lo["residuals_smooth"],
+            color="red", linewidth=_STYLE["thick_line"])
+    _style_axes(ax, "Residuals plot", "Predicted values", "Residuals")
+
+
+def _draw_qq(ax, df, n_quantiles=None):
+    """P2: Normal Q–Q, using the same quantiles as stat_qq/stat_qq_line."""
+    _draw_qq_points(ax, *_qq_data(df, n_quantiles))
+
+
+def _qq_data(df, n_quantiles=None):
+    """
+    Theoretical and sample quantiles of the residuals, and the sample
+    quartiles the reference line passes through.
+
+    With n_quantiles, only that many sample quantiles are returned, at the
+    plotting positions stat_qq would use for n_quantiles observations,
+    plus the QQ_TAIL_POINTS smallest and largest residuals (see
+    qq_probabilities()). They are found by partial sorting rather than a
+    full sort.
+    """
+    resid = np.asarray(df["residuals"])
+
+    if n_quantiles is None or n_quantiles >= len(resid):
+        sample = np.sort(resid)
+        theoretical = norm.ppf(plotting_positions(sample, 3 / 8, 3 / 8))
+        y_q = mquantiles(sample, [0.25, 0.75])
+    else:
+        probs = qq_probabilities(n_quantiles, len(resid))
+        theoretical = norm.ppf(probs)
+        # Hyndman–Fan type 9 matches the stat_qq positions; at the tail
+        # positions it is the order statistics, which are taken exactly
+        sample = np.quantile(resid, probs, method="normal_unbiased")
+        n, tail = len(resid), min(QQ_TAIL_POINTS, len(resid) // 2)
+        part = np.partition(resid, [tail - 1, n - tail])
+        sample[:tail] = np.sort(part[:tail])
+        sample[len(sample) - tail:] = np.sort(part[n - tail:])
+        y_q = np.quantile(resid, [0.25, 0.75])
+
+    return theoretical, sample, y_q
+
+
+def _qq_line(theoretical, y_q):
+    """
+    End points of the Q–Q reference line through the first and third
+    sample quartiles y_q, spanning the theoretical quantiles.
+    """
+    x_q = norm.ppf([0.25, 0.75])
+    slope = (y_q[1] - y_q[0]) / (x_q[1] - x_q[0])
+    intercept = y_q[0] - slope * x_q[0]
+    x_line = np.array([theoretical[0], theoretical[-1]])
+    return x_line, intercept + slope * x_line
+
+
+def _draw_qq_points(ax, theoretical, sample, y_q):
+    """
+    Draw Q–Q points and the reference line through the sample quartiles
+    y_q. Shared by the exact and the approximate-quantile Q–Q panels.
+    """
+    ax.scatter(theoretical, sample,
+               s=_STYLE["point_size"], color="black", linewidths=0)
+    ax.plot(*_qq_line(theoretical, y_q),
+            color="blue", linewidth=_STYLE["thick_line"])
+    _style_axes(ax, "Q–Q plot", "Theoretical quantiles", "Sample quantiles")
+
+
+def _draw_scale_location(ax, df, large_n=False, df_lo=None):
+    """P3: Scale–Location with LOWESS."""
+    if df_lo is None:
+        df_lo = _smooth_df(df, large_n)
+
+    _draw_points(ax, df["predicted_values"], df["std_resid"], large_n)
+    ax.plot(df_lo["predicted_values"], df_lo["std_resid_smooth"],
+            color="red", linewidth=_STYLE["thick_line"])
+    _style_axes(ax, "Location–Scale plot", "Predicted values",
+                u"√|standardised residuals|")
+
+
+def _cooks_envelope(cooks_d, n_bins, threshold=None, max_above=None):
+    """
+    Decimate Cook's distances to the largest value in each of n_bins
+    consecutive runs of observations, plus every value above threshold.
+
+    If more than max_above values exceed the threshold, only the
+    max_above largest of them are kept, so the number of points drawn
+    stays bounded however large the model.
+
+    Returns the observation indices, in increasing order, and values.
+    """
+    cooks_d = np.asarray(cooks_d, dtype=float)
+    n_obs = len(cooks_d)
+    if n_obs <= n_bins:
+        return np.arange(n_obs), cooks_d
+
+    # First maximum of every bin; fmax skips the NaNs of leverage-one rows
+    edges = np.linspace(0, n_obs, n_bins + 1).astype(int)
+    bin_id = np.repeat(np.arange(n_bins), np.diff(edges))
+    maxima = np.fmax.reduceat(cooks_d, edges[:-1])
+    hits = np.flatnonzero(cooks_d == maxima[bin_id])
+    obs = hits[np.r_[True, np.diff(bin_id[hits]) != 0]]
+
+    if threshold is not None:
+        above = np.flatnonzero(cooks_d > threshold)
+        if max_above is not None and len(above) > max_above:
+            above = above[np.argpartition(cooks_d[above],
+                                          -max_above)[-max_above:]]
+        obs = np.union1d(obs, above)
+
+    return obs, cooks_d[obs]
+
+
+def _cooks_data(df, large_n=False):
+    """
+    Observations, Cook's distances and point size for the Cook's panel.
+
+    In large-n mode these are the per-bin maxima and the points above
+    the 4/n line.
+    """
+    if large_n:
+        obs, cooks_d = _cooks_envelope(df["cooks_d"], _LARGE_N["cooks_bins"],
+                                       4 / len(df),
+                                       COOKS_ABOVE_MAX)
+        return obs, cooks_d, _STYLE["point_size"] / 4
+    return (np.asarray(df["obs"]), np.asarray(df["cooks_d"]),
+            _STYLE["point_size"])
+
+
+def _draw_cooks(ax, df, large_n=False):
+    """P4: Cook’s distance."""
+    obs, cooks_d, point_size = _cooks_data(df, large_n)
+    _draw_lollipops(ax, obs, cooks_d, len(df), point_size)
+
+
+def _draw_lollipops(ax, obs, cooks_d, n_obs, point_size):
+    """
+    Draw Cook's distances as lollipops with the 4/n reference line.
+    """
+    ax.vlines(obs, 0, cooks_d,
+              color="blue", linewidth=_STYLE["thin_line"])
+    ax.scatter(obs, cooks_d,
+               s=point_size, color="black", linewidths=0,
+               zorder=3)
+    ax.axhline(0, color="black", linewidth=_STYLE["thin_line"])
+    ax.axhline(4 / n_obs, color="blue", linestyle="--",
+               linewidth=_STYLE["thin_line"])
+    _style_axes(ax, "Influential points", "Observation", "Cook's D")
+
+
+def _new_figure(figsize=(12, 10)):
+    """
+    Create an empty figure with a 2×2 grid of axes.
+
+    The figure is created without pyplot, so it is never registered
+    with the pyplot figure manager and needs no explicit closing.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.subplots(2, 2).flatten()
+
+
+def _render_matplotlib(df, large_n=False, qq_quantiles=None, figsize=(12, 10),
+                       lowess_grid=None):
+    """
+    Draw all four panels onto one 2×2 figure.
+    """
+    fig, axes = _new_figure(figsize)
+
+    if qq_quantiles is None and large_n:
+        qq_quantiles = _LARGE_N["qq_quantiles"]
+
+    df_lo = _smooth_df(df, large_n, lowess_grid)
+    _draw_residuals(axes[0], df, large_n, df_lo)
+    _draw_qq(axes[1], df, qq_quantiles)
+    _draw_scale_location(axes[2], df, large_n, df_lo)
+    _draw_cooks(axes[3], df, large_n)
+
+    with _stage("layout"):
+        fig.tight_layout()
+    return fig
+
+
+# ======================================================================
+# plotnine renderer (pre-1.3.0 pipeline)
+# ======================================================================
+def _render_plotnine_panels(df, figsize=(12, 10), lowess_grid=None):
+    """
+    Build the four panels with plotnine, rasterise each one and paste
+    the bitmaps into a 2×2 Matplotlib figure.
+    """
+    import matplotlib.pyplot as plt
+    from plotnine import (
+        ggplot, aes, geom_point, geom_line, stat_qq, stat_qq_line,
+        geom_segment, geom_hline, labs, theme_bw, theme, element_text
+    )
+
     n_obs = len(df)
+    df_lo = _smooth_df(df, lowess_grid=lowess_grid)
 
     # Common theme
     diag_theme = (
@@ -123,8 +967,6 @@ def dgplots(results):
     # P1: Residuals vs Fitted with LOWESS
     # ==================================================================
     def build_p1():
-        df_lo = _lowess_df(df, "predicted_values", "residuals")
-
         return (
             ggplot(df, aes("predicted_values", "residuals"))
             + geom_point(size=3)
@@ -159,8 +1001,6 @@ def dgplots(results):
     # P3: Scale–Location with LOWESS
     # ==================================================================
     def build_p3():
-        df_lo = _lowess_df(df, "predicted_values", "std_resid")
-
         return (
             ggplot(df, aes("predicted_values", "std_resid"))
             + geom_point(size=3)
@@ -172,7 +1012,7 @@ def dgplots(results):
             )
             + labs(title="Location–Scale plot",
                    x="Predicted values",
-                   y=u"\u221A|standardised residuals|")
+                   y=u"√|standardised residuals|")
             + diag_theme
         )
 
@@ -194,9 +1034,6 @@ def dgplots(results):
             + diag_theme
         )
 
-    # ==================================================================
-    # Render all plots
-    # ==================================================================
     imgs = [
         _render_plotnine(build_p1()),
         _render_plotnine(build_p2()),
@@ -205,20 +1042,726 @@ def dgplots(results):
     ]
 
     # Composite 2×2 figure
-    fig, axes = plt.subplots(2, 2, figsize=(12, 10))
+    fig, axes = plt.subplots(2, 2, figsize=figsize)
     for ax, img in zip(axes.flatten(), imgs):
         ax.imshow(img)
         ax.axis("off")
     plt.tight_layout()
 
-    # Convert composite to base64 HTML
+    return fig
+
+
+# ======================================================================
+# Encoding helpers shared by dgplots() and dgplots_many()
+# ======================================================================
+def _check_options(engine, large_n, qq_quantiles=None, lowess_grid=None):
+    """Validate the rendering options passed to dgplots()."""
+    if engine not in ("matplotlib", "plotnine"):
+        raise ValueError("engine must be 'matplotlib' or 'plotnine'.")
+
+    if large_n and engine != "matplotlib":
+        raise ValueError("large_n mode requires engine='matplotlib'.")
+
+    if qq_quantiles is not None:
+        if engine != "matplotlib":
+            raise ValueError("qq_quantiles requires engine='matplotlib'.")
+        if int(qq_quantiles) != qq_quantiles or qq_quantiles < 2:
+            raise ValueError("qq_quantiles must be an integer of at least 2.")
+
+    if lowess_grid is not None and (int(lowess_grid) != lowess_grid or
+                                    lowess_grid < 2):
+        raise ValueError("lowess_grid must be an integer of at least 2.")
+
+
+_OUTPUTS = ("html", "bytes", "file", "figure")
+
+_MIME_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+def _check_output(output, file, format, compress_level):
+    """Validate the output options passed to dgplots()."""
+    if output not in _OUTPUTS:
+        raise ValueError(f"output must be one of {', '.join(_OUTPUTS)}.")
+
+    if (output == "file") != (file is not None):
+        raise ValueError("file must be given exactly when output='file'.")
+
+    if format not in _MIME_TYPES:
+        raise ValueError(f"format must be one of {', '.join(_MIME_TYPES)}.")
+
+    if compress_level is not None and (format != "png" or
+                                       compress_level not in range(10)):
+        raise ValueError("compress_level must be 0–9 and needs format='png'.")
+
+
+def _render_figure(df, engine="matplotlib", large_n=False, qq_quantiles=None,
+                   figsize=(12, 10), lowess_grid=None):
+    """
+    Draw the composite figure for the diagnostics DataFrame.
+    """
+    with _stage("drawing", n_obs=len(df), engine=engine, large_n=large_n):
+        if engine == "matplotlib":
+            return _render_matplotlib(df, large_n, qq_quantiles, figsize,
+                                      lowess_grid)
+        return _render_plotnine_panels(df, figsize, lowess_grid)
+
+
+def _save_figure(fig, target, engine="matplotlib", format="png", dpi=150,
+                 compress_level=None):
+    """
+    Encode a composite figure straight into target, a path or a binary
+    file-like object.
+    """
+    # The Matplotlib figure is already laid out tightly; only the pasted
+    # bitmaps need trimming, which costs an extra draw.
+    bbox_inches = None if engine == "matplotlib" else "tight"
+    extra = {}
+    if compress_level is not None:
+        extra["pil_kwargs"] = {"compress_level": compress_level}
+
+    with _stage("encoding", format=format, dpi=dpi):
+        fig.savefig(target, format=format, dpi=dpi, bbox_inches=bbox_inches,
+                    **extra)
+
+    # Only the plotnine composite is registered with pyplot
+    if engine != "matplotlib":
+        import matplotlib.pyplot as plt
+        plt.close(fig)
+
+
+def _figure_to_bytes(fig, engine="matplotlib", **encoding):
+    """Encode a composite figure as image bytes."""
     buf = BytesIO()
-    fig.savefig(buf, format="png", dpi=150, bbox_inches="tight")
-    buf.seek(0)
-    b64 = base64.b64encode(buf.getvalue()).decode("utf-8")
+    _save_figure(fig, buf, engine, **encoding)
+    image = buf.getvalue()
     buf.close()
-    
-    plt.close(fig)
+    return image
+
+
+def _render_image(df, engine="matplotlib", large_n=False, qq_quantiles=None,
+                  figsize=(12, 10), lowess_grid=None, **encoding):
+    """
+    Render the diagnostics DataFrame to composite image bytes.
+    """
+    fig = _render_figure(df, engine, large_n, qq_quantiles, figsize,
+                         lowess_grid)
+    return _figure_to_bytes(fig, engine, **encoding)
+
+
+def _image_to_html(image, format="png"):
+    """Wrap image bytes in a base64 <img> tag."""
+    b64 = base64.b64encode(image).decode("utf-8")
+    return (f'<img style="max-width:100%; height:auto;" '
+            f'src="data:{_MIME_TYPES[format]};base64,{b64}"/>')
+
+
+def _deliver(image, output, file=None, format="png"):
+    """
+    Return encoded image bytes in the requested output mode.
+    """
+    if output == "bytes":
+        return image
+
+    if output == "file":
+        if hasattr(file, "write"):
+            file.write(image)
+        else:
+            with open(file, "wb") as fh:
+                fh.write(image)
+        return None
+
+    from IPython.display import HTML
+    with _stage("html"):
+        return HTML(_image_to_html(image, format))
+
+
+# ======================================================================
+# Drawing from precomputed diagnostics and summaries
+# ======================================================================
+def render_diagnostics(df, engine="matplotlib", large_n=None,
+                       large_n_threshold=LARGE_N_THRESHOLD, qq_quantiles=None,
+                       lowess_grid=None, figsize=(12, 10)):
+    """
+    Draw the four dgplots() panels from a DataFrame of diagnostics
+    rather than a fit, e.g. one group of a batched fit (grouped_ols.py).
+
+    Arguments:
+        df : DataFrame with the predicted_values, residuals, std_resid,
+            cooks_d and obs of every observation
+        engine, large_n, large_n_threshold, qq_quantiles, lowess_grid,
+        figsize : as for dgplots()
+
+    Returns the composite figure, for deliver_figure().
+    """
+    _check_options(engine, large_n, qq_quantiles, lowess_grid)
+    if large_n is None:
+        large_n = engine == "matplotlib" and len(df) > large_n_threshold
+    return _render_figure(df, engine, large_n, qq_quantiles, figsize,
+                          lowess_grid)
+
+
+def render_summary(sample, qq, quartiles, cooks, nobs, figsize=(12, 10)):
+    """
+    Draw the four dgplots() panels from summaries of a fit rather than
+    the fit itself, e.g. for a model fitted out of core (ols_stream.py).
+
+    Arguments:
+        sample : DataFrame with predicted_values, residuals and std_resid
+            for the residual and scale–location panels, usually a sample
+            of the rows
+        qq : DataFrame with the theoretical and sample quantiles of the
+            Q–Q panel (see qq_probabilities())
+        quartiles : first and third sample quartiles, which the Q–Q
+            reference line passes through
+        cooks : DataFrame with the obs and cooks_d values to draw
+        nobs : number of observations, for the 4/n line
+
+    Returns a Matplotlib figure, for deliver_figure().
+    """
+    fig, axes = _new_figure(figsize)
+
+    df_lo = _smooth_df(sample)
+    _draw_residuals(axes[0], sample, df_lo=df_lo)
+    _draw_qq_points(axes[1], qq["theoretical"].to_numpy(),
+                    qq["sample"].to_numpy(), quartiles)
+    _draw_scale_location(axes[2], sample, df_lo=df_lo)
+    _draw_lollipops(axes[3], cooks["obs"], cooks["cooks_d"], nobs,
+                    _STYLE["point_size"] / 4)
+
+    fig.tight_layout()
+    return fig
+
+
+def check_output(output="html", file=None, format="png",
+                 compress_level=None, top_k=None):
+    """
+    Validate the output options of dgplots(), so that callers can fail
+    before any fitting is done.
+    """
+    _check_output(output, file, format, compress_level)
+    if top_k is not None:
+        _check_top_k(top_k)
+
+
+def deliver_figure(fig, output="html", file=None, format="png", dpi=150,
+                   compress_level=None, engine="matplotlib"):
+    """
+    Return a composite figure in the output mode of dgplots(): HTML,
+    image bytes, written to file (returning None) or the figure itself.
+    """
+    if output == "figure":
+        return fig
+
+    encoding = {"format": format, "dpi": dpi,
+                "compress_level": compress_level}
+    if output == "file":
+        _save_figure(fig, file, engine, **encoding)
+        return None
+    return _deliver(_figure_to_bytes(fig, engine, **encoding), output, file,
+                    format)
+
+
+# ======================================================================
+# Split-panel rendering: one figure per panel, drawn concurrently
+# ======================================================================
+_PANEL_EXECUTORS = {"process": ProcessPoolExecutor,
+                    "thread": ThreadPoolExecutor}
+
+# Panel pools are kept between calls, so only the first call with a given
+# executor and number of workers pays for starting them.
+_panel_pools = {}
+_panel_pools_lock = threading.Lock()
+
+
+def _check_panels(panel_workers, panel_executor, engine, output, format):
+    """Validate the split-panel options passed to dgplots()."""
+    if panel_workers is None:
+        return
+
+    if int(panel_workers) != panel_workers or panel_workers < 1:
+        raise ValueError("panel_workers must be a positive integer.")
+
+    if panel_executor not in _PANEL_EXECUTORS:
+        raise ValueError("panel_executor must be 'process' or 'thread'.")
+
+    if engine != "matplotlib":
+        raise ValueError("panel_workers requires engine='matplotlib'.")
+
+    if output == "figure" or format != "png":
+        raise ValueError("panel_workers requires PNG output.")
+
+
+def _panel_tasks(df, large_n, qq_quantiles, lowess_grid, figsize, dpi):
+    """
+    Split the diagnostics into one task per panel, each carrying only the
+    arrays its panel draws. Both LOWESS curves are fitted here, in one
+    pass, rather than in the workers.
+    """
+    if qq_quantiles is None and large_n:
+        qq_quantiles = _LARGE_N["qq_quantiles"]
+
+    df_lo = _smooth_df(df, large_n, lowess_grid)
+    size = (figsize[0] / 2, figsize[1] / 2)
+    x = df["predicted_values"].to_numpy()
+    x_lo = df_lo["predicted_values"].to_numpy()
+
+    def columns(**arrays):
+        return {name: np.asarray(values) for name, values in arrays.items()}
+
+    return [
+        ("residuals", columns(predicted_values=x, residuals=df["residuals"]),
+         columns(predicted_values=x_lo,
+                 residuals_smooth=df_lo["residuals_smooth"]),
+         large_n, size, dpi),
+        ("qq", columns(residuals=df["residuals"]), None, qq_quantiles,
+         size, dpi),
+        ("scale_location",
+         columns(predicted_values=x, std_resid=df["std_resid"]),
+         columns(predicted_values=x_lo,
+                 std_resid_smooth=df_lo["std_resid_smooth"]),
+         large_n, size, dpi),
+        ("cooks", columns(obs=df["obs"], cooks_d=df["cooks_d"]), None,
+         large_n, size, dpi),
+    ]
+
+
+def _render_panel(task):
+    """
+    Worker entry point: draw one panel on its own Agg figure and return
+    its RGBA pixels.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    panel, columns, smooth, option, size, dpi = task
+    df = pd.DataFrame(columns)
+    df_lo = None if smooth is None else pd.DataFrame(smooth)
+
+    fig = Figure(figsize=size, dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.subplots()
+
+    if panel == "residuals":
+        _draw_residuals(ax, df, option, df_lo)
+    elif panel == "qq":
+        _draw_qq(ax, df, option)
+    elif panel == "scale_location":
+        _draw_scale_location(ax, df, option, df_lo)
+    else:
+        _draw_cooks(ax, df, option)
+
+    fig.tight_layout()
+    canvas.draw()
+    return np.array(canvas.buffer_rgba())
+
+
+def _panel_pool(executor, workers):
+    """Return the shared pool for this executor and number of workers."""
+    key = (executor, workers)
+    with _panel_pools_lock:
+        if key not in _panel_pools:
+            _panel_pools[key] = _PANEL_EXECUTORS[executor](
+                max_workers=workers)
+        return _panel_pools[key]
+
+
+def shutdown_panel_workers(wait=True):
+    """
+    Shut down the worker pools kept for dgplots(panel_workers=...).
+
+    Later calls start new pools. Also runs when the interpreter exits.
+
+    Parameters
+    ----------
+    wait : bool, default True
+        Wait for the workers to finish their current panels.
+    """
+    with _panel_pools_lock:
+        pools = list(_panel_pools.values())
+        _panel_pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait)
+
+
+atexit.register(shutdown_panel_workers)
+
+
+def _render_panels(df, large_n=False, qq_quantiles=None, lowess_grid=None,
+                   figsize=(12, 10), dpi=150, panel_workers=1,
+                   panel_executor="process"):
+    """
+    Rasterise the four panels as separate figures, concurrently unless
+    panel_workers is 1, and tile their pixels into the 2×2 composite.
+
+    The panels come back as raw RGBA arrays, so the composite is
+    assembled without encoding or decoding any intermediate image.
+    """
+    with _stage("drawing", n_obs=len(df), engine="matplotlib",
+                large_n=large_n, panel_workers=panel_workers):
+        tasks = _panel_tasks(df, large_n, qq_quantiles, lowess_grid,
+                             figsize, dpi)
+        if panel_workers == 1:
+            panels = [_render_panel(task) for task in tasks]
+        else:
+            pool = _panel_pool(panel_executor, panel_workers)
+            panels = list(pool.map(_render_panel, tasks))
+
+        return np.concatenate([np.concatenate(panels[:2], axis=1),
+                               np.concatenate(panels[2:], axis=1)])
+
 
-    return HTML(f'<img style="max-width:100%; height:auto;" '
-                f'src="data:image/png;base64,{b64}"/>')
+def _save_pixels(pixels, target, dpi=150, compress_level=None):
+    """
+    Encode an RGBA composite as PNG straight into target, a path or a
+    binary file-like object.
+    """
+    from matplotlib.image import imsave
+
+    extra = {}
+    if compress_level is not None:
+        extra["pil_kwargs"] = {"compress_level": compress_level}
+
+    with _stage("encoding", format="png", dpi=dpi):
+        imsave(target, pixels, format="png", dpi=dpi, **extra)
+
+
+# ======================================================================
+# Cache keys: content fingerprints of a fit and its options
+# ======================================================================
+def _fingerprint(results, *options):
+    """
+    Hash everything the rendered panels depend on: residuals, fitted
+    values, the inputs of the influence measures, the rendering options
+    and the module version.
+    """
+    model = results.model
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{__version__}|{type(model).__name__}|{options!r}".encode())
+    for arr in (results.resid, results.fittedvalues,
+                getattr(results, "wresid", results.resid),
+                getattr(model, "wexog", model.exog)):
+        arr = np.ascontiguousarray(arr, dtype=float)
+        h.update(str(arr.shape).encode())
+        h.update(arr.tobytes())
+    h.update(np.float64(results.mse_resid).tobytes())
+    return h.hexdigest()
+
+
+def _cache_key(results, engine, large_n, large_n_threshold, qq_quantiles,
+               lowess_grid, figsize, format, dpi, compress_level,
+               split_panels=False):
+    """
+    Fingerprint of a fit and every option the encoded image depends on.
+    dgplots() and dgplots_many() both use it, so that identical plots
+    share a cache entry.
+    """
+    return _fingerprint(results, engine, large_n, large_n_threshold,
+                        qq_quantiles, lowess_grid, tuple(figsize), format,
+                        dpi, compress_level, split_panels)
+
+
+# ======================================================================
+# Main function
+# ======================================================================
+@_instrumented
+def dgplots(results, engine="matplotlib", large_n=None,
+            large_n_threshold=LARGE_N_THRESHOLD, qq_quantiles=None,
+            lowess_grid=None, cache=None, output="html", file=None,
+            format="png", dpi=150, figsize=(12, 10), compress_level=None,
+            top_k=None, panel_workers=None, panel_executor="process"):
+    """
+    Generate a 2×2 diagnostic panel for a statsmodels regression object.
+    LOWESS smoothing is done by lowess_smooth(), which gives the same
+    curves as statsmodels.lowess and is extremely stable (no LOESS
+    failures).
+
+    Parameters
+    ----------
+    results : RegressionResultsWrapper
+        A fitted statsmodels regression model.
+    engine : {"matplotlib", "plotnine"}, default "matplotlib"
+        "matplotlib" draws all panels directly onto one figure.
+        "plotnine" uses the pre-1.3.0 pipeline, which renders each
+        panel with plotnine and pastes the bitmaps into a composite.
+    large_n : bool or None, default None
+        Draw the residual and scale–location panels as hexbin densities,
+        fit the LOWESS curves to binned means and decimate the Cook's
+        distance panel to its per-bin maxima and the points above the
+        4/n line. None switches this on automatically when the model
+        has more than large_n_threshold observations. Only available
+        with engine="matplotlib".
+    large_n_threshold : int, default LARGE_N_THRESHOLD
+        Number of observations above which large_n=None enables
+        large-n mode.
+    qq_quantiles : int, optional
+        Draw only this many residual quantiles on the Q–Q panel instead
+        of one point per observation, plus the QQ_TAIL_POINTS smallest
+        and largest residuals. Defaults to every residual, or to 500
+        quantiles in large-n mode. Only available with
+        engine="matplotlib".
+    lowess_grid : int, optional
+        Fit the LOWESS curves at only this many evenly spaced predicted
+        values and interpolate in between, as R's
+        loess(surface="interpolate"). Defaults to an exact fit at every
+        point (or bin mean in large-n mode).
+    cache : PlotCache, optional
+        Cache to look the panels up in. Defaults to the cache set up by
+        enable_cache(), if any. Not used with output="figure".
+    output : {"html", "bytes", "file", "figure"}, default "html"
+        "html" wraps the image in a base64 <img> tag for notebooks.
+        "bytes" returns the encoded image. "file" encodes the image
+        straight into `file`. "figure" returns the Matplotlib figure
+        without encoding it.
+    file : str, path-like or binary file-like object, optional
+        Destination for output="file".
+    format : {"png", "svg"}, default "png"
+        Image format.
+    dpi : float, default 150
+        Resolution of PNG output.
+    figsize : tuple of float, default (12, 10)
+        Size of the composite figure in inches.
+    compress_level : int, optional
+        zlib compression level 0–9 for PNG output. Higher levels give
+        smaller files and take longer to encode. Defaults to
+        Matplotlib's setting.
+    top_k : int, optional
+        Also return the top_k most influential observations, as
+        influential_points() does.
+    panel_workers : int, optional
+        Draw and rasterise every panel as a figure of its own, on this
+        many workers, and tile the pixels into the composite before one
+        PNG encode. Each panel is laid out separately. Defaults to one
+        figure for all four panels. Requires engine="matplotlib" and PNG
+        output other than "figure".
+    panel_executor : {"process", "thread"}, default "process"
+        Kind of worker for panel_workers. Worker processes render in
+        parallel; threads only overlap the parts of drawing that release
+        the GIL, but cost nothing to start. The pool is kept for later
+        calls until shutdown_panel_workers().
+
+    Returns
+    -------
+    IPython.display.HTML, bytes, None or matplotlib.figure.Figure
+        Depending on `output`. The figure drawn with engine="plotnine"
+        is a pyplot figure and should be closed by the caller. With
+        top_k, a tuple of this and the DataFrame of influential points.
+    """
+
+    if not isinstance(results, sm.regression.linear_model.RegressionResultsWrapper):
+        raise TypeError("Please provide a statsmodels regression fit.")
+
+    _check_options(engine, large_n, qq_quantiles, lowess_grid)
+    _check_output(output, file, format, compress_level)
+    _check_panels(panel_workers, panel_executor, engine, output, format)
+    if top_k is not None:
+        _check_top_k(top_k)
+    encoding = {"format": format, "dpi": dpi,
+                "compress_level": compress_level}
+
+    def _result(value, table=None):
+        return value if top_k is None else (value, table)
+
+    cache = cache if cache is not None else active_cache()
+    if output == "figure":
+        cache = None
+    if cache is not None:
+        key = _cache_key(results, engine, large_n, large_n_threshold,
+                         qq_quantiles, lowess_grid, figsize, format, dpi,
+                         compress_level, panel_workers is not None)
+        with _stage("cache"):
+            image = cache.get(key, format)
+        if image is not None:
+            table = None if top_k is None else influential_points(results,
+                                                                  top_k)
+            return _result(_deliver(image, output, file, format), table)
+
+    df = _diagnostics_df(results)
+    table = None if top_k is None else _top_influential(df, top_k)
+
+    if large_n is None:
+        large_n = engine == "matplotlib" and len(df) > large_n_threshold
+
+    if panel_workers is None:
+        fig = _render_figure(df, engine, large_n, qq_quantiles, figsize,
+                             lowess_grid)
+        if output == "figure":
+            return _result(fig, table)
+
+        def save(target):
+            _save_figure(fig, target, engine, **encoding)
+    else:
+        pixels = _render_panels(df, large_n, qq_quantiles, lowess_grid,
+                                figsize, dpi, panel_workers, panel_executor)
+
+        def save(target):
+            _save_pixels(pixels, target, dpi, compress_level)
+
+    # Without a cache to fill, files are written without a copy in memory
+    if output == "file" and cache is None:
+        save(file)
+        return _result(None, table)
+
+    buf = BytesIO()
+    save(buf)
+    image = buf.getvalue()
+    if cache is not None:
+        cache.put(key, image, format)
+
+    return _result(_deliver(image, output, file, format), table)
+
+# ======================================================================
+# Batch rendering over a process pool
+# ======================================================================
+# Only the columns the panels draw are shipped to the workers.
+_PAYLOAD_COLUMNS = ("residuals", "predicted_values", "std_resid", "cooks_d")
+
+
+def _render_payload(payload):
+    """
+    Worker entry point: render one payload of diagnostic arrays to image
+    bytes.
+    """
+    (columns, engine, large_n, qq_quantiles, lowess_grid, figsize,
+     encoding) = payload
+    df = pd.DataFrame(columns)
+    df["obs"] = np.arange(len(df))
+    return _render_image(df, engine, large_n, qq_quantiles, figsize,
+                         lowess_grid, **encoding)
+
+
+def _write_report(path, names, images, format="png"):
+    """Write the rendered panels into a single self-contained HTML page."""
+    sections = [
+        f"<section>\n<h2>{html.escape(str(name))}</h2>\n"
+        f"{_image_to_html(image, format)}\n</section>"
+        for name, image in zip(names, images)
+    ]
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write("<!DOCTYPE html>\n<html>\n<head>\n"
+                 '<meta charset="utf-8">\n'
+                 "<title>Diagnostic plots</title>\n</head>\n<body>\n")
+        fh.write("\n".join(sections))
+        fh.write("\n</body>\n</html>\n")
+
+
+def _write_images(directory, names, images, format="png"):
+    """Write one image file per model, numbered in input order."""
+    os.makedirs(directory, exist_ok=True)
+    for i, (name, image) in enumerate(zip(names, images)):
+        stem = re.sub(r"[^\w.-]+", "_", str(name))
+        path = os.path.join(directory, f"{i:04d}_{stem}.{format}")
+        with open(path, "wb") as fh:
+            fh.write(image)
+
+
+@_instrumented
+def dgplots_many(models, workers=None, names=None, html_report=None,
+                 image_dir=None, engine="matplotlib", large_n=None,
+                 large_n_threshold=LARGE_N_THRESHOLD, qq_quantiles=None,
+                 lowess_grid=None, cache=None, format="png", dpi=150,
+                 figsize=(12, 10), compress_level=None):
+    """
+    Render diagnostic panels for many statsmodels regression fits.
+
+    Influence measures are computed in the calling process, which is
+    cheap with influence_measures(). Only the four arrays the panels
+    draw are sent to the worker processes, and only image bytes come
+    back. Timing hooks only see the stages run in the calling process,
+    which includes rendering when workers=1.
+
+    Parameters
+    ----------
+    models : sequence of RegressionResultsWrapper
+        Fitted statsmodels regression models.
+    workers : int or None, default None
+        Number of worker processes. None uses os.cpu_count(); 1 renders
+        serially in the calling process without starting a pool.
+    names : sequence of str, optional
+        Labels for the models, used as report headings and file names.
+        Defaults to "model_0", "model_1", ...
+    html_report : str, optional
+        If given, write all panels to this HTML file.
+    image_dir : str, optional
+        If given, write one image file per model to this directory.
+    engine, large_n, large_n_threshold, qq_quantiles, lowess_grid, cache
+        As for dgplots(). Cached models are not sent to the pool.
+    format, dpi, figsize, compress_level
+        Image encoding, as for dgplots().
+
+    Returns
+    -------
+    list of bytes
+        One composite image per model, in the order of `models`.
+    """
+    models = list(models)
+    names = [f"model_{i}" for i in range(len(models))] if names is None \
+        else list(names)
+
+    if len(names) != len(models):
+        raise ValueError("names must have one entry per model.")
+
+    for results in models:
+        if not isinstance(results, sm.regression.linear_model.RegressionResultsWrapper):
+            raise TypeError("Please provide statsmodels regression fits.")
+
+    _check_options(engine, large_n, qq_quantiles, lowess_grid)
+    _check_output("bytes", None, format, compress_level)
+    encoding = {"format": format, "dpi": dpi,
+                "compress_level": compress_level}
+
+    cache = cache if cache is not None else active_cache()
+    pngs = [None] * len(models)
+    keys = [None] * len(models)
+    todo = []
+    payloads = []
+    for i, results in enumerate(models):
+        if cache is not None:
+            keys[i] = _cache_key(results, engine, large_n,
+                                 large_n_threshold, qq_quantiles,
+                                 lowess_grid, figsize, format, dpi,
+                                 compress_level)
+            pngs[i] = cache.get(keys[i], format)
+            if pngs[i] is not None:
+                continue
+
+        df = _diagnostics_df(results)
+        use_large_n = large_n if large_n is not None else \
+            engine == "matplotlib" and len(df) > large_n_threshold
+        columns = {col: df[col].to_numpy() for col in _PAYLOAD_COLUMNS}
+        todo.append(i)
+        payloads.append((columns, engine, use_large_n, qq_quantiles,
+                         lowess_grid, figsize, encoding))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers == 1 or len(payloads) <= 1:
+        rendered = [_render_payload(payload) for payload in payloads]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = list(pool.map(_render_payload, payloads))
+
+    for i, png in zip(todo, rendered):
+        pngs[i] = png
+        if cache is not None:
+            cache.put(keys[i], png, format)
+
+    if html_report is not None:
+        _write_report(html_report, names, pngs, format)
+
+    if image_dir is not None:
+        _write_images(image_dir, names, pngs, format)
+
+    return pngs
+
+
+# ======================================================================
+# Names defined in modules built on this one
+# ======================================================================
+def __getattr__(name):
+    # dg_renderer.py imports this module, so DiagnosticRenderer is only
+    # imported from it on first access
+    if name == "DiagnosticRenderer":
+        from dg_renderer import DiagnosticRenderer
+        return DiagnosticRenderer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
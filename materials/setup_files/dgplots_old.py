@@ -15,8 +15,8 @@ def dgplots(results: Type[sm.regression.linear_model.RegressionResultsWrapper])
 
     residuals = results.resid.rename("residuals")
     predicted_values = results.fittedvalues.rename("predicted_values")
-    std_resid = pd.Series(np.sqrt(np.abs(results.get_influence().resid_studentized_internal))).rename("std_resid")
     influence = results.get_influence()
+    std_resid = pd.Series(np.sqrt(np.abs(influence.resid_studentized_internal))).rename("std_resid")
     cooks_d = pd.Series(influence.cooks_distance[0]).rename("cooks_d")
     leverage = pd.Series(influence.hat_matrix_diag).rename("leverage")
     obs = pd.Series(range(len(residuals))).rename("obs")
@@ -0,0 +1,181 @@
+# Two-level LRU cache of rendered diagnostic images
+"""
+The opt-in image cache of dgplots() and dgplots_many().
+
+Rendered images are stored under a fingerprint of the fit and of every
+option the image depends on, computed by dgplots. A PlotCache keeps the
+most recently used images in memory, bounded by count and by bytes, and
+optionally in a directory, bounded by bytes, so that they survive the
+session. enable_cache() sets up the cache every call uses unless one is
+passed explicitly.
+
+Example:
+    cache = enable_cache("images/cache")
+    dgplots(fit)
+    dgplots(fit)    # served from the cache
+    cache.stats()
+"""
+
+import os
+from collections import OrderedDict
+
+__all__ = ["PlotCache", "enable_cache", "disable_cache", "active_cache"]
+
+# Image formats stored, as file extensions
+_FORMATS = ("png", "svg")
+
+
+# ======================================================================
+# Cache
+# ======================================================================
+class PlotCache:
+    """
+    Two-level LRU cache of rendered images, keyed by model fingerprint.
+
+    The in-memory level keeps up to max_items entries totalling at most
+    max_bytes. If a directory is given, entries are also stored there as
+    <key>.<format> (png or svg), and the oldest files are removed once
+    their total size exceeds max_bytes. Hits on disk are promoted to
+    memory. The entry just stored is never evicted, even if it alone
+    exceeds max_bytes.
+
+    Attributes
+    ----------
+    hits, misses : int
+        Lookup counters since creation or the last clear().
+    """
+
+    def __init__(self, directory=None, max_items=128, max_bytes=256 * 2**20):
+        self.directory = directory
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __repr__(self):
+        return (f"PlotCache(directory={self.directory!r}, "
+                f"items={len(self._memory)}, hits={self.hits}, "
+                f"misses={self.misses})")
+
+    def _path(self, key, format):
+        return os.path.join(self.directory, f"{key}.{format}")
+
+    @staticmethod
+    def _is_entry(name):
+        return os.path.splitext(name)[1][1:] in _FORMATS
+
+    def get(self, key, format="png"):
+        """Return the stored image bytes for key, or None on a miss."""
+        image = self._memory.get(key)
+        if image is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return image
+
+        path = None if self.directory is None else self._path(key, format)
+        if path is not None and os.path.exists(path):
+            with open(path, "rb") as fh:
+                image = fh.read()
+            os.utime(path)  # mark as recently used
+            self._remember(key, image)
+            self.hits += 1
+            return image
+
+        self.misses += 1
+        return None
+
+    def put(self, key, image, format="png"):
+        """
+        Store image bytes of the given format under key, evicting old
+        entries if needed.
+        """
+        self._remember(key, image)
+
+        if self.directory is not None:
+            path = self._path(key, format)
+            with open(path, "wb") as fh:
+                fh.write(image)
+            self._evict_disk(keep=path)
+
+    def _remember(self, key, image):
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = image
+        self._memory_bytes += len(image)
+
+        # Oldest first, but never the entry just stored
+        while len(self._memory) > 1 and (
+                len(self._memory) > self.max_items
+                or self._memory_bytes > self.max_bytes):
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _evict_disk(self, keep):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if self._is_entry(entry.name) and entry.path != keep:
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = os.path.getsize(keep) + sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def stats(self):
+        """Return hit/miss counters and the current cache size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "items_in_memory": len(self._memory),
+            "bytes_in_memory": self._memory_bytes,
+        }
+
+    def clear(self):
+        """Drop all entries, on disk too, and reset the counters."""
+        self._memory.clear()
+        self._memory_bytes = 0
+        if self.directory is not None:
+            for name in os.listdir(self.directory):
+                if self._is_entry(name):
+                    os.remove(os.path.join(self.directory, name))
+        self.hits = 0
+        self.misses = 0
+
+
+# ======================================================================
+# The cache dgplots() uses by default
+# ======================================================================
+_cache = None
+
+
+def enable_cache(directory=None, max_items=128, max_bytes=256 * 2**20):
+    """
+    Turn on caching for every dgplots() and dgplots_many() call.
+
+    Returns the PlotCache, so its stats() can be inspected.
+    """
+    global _cache
+    _cache = PlotCache(directory, max_items, max_bytes)
+    return _cache
+
+
+def disable_cache():
+    """Turn off the cache set up by enable_cache()."""
+    global _cache
+    _cache = None
+
+
+def active_cache():
+    """Return the cache set up by enable_cache(), or None."""
+    return _cache
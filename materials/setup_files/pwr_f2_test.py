@@ -1,26 +1,238 @@
 # Corrected and simplified version of pwr_f2_test
 # Matches R's pwr.f2.test()
+"""
+Power calculations for the F-test of a linear model, as R's
+pwr.f2.test(): give four of u, v, f2, sig_level and power and
+pwr_f2_test() solves for the fifth.
 
+Unlike pwr_f2_test_v1.0.0.py, pwr_f2_test() returns a PowerResult
+instead of printing the report. The result displays as the same report
+when it is the last expression of a notebook cell; anywhere else, print
+it:
+
+    print(pwr_f2_test(u=6, f2=0.15, sig_level=0.05, power=0.9))
+
+pwr_f2_grid() solves many scenarios at once.
+"""
+
+import json
+from functools import lru_cache
+
+import numpy as np
 from numpy import ceil
-from scipy.stats import f, ncf
+from scipy.stats import f, ncf, norm
 from scipy.optimize import brenth
 
+__all__ = [
+    "pwr_f2_test", "pwr_f2_grid", "PowerResult", "power_results_frame",
+    "power_cache_info", "power_cache_clear",
+]
+
+# Search intervals for the unknown parameter, shared by the scalar and
+# the vectorized solver.
+_BRACKETS = {
+    "u": (1 + 1e-9, 200),
+    "v": (1 + 1e-9, 1e6),
+    "f2": (1e-9, 1e3),
+    "sig_level": (1e-10, 0.5),
+}
+
+
+# Bounded memoization of the special-function calls made by the solvers.
+# Root finding for f2 or power re-evaluates the same critical value on
+# every iteration, and planning sweeps repeat whole scenarios.
+CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _critical_f(sig_level, u, v):
+    """Memoized upper critical value of the central F distribution."""
+    return float(f.isf(sig_level, u, v))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _ncf_sf(x, u, v, ncp):
+    """Memoized upper tail of the noncentral F distribution."""
+    return float(ncf.sf(x, u, v, ncp))
+
+
+def _critical_f_array(sig_level, u, v):
+    """
+    Critical F values for broadcast arrays, evaluating f.isf only once
+    per distinct (sig_level, u, v) triple.
+    """
+    sig_level, u, v = np.broadcast_arrays(sig_level, u, v)
+    triples = np.stack([np.ravel(sig_level), np.ravel(u), np.ravel(v)])
+    unique, inverse = np.unique(triples, axis=1, return_inverse=True)
+    Fcrit = f.isf(unique[0], unique[1], unique[2])
+    return Fcrit[np.ravel(inverse)].reshape(sig_level.shape)
+
+
+def power_cache_info():
+    """
+    Hit/miss statistics of the memoized critical-F and noncentral-F
+    evaluations, as a dict of functools cache_info() tuples.
+    """
+    return {
+        "critical_f": _critical_f.cache_info(),
+        "ncf_sf": _ncf_sf.cache_info(),
+    }
+
+
+def power_cache_clear():
+    """Empty the memoized critical-F and noncentral-F evaluations."""
+    _critical_f.cache_clear()
+    _ncf_sf.cache_clear()
+
+
 def _power_f2(u, v, f2, sig_level):
     """
     Internal function returning power for given parameters.
     Mirrors R's pwr.f2.test().
+
+    All arguments may be NumPy arrays; they are broadcast together.
+    Scalar calls go through the memoized evaluations.
     """
-    # Critical F value
-    Fcrit = f.isf(sig_level, u, v)
+    if all(np.ndim(x) == 0 for x in (u, v, f2, sig_level)):
+        u, v, f2, sig_level = float(u), float(v), float(f2), float(sig_level)
+
+        # Critical F value and noncentrality parameter
+        Fcrit = _critical_f(sig_level, u, v)
+        ncp = f2 * (u + v + 1)
 
-    # Noncentrality parameter
+        # Power = upper tail of noncentral F at the critical value
+        return _ncf_sf(Fcrit, u, v, ncp)
+
+    Fcrit = _critical_f_array(sig_level, u, v)
     ncp = f2 * (u + v + 1)
+    return ncf.sf(Fcrit, u, v, ncp)
+
 
-    # Power = 1 - CDF of noncentral F at the critical value
-    return 1 - ncf.cdf(Fcrit, u, v, ncp)
+class PowerResult:
+    """
+    Result of pwr_f2_test().
 
+    Displays like the text report of earlier versions, and converts
+    cheaply to a dict, JSON or a DataFrame row for bulk output.
 
-def pwr_f2_test(u=None, v=None, f2=None, sig_level=None, power=None):
+    Attributes:
+        u, v, f2, sig_level, power : the five test parameters
+        num_obs : number of observations, ceil(u) + ceil(v) + 1
+        iterations : root-finding iterations (0 if nothing was solved)
+        converged : whether the root finder converged
+    """
+
+    __slots__ = ("u", "v", "f2", "sig_level", "power", "num_obs",
+                 "iterations", "converged")
+
+    def __init__(self, u, v, f2, sig_level, power, iterations=0,
+                 converged=True):
+        self.u = u
+        self.v = v
+        self.f2 = f2
+        self.sig_level = sig_level
+        self.power = power
+        self.num_obs = int(ceil(u)) + int(ceil(v)) + 1
+        self.iterations = iterations
+        self.converged = converged
+
+    def __repr__(self):
+        return "\n".join([
+            "Power analysis results:",
+            f" u is: {self.u}",
+            f" v is: {self.v}",
+            f" f2 is: {self.f2}",
+            f" sig_level is: {self.sig_level}",
+            f" power is: {self.power}",
+            f" num_obs is: {self.num_obs}",
+        ])
+
+    def to_dict(self):
+        """Return the result as a plain dict of Python scalars."""
+        values = {name: getattr(self, name) for name in self.__slots__}
+        return {name: value.item() if isinstance(value, np.generic) else value
+                for name, value in values.items()}
+
+    def to_json(self):
+        """Return the result as a JSON object string."""
+        return json.dumps(self.to_dict())
+
+    def to_frame(self):
+        """Return the result as a single-row DataFrame."""
+        import pandas as pd
+        return pd.DataFrame([self.to_dict()])
+
+
+def power_results_frame(results):
+    """
+    Collect many PowerResult objects into one DataFrame, one row each.
+    """
+    import pandas as pd
+    return pd.DataFrame.from_records(
+        [result.to_dict() for result in results],
+        columns=list(PowerResult.__slots__),
+    )
+
+
+def _solve_v_integer(u, f2, sig_level, power):
+    """
+    Smallest integer v whose power reaches the target.
+
+    Starts from a normal approximation of the required noncentrality,
+    then brackets the answer by exponential search and narrows it down by
+    binary search. Power increases with v, so this needs a handful of
+    noncentral-F evaluations rather than a continuous root search.
+
+    Returns (v, achieved power, number of power evaluations, converged).
+    """
+    v_max = int(_BRACKETS["v"][1])
+    evaluations = 0
+    achieved = {}
+
+    def reaches(v_candidate):
+        nonlocal evaluations
+        evaluations += 1
+        achieved[v_candidate] = float(_power_f2(u, v_candidate, f2, sig_level))
+        return achieved[v_candidate] >= power
+
+    # ncp needed by a two-sided z-test, plus u - 1 for the extra df
+    ncp = (norm.isf(sig_level / 2) + norm.ppf(power)) ** 2 + (u - 1)
+    guess = int(min(max(ceil(ncp / f2 - u - 1), 1), v_max))
+
+    # Exponential search for lo (too small) < hi (large enough)
+    step = max(guess // 8, 1)
+    if reaches(guess):
+        hi, lo = guess, guess - step
+        while lo >= 1 and reaches(lo):
+            hi, step = lo, step * 2
+            lo = hi - step
+        lo = max(lo, 0)
+    else:
+        lo, hi = guess, guess + step
+        while hi < v_max and not reaches(hi):
+            lo, step = hi, step * 2
+            hi = lo + step
+        if hi >= v_max:
+            hi = v_max
+            if not reaches(hi):
+                return hi, achieved[hi], evaluations, False
+
+    # Binary search on (lo, hi]
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if reaches(mid):
+            hi = mid
+        else:
+            lo = mid
+
+    if hi not in achieved:
+        reaches(hi)
+
+    return hi, achieved[hi], evaluations, True
+
+
+def pwr_f2_test(u=None, v=None, f2=None, sig_level=None, power=None,
+                integer=False):
     """
     One of u, v, f2, sig_level, power must be None.
     Computes the missing value.
@@ -31,6 +243,12 @@ def pwr_f2_test(u=None, v=None, f2=None, sig_level=None, power=None):
         f2 : Cohen's f^2
         sig_level : significance level (alpha)
         power : test power
+        integer : when solving for v, return the smallest whole number
+            of denominator degrees of freedom that reaches the target
+            power; power then reports the power achieved at that v
+
+    Returns a PowerResult, which displays as the familiar report. For
+    many scenarios at once use pwr_f2_grid().
     """
 
     # Ensure exactly one parameter is missing
@@ -38,35 +256,153 @@ def pwr_f2_test(u=None, v=None, f2=None, sig_level=None, power=None):
     if sum(p is None for p in params) != 1:
         raise ValueError("Exactly one parameter must be None.")
 
+    if integer:
+        if v is not None:
+            raise ValueError("integer=True requires v to be None.")
+        v, achieved, evaluations, converged = _solve_v_integer(
+            u, f2, sig_level, power)
+        return PowerResult(u, v, f2, sig_level, achieved,
+                           iterations=evaluations, converged=converged)
+
     # Solve for missing parameter if necessary
+    root = None
+
     if power is None:
-        power = _power_f2(u, v, f2, sig_level)
+        power = float(_power_f2(u, v, f2, sig_level))
 
     elif f2 is None:
         def fn(f2_candidate):
             return _power_f2(u, v, f2_candidate, sig_level) - power
-        f2 = brenth(fn, 1e-9, 1e3)
+        f2, root = brenth(fn, *_BRACKETS["f2"], full_output=True)
 
     elif u is None:
         def fn(u_candidate):
             return _power_f2(u_candidate, v, f2, sig_level) - power
-        u = brenth(fn, 1+1e-9, 200)
+        u, root = brenth(fn, *_BRACKETS["u"], full_output=True)
 
     elif v is None:
         def fn(v_candidate):
             return _power_f2(u, v_candidate, f2, sig_level) - power
-        v = brenth(fn, 1+1e-9, 1e6)
+        v, root = brenth(fn, *_BRACKETS["v"], full_output=True)
 
     elif sig_level is None:
         def fn(sig_candidate):
             return _power_f2(u, v, f2, sig_candidate) - power
-        sig_level = brenth(fn, 1e-10, 0.5)
-
-    # Report results exactly like your previous function
-    print("Power analysis results:")
-    print(f" u is: {u}")
-    print(f" v is: {v}")
-    print(f" f2 is: {f2}")
-    print(f" sig_level is: {sig_level}")
-    print(f" power is: {power}")
-    print(f" num_obs is: {int(ceil(u)) + int(ceil(v)) + 1}")
+        sig_level, root = brenth(fn, *_BRACKETS["sig_level"],
+                                 full_output=True)
+
+    if root is None:
+        return PowerResult(u, v, f2, sig_level, power)
+
+    return PowerResult(u, v, f2, sig_level, power,
+                       iterations=root.iterations,
+                       converged=root.converged)
+
+
+def _solve_batched(fn, lo, hi, xtol=1e-12, rtol=1e-10, maxiter=100):
+    """
+    Find roots of an element-wise monotone function for a whole array of
+    brackets at once, using the Illinois variant of regula falsi.
+
+    Every iteration makes one vectorized call to fn. Elements without a
+    sign change over [lo, hi] are returned as NaN.
+    """
+    a, b = np.broadcast_arrays(np.asarray(lo, dtype=float),
+                               np.asarray(hi, dtype=float))
+    a, b = a.copy(), b.copy()
+    fa, fb = fn(a), fn(b)
+
+    bracketed = np.sign(fa) != np.sign(fb)
+    done = ~bracketed | (fa == 0) | (fb == 0)
+    root = np.where(fa == 0, a, b)
+    side = np.zeros(a.shape, dtype=int)
+
+    for _ in range(maxiter):
+        active = ~done & (np.abs(b - a) > xtol + rtol * np.abs(b))
+        if not active.any():
+            break
+
+        c = np.where(active, (a * fb - b * fa) / (fb - fa), root)
+        fc = np.where(active, fn(c), 0.0)
+
+        # Root lies in [c, b] when f(c) has the sign of f(a)
+        move_a = active & (np.sign(fc) == np.sign(fa))
+        move_b = active & ~move_a
+
+        # Illinois step: halve the stale end point's value when the same
+        # end point is kept twice in a row
+        fb = np.where(move_a & (side == 1), fb / 2, fb)
+        fa = np.where(move_b & (side == -1), fa / 2, fa)
+
+        a = np.where(move_a, c, a)
+        fa = np.where(move_a, fc, fa)
+        b = np.where(move_b, c, b)
+        fb = np.where(move_b, fc, fb)
+        side = np.where(move_a, 1, np.where(move_b, -1, side))
+
+        root = np.where(active, c, root)
+        done |= active & (fc == 0)
+
+    return np.where(bracketed | (fa == 0) | (fb == 0), root, np.nan)
+
+
+def pwr_f2_grid(u=None, v=None, f2=None, sig_level=None, power=None):
+    """
+    Vectorized version of pwr_f2_test() for power curves and grids.
+
+    Each argument may be a scalar or an array; they are broadcast against
+    each other, so e.g. v=np.arange(10, 200) with f2=[[0.02], [0.15],
+    [0.35]] gives one row per (f2, v) pair. Exactly one argument must be
+    None, and it is solved for in every scenario at once.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per scenario, with columns u, v, f2, sig_level, power and
+        num_obs. Scenarios without a solution inside the search interval
+        have NaN in the solved column.
+    """
+    params = {"u": u, "v": v, "f2": f2, "sig_level": sig_level,
+              "power": power}
+    missing = [name for name, value in params.items() if value is None]
+    if len(missing) != 1:
+        raise ValueError("Exactly one parameter must be None.")
+    missing = missing[0]
+
+    given = dict(zip(
+        [name for name in params if name != missing],
+        np.broadcast_arrays(*[np.asarray(value, dtype=float)
+                              for name, value in params.items()
+                              if name != missing])
+    ))
+
+    if missing == "power":
+        solved = _power_f2(given["u"], given["v"], given["f2"],
+                           given["sig_level"])
+    elif missing == "f2":
+        # The critical value does not depend on f2: compute it once
+        u, v = given["u"], given["v"]
+        Fcrit = _critical_f_array(given["sig_level"], u, v)
+
+        def fn(candidate):
+            return ncf.sf(Fcrit, u, v, candidate * (u + v + 1)) - given["power"]
+
+        lo, hi = _BRACKETS["f2"]
+        shape = given["power"].shape
+        solved = _solve_batched(fn, np.full(shape, lo), np.full(shape, hi))
+    else:
+        def fn(candidate):
+            args = {**given, missing: candidate}
+            return _power_f2(args["u"], args["v"], args["f2"],
+                             args["sig_level"]) - args["power"]
+
+        lo, hi = _BRACKETS[missing]
+        shape = given["power"].shape
+        solved = _solve_batched(fn, np.full(shape, lo), np.full(shape, hi))
+
+    import pandas as pd
+
+    out = {**given, missing: solved}
+    df = pd.DataFrame({name: np.ravel(out[name]) for name in params})
+    df["num_obs"] = np.ceil(df["u"]) + np.ceil(df["v"]) + 1
+    return df
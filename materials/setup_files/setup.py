@@ -1,11 +1,22 @@
-from plotnine import *
+import os
+import sys
+
+# Course helpers load lazily: dgplots.py (and Matplotlib) is only imported
+# when dgplots() is first called, pwr_f2_test.py on first pwr_f2_test().
+sys.path.insert(0, os.path.abspath('scripts'))
+from corestats import *
+from corestats import lazy_import, lazy_star
+
+# The practicals use plotnine's names unqualified. They are bound here as
+# proxies, so plotnine (and Matplotlib) is only imported, and the course
+# theme set, when the first plot is made. The remaining packages load on
+# first attribute access.
+globals().update(lazy_star(
+    'plotnine', on_import=lambda p9: p9.theme_set(p9.theme_bw())))
 import pandas as pd
 import numpy as np
-import pingouin as pg
 from scipy import stats
-import statsmodels.api as sm
-import statsmodels.formula.api as smf
-import scikit_posthocs as sp
-exec(open('scripts/dgplots.py').read())
-exec(open('scripts/pwr_f2_test.py').read())
-theme_set(theme_bw())
+pg = lazy_import('pingouin')
+sm = lazy_import('statsmodels.api')
+smf = lazy_import('statsmodels.formula.api')
+sp = lazy_import('scikit_posthocs')